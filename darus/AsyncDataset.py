@@ -0,0 +1,325 @@
+import asyncio
+import validators
+import warnings
+from pathlib import Path
+
+from .AsyncDatasetFile import AsyncDatasetFile
+from .Dataset import DEFAULT_POOL_SIZE
+from .DatasetMetadata import DatasetMetadata
+from .DownloadEvent import DownloadEvent
+from .Manifest import Manifest
+from .MetadataCache import MetadataCache
+from .utils import get_logger
+
+try:
+    import httpx
+except ImportError:  # Optional dependency: pip install darus[async]
+    httpx = None
+
+
+class AsyncDataset(DatasetMetadata):
+    """
+    A dataset whose metadata and files are fetched with an asyncio http client (httpx).
+
+    The metadata is parsed like Dataset, summary() is shared. The session based methods of Dataset
+    (sync, verify, check_disk_space) are not available. Use it as async context manager:
+
+        async with AsyncDataset(url) as ds:
+            await ds.download(path)
+    """
+
+    file_class = AsyncDatasetFile
+
+    def __init__(
+        self,
+        url: str,
+        api_token: str = None,
+        client=None,
+        max_connections: int = DEFAULT_POOL_SIZE,
+        transport=None,
+        cache: bool = False,
+        cache_dir: str = None,
+        offline: bool = False,
+    ):
+        """
+        Creates Instance of the async Dataloader. The dataset information is fetched by load().
+
+        :param url: The url to download the dataset from.
+        :type url: str
+        :param api_token: The token needed for private data access. [Default: None]
+        :type api_token: str
+        :param client: A client to share with other datasets. If None, an own client is created. The api_token is then sent per request. [Default: None]
+        :type client: httpx.AsyncClient
+        :param max_connections: The maximal number of connections of an own client. [Default: 10]
+        :type max_connections: int
+        :param transport: A transport used by an own client, e.g. to configure retries or certificates. [Default: None]
+        :type transport: httpx.AsyncBaseTransport
+        :param cache: Indicates if the dataset information is cached on disk. [Default: False]
+        :type cache: bool
+        :param cache_dir: The directory of the metadata cache, enables the cache. [Default: $XDG_CACHE_HOME/darus or ~/.cache/darus]
+        :type cache_dir: str
+        :param offline: Indicates if the dataset information is only read from the metadata cache, without any request. [Default: False]
+        :type offline: bool
+
+        :raise ImportError: If httpx is not installed.
+        :raise ValueError: If the provided url is not a valid url.
+        """
+        if httpx is None:
+            raise ImportError(
+                "AsyncDataset requires httpx. Install it with: pip install darus[async]"
+            )
+
+        if not validators.url(url):
+            raise ValueError(f"Provided url is not valid {url}.")
+
+        self.downloading_files = []
+        self.header = {"X-Dataverse-key": api_token} if api_token else None
+
+        self._owns_session = client is None
+        if self._owns_session:
+            client = httpx.AsyncClient(
+                headers=self.header,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+                follow_redirects=True,
+                transport=transport,
+                timeout=httpx.Timeout(30.0, read=None),
+            )
+        self.client = client
+        self._request_header = None if self._owns_session else self.header
+
+        self.offline = offline
+        self.cache = MetadataCache(cache_dir) if cache or cache_dir or offline else None
+
+        self._init_metadata(url)
+
+    async def __aenter__(self):
+        """Loads the dataset information."""
+        await self.load()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """Closes the connections of an own client."""
+        await self.aclose()
+
+    async def load(self):
+        """Fetches the dataset information from the url."""
+        try:
+            key, entry, headers = self._prepare_metadata_request()
+            if self.offline:
+                self._parse_offline_information(entry)
+                return
+
+            r = await self.client.get(self.dataset_url, headers=headers or None)
+            if r.status_code == 304 and entry is not None:
+                # Not modified since it was cached
+                self._parse_dataset_information(entry["response"])
+                return
+
+            r.raise_for_status()
+            response = r.json()
+            self._parse_dataset_information(response)
+
+            if self.cache is not None:
+                self.cache.store(
+                    key, response, r.headers.get("ETag"), r.headers.get("Last-Modified")
+                )
+        except KeyError as ke:
+            logger = get_logger(__name__)
+            logger.error(f"Couldn't find following key in web response: {ke}")
+            self.download_files = []
+        except httpx.HTTPStatusError as exception:
+            logger = get_logger(__name__)
+            logger.error(
+                f"An error occurred while trying to access dataset: {str(exception)}"
+            )
+            self.download_files = []
+        except Exception as exception:
+            logger = get_logger(__name__)
+            logger.error(f"Unexpected error: {exception}")
+            self.download_files = []
+
+    def close(self):
+        """Not available for the async client, use aclose()."""
+        raise TypeError("Use 'await AsyncDataset.aclose()' to close the client.")
+
+    async def aclose(self):
+        """Closes the connections of the client, if it is owned by the dataset."""
+        if self._owns_session:
+            await self.client.aclose()
+
+    async def events(
+        self,
+        path: str,
+        files: list = [],
+        post_process=True,
+        remove_after_pp=True,
+        max_concurrency: int = 4,
+        use_manifest: bool = True,
+    ):
+        """
+        Downloads the dataset and yields the progress of every file as DownloadEvent.
+
+        :param path: The path where the files are downloaded. It is created if it does not exist.
+        :type path: str
+        :param files: A list of files, that will be downloaded from dataset. If the list is empty, whole dataset is downloaded. [Default []]
+        :type files: list
+        :param post_process: Indicates if the files should be post processed. [Default: True]
+        :type post_process: bool
+        :param remove_after_pp: Indicates if the files should be deleted after being post processed. [Default: True]
+        :type remove_after_pp: bool
+        :param max_concurrency: The number of files that are downloaded concurrently. [Default: 4]
+        :type max_concurrency: int
+        :param use_manifest: Indicates if files that are already verified according to the manifest in path are skipped. [Default: True]
+        :type use_manifest: bool
+        :yields: The DownloadEvent of every step.
+
+        :raise ValueError: If max_concurrency is smaller than 1.
+        """
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, got {max_concurrency}."
+            )
+
+        if not post_process and remove_after_pp:
+            remove_after_pp = False
+            warnings.warn(
+                "Disabled removing files after post processing, as no post processing is desired."
+            )
+
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        selected_files = self._select_files(files)
+        manifest = Manifest(path) if use_manifest else None
+        semaphore = asyncio.Semaphore(max_concurrency)
+        queue = asyncio.Queue()
+
+        async def run(f):
+            async with semaphore:
+                await self._download_file(
+                    f, path, queue.put, post_process, remove_after_pp, manifest
+                )
+
+        async def run_all():
+            try:
+                await asyncio.gather(*(run(f) for f in selected_files))
+            finally:
+                await queue.put(None)
+
+        runner = asyncio.ensure_future(run_all())
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            await runner
+        finally:
+            # Stops pending files if the consumer stops early
+            runner.cancel()
+            if manifest is not None:
+                manifest.flush()
+
+    async def download(
+        self,
+        path: str,
+        files: list = [],
+        post_process=True,
+        remove_after_pp=True,
+        max_concurrency: int = 4,
+        use_manifest: bool = True,
+    ):
+        """
+        Downloads the dataset. See events() for the parameters and to follow the progress.
+        """
+        async for _ in self.events(
+            path,
+            files=files,
+            post_process=post_process,
+            remove_after_pp=remove_after_pp,
+            max_concurrency=max_concurrency,
+            use_manifest=use_manifest,
+        ):
+            pass
+
+    async def _download_file(
+        self,
+        f: AsyncDatasetFile,
+        path: Path,
+        emit,
+        post_process: bool,
+        remove_after_pp: bool,
+        manifest: Manifest = None,
+    ):
+        """
+        Downloads, validates and post processes a single file, emitting its DownloadEvents.
+
+        :param f: The file to download.
+        :type f: AsyncDatasetFile
+        :param path: The root path where the file is downloaded.
+        :type path: Path
+        :param emit: Coroutine function receiving the events.
+        :param post_process: Indicates if the file should be post processed.
+        :type post_process: bool
+        :param remove_after_pp: Indicates if the file should be deleted after being post processed.
+        :type remove_after_pp: bool
+        :param manifest: The manifest to skip verified files and record finished ones. [Default: None]
+        :type manifest: Manifest
+        """
+        loop = asyncio.get_running_loop()
+        filesize = f.get_filesize(False)
+
+        if manifest is not None and await loop.run_in_executor(
+            None, manifest.is_verified, f
+        ):
+            f.file_path = f.get_file_path(path)
+            await emit(DownloadEvent(DownloadEvent.SKIPPED, f, filesize, filesize))
+            return
+
+        await emit(DownloadEvent(DownloadEvent.STARTED, f, 0, filesize))
+        async for current_size in f.download(
+            path, client=self.client, header=self._request_header
+        ):
+            await emit(DownloadEvent(DownloadEvent.PROGRESS, f, current_size, filesize))
+
+        if not await loop.run_in_executor(None, f.validate):
+            if manifest is not None:
+                manifest.discard(f)
+            await emit(
+                DownloadEvent(
+                    DownloadEvent.FAILED, f, filesize, filesize, "wrong hash value"
+                )
+            )
+            return
+
+        if not (f.do_extract and post_process):
+            if manifest is not None:
+                manifest.record(f, "verified")
+            await emit(DownloadEvent(DownloadEvent.VERIFIED, f, filesize, filesize))
+            return
+
+        if not await loop.run_in_executor(None, f.process):
+            if manifest is not None:
+                manifest.discard(f)
+            await emit(
+                DownloadEvent(
+                    DownloadEvent.FAILED, f, filesize, filesize, "processing failed"
+                )
+            )
+            return
+
+        removed = remove_after_pp and await loop.run_in_executor(None, f.remove)
+        if manifest is not None:
+            manifest.record(f, "processed", removed=removed)
+        await emit(
+            DownloadEvent(
+                DownloadEvent.PROCESSED,
+                f,
+                filesize,
+                filesize,
+                "processed & removed" if removed else "processed",
+            )
+        )
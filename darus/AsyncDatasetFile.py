@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import os
+from urllib.parse import urlparse
+
+from .DatasetFile import (
+    DatasetFile,
+    PART_SUFFIX,
+    HASH_CHUNK_SIZE,
+    _content_range,
+    _hash_file,
+    _resume_part,
+)
+from .utils import get_logger
+
+try:
+    import httpx
+except ImportError:  # Optional dependency, see AsyncDataset
+    httpx = None
+
+ASYNC_CHUNK_SIZE = 64 * 1024  # Read size of the async stream
+ASYNC_WRITE_SIZE = (
+    4 * 1024 * 1024
+)  # Received bytes that are written and hashed per executor call
+
+
+class AsyncDatasetFile(DatasetFile):
+    """A dataset file that is downloaded with an asyncio http client. The metadata is parsed like DatasetFile."""
+
+    async def download(
+        self, path="", client=None, header=None, chunk_size=ASYNC_CHUNK_SIZE
+    ):
+        """
+        Downloads the file based on self._url and saves it to path/self.filename
+
+        Like DatasetFile.download, the data is written to a .part file which is continued by a rerun and the MD5 is computed while streaming.
+
+        :param path: The path to save the file
+        :type path: str
+        :param client: The client used for the requests.
+        :type client: httpx.AsyncClient
+        :param header: The header if needed for the web requests [Default: None]
+        :type header: dict
+        :param chunk_size: The size to iterate over the response [Default: 65536]
+        :type chunk_size: int
+        :yields: The downloaded bytes so far, starting with the size of a resumed .part file.
+        """
+        url = self._url
+        if self.download_original:
+            url = urlparse(self._url)._replace(query="format=original").geturl()
+
+        file_path = self.get_file_path(path)
+        part_path = file_path.with_name(file_path.name + PART_SUFFIX)
+        self.file_path = file_path
+        self._digest = None
+
+        try:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            loop = asyncio.get_running_loop()
+
+            offset = _resume_part(part_path)
+            if offset and offset >= self.get_filesize(False):
+                # A complete .part file, e.g. interrupted before the rename. A range beyond its end gets a 416
+                digest = await loop.run_in_executor(None, _hash_file, part_path)
+                if digest == self.get_checksum():
+                    self._digest = digest
+                    yield offset
+                    os.replace(part_path, file_path)
+                    return
+                os.remove(part_path)
+                offset = 0
+            request_header = dict(header) if header else {}
+            if offset:
+                request_header["Range"] = f"bytes={offset}-"
+
+            restart = False
+            async with client.stream("GET", url, headers=request_header) as r:
+                start, _ = _content_range(r)
+                if r.status_code == 416 or (r.status_code == 206 and start != offset):
+                    # The partial file doesn't match the file on the server
+                    restart = True
+                else:
+                    r.raise_for_status()
+                    if r.status_code != 206:
+                        offset = 0
+
+                    md5 = hashlib.md5()
+                    if offset:
+                        await loop.run_in_executor(None, _hash_prefix, md5, part_path)
+
+                    downloaded = offset
+                    # Chunks are collected, so the executor is not called for each of them
+                    pending = bytearray()
+                    with open(part_path, "ab" if offset else "wb") as f:
+                        if offset:
+                            yield downloaded
+                        async for chunk in r.aiter_bytes(chunk_size):
+                            pending += chunk
+                            if len(pending) >= ASYNC_WRITE_SIZE:
+                                # Writing and hashing block, they don't stall the other downloads of the loop
+                                await loop.run_in_executor(
+                                    None, _write_chunk, f, md5, pending
+                                )
+                                pending = bytearray()
+                            downloaded += len(chunk)
+                            yield downloaded
+                        if pending:
+                            await loop.run_in_executor(
+                                None, _write_chunk, f, md5, pending
+                            )
+                    self._digest = md5.hexdigest()
+
+            if restart:
+                os.remove(part_path)
+                async for downloaded in self.download(path, client, header, chunk_size):
+                    yield downloaded
+                return
+
+            os.replace(part_path, file_path)
+        except httpx.HTTPStatusError as he:
+            logger = get_logger(__name__)
+            logger.error(
+                f"Error while trying to download '{self.name}' from '{self._url}': {he}"
+            )
+        except Exception as e:
+            logger = get_logger(__name__)
+            logger.error(f"An unexpected error occurred: {e}")
+
+
+def _write_chunk(f, md5, chunk):
+    """Writes received chunks to the .part file and adds them to md5."""
+    f.write(chunk)
+    md5.update(chunk)
+
+
+def _hash_prefix(md5, part_path):
+    """Adds the content of an existing .part file to md5."""
+    with open(part_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            md5.update(chunk)
@@ -0,0 +1,132 @@
+import re
+import threading
+import time
+from datetime import datetime
+
+import humanize
+
+from .utils import parse_size
+
+
+def _parse_rate(rate) -> int:
+    """Parses a rate in bytes per second, e.g. 1000000, "10MB" or "10MB/s". 0 or None is unlimited."""
+    if rate is None or rate == "":
+        return 0
+    if isinstance(rate, str):
+        rate = re.sub(r"/s$", "", rate.strip())
+    return parse_size(rate)
+
+
+def _parse_time(value: str) -> int:
+    """Parses a time of day HH:MM into minutes after midnight."""
+    match = re.fullmatch(r"(\d{1,2}):(\d{2})", value.strip())
+    if not match or int(match.group(1)) > 24 or int(match.group(2)) > 59:
+        raise ValueError(f"Invalid time of day {value!r}, expected HH:MM.")
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+class BandwidthLimiter:
+    def __init__(self, rate=None, schedule: list = None, burst=None):
+        """
+        Limits the combined throughput of all downloads sharing this instance with a token bucket.
+
+        Every received chunk takes its size in tokens, which are refilled with the current rate.
+        A thread that takes more tokens than available waits until the bucket is refilled,
+        so concurrent downloads share the rate.
+
+        :param rate: The rate in bytes per second or with unit, e.g. "10MB" or "10MB/s". 0 or None is unlimited. [Default: None]
+        :type rate: int or str
+        :param schedule: Rates for times of day, overriding rate. Entries are "HH:MM-HH:MM=RATE" or tuples (start, end, rate), e.g. "08:00-18:00=5MB". Windows may wrap midnight. [Default: None]
+        :type schedule: list
+        :param burst: The bytes that can be received at once after an idle period. [Default: the rate of one second]
+        :type burst: int or str
+
+        :raise ValueError: If a rate or the schedule is invalid.
+        """
+        self.rate = _parse_rate(rate)
+        self.burst = parse_size(burst) if burst else None
+        self.schedule = [self._parse_window(window) for window in schedule or []]
+
+        self._lock = threading.Lock()
+        self._tokens = None  # Starts with a full bucket
+        self._last = time.monotonic()
+
+    @staticmethod
+    def _parse_window(window) -> tuple:
+        """Parses a schedule entry into (start minute, end minute, rate)."""
+        if isinstance(window, str):
+            times, sep, rate = window.partition("=")
+            start, dash, end = times.partition("-")
+            if not sep or not dash:
+                raise ValueError(
+                    f"Invalid schedule entry {window!r}, expected e.g. '08:00-18:00=5MB'."
+                )
+        else:
+            start, end, rate = window
+        return _parse_time(start), _parse_time(end), _parse_rate(rate)
+
+    def current_rate(self, now: datetime = None) -> int:
+        """
+        Returns the rate at a time of day, the first matching schedule window wins.
+
+        :param now: The time. [Default: datetime.now()]
+        :type now: datetime
+        :return: The rate in bytes per second, 0 if unlimited.
+        :rtype: int
+        """
+        if self.schedule:
+            now = now or datetime.now()
+            minute = now.hour * 60 + now.minute
+            for start, end, rate in self.schedule:
+                in_window = (
+                    start <= minute < end
+                    if start <= end
+                    else minute >= start or minute < end
+                )
+                if in_window:
+                    return rate
+        return self.rate
+
+    def __str__(self) -> str:
+        """Overrides implementation of string"""
+        rate = self.current_rate()
+        return f"{humanize.naturalsize(rate)}/s" if rate else "unlimited"
+
+    def reserve(self, size: int) -> float:
+        """
+        Takes tokens for size bytes, without waiting.
+
+        :param size: The number of bytes.
+        :type size: int
+        :return: The seconds to wait until the bytes are within the rate.
+        :rtype: float
+        """
+        rate = self.current_rate()
+        with self._lock:
+            now = time.monotonic()
+            if not rate:
+                self._tokens = None
+                self._last = now
+                return 0.0
+
+            capacity = self.burst or rate
+            if self._tokens is None:
+                self._tokens = capacity
+            else:
+                self._tokens = min(capacity, self._tokens + (now - self._last) * rate)
+            self._last = now
+
+            # Tokens may become negative, the debt is paid by waiting
+            self._tokens -= size
+            return max(0.0, -self._tokens / rate)
+
+    def consume(self, size: int):
+        """
+        Waits until size bytes are within the rate. Safe to call from several threads.
+
+        :param size: The number of received bytes.
+        :type size: int
+        """
+        delay = self.reserve(size)
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,224 @@
+import contextlib
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+
+from .DatasetFile import _hash_file
+from .utils import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, reflinks fall back to copies
+    fcntl = None
+
+LINK_MODES = ("hardlink", "reflink", "symlink", "copy")
+FICLONE = 0x40049409  # Linux ioctl cloning the extents of a file (btrfs, xfs, ...)
+
+
+def _reflink(source: Path, target: Path):
+    """
+    Creates target as copy-on-write clone of source.
+
+    :raise OSError: If the filesystem or platform does not support reflinks.
+    """
+    if fcntl is None:
+        raise OSError("Reflinks are not supported on this platform.")
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(target)
+            raise
+
+
+class ContentStore:
+    def __init__(self, root: str, link: str = "hardlink"):
+        """
+        A local store of file contents keyed by their MD5 checksum, shared by datasets and download paths.
+
+        A file with a checksum that is already in the store is not downloaded again, its path is linked to the blob instead.
+        Hardlinks and reflinks need the store on the same filesystem as the download path and fall back to copies.
+        Hardlinked and symlinked files share the content with the store, they must not be modified in place.
+
+        :param root: The directory of the store.
+        :type root: str
+        :param link: How files are created from blobs, "hardlink", "reflink", "symlink" or "copy". [Default: "hardlink"]
+        :type link: str
+
+        :raise ValueError: If the link mode is unknown.
+        """
+        if link not in LINK_MODES:
+            raise ValueError(
+                f"Invalid link mode {link!r}, expected one of {', '.join(LINK_MODES)}."
+            )
+        self.root = Path(root).expanduser()
+        self.link = link
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self._verified = (
+            set()
+        )  # Blobs hashed by this instance, they are not hashed again
+
+    def __str__(self) -> str:
+        """Overrides implementation of string"""
+        return f"{self.root} ({self.link})"
+
+    def blob_path(self, checksum: str) -> Path:
+        """
+        Returns the path of the blob of a checksum, whether it exists or not.
+
+        :param checksum: The MD5 checksum.
+        :type checksum: str
+        :return: The path of the blob.
+        :rtype: Path
+        """
+        checksum = checksum.lower()
+        return self.root / "objects" / checksum[:2] / checksum[2:]
+
+    def get(self, checksum: str) -> Path:
+        """
+        Looks up the blob of a checksum.
+
+        :param checksum: The MD5 checksum.
+        :type checksum: str
+        :return: The path of the blob or None if it is not in the store.
+        :rtype: Path
+        """
+        blob = self.blob_path(checksum)
+        return blob if blob.is_file() else None
+
+    def lock(self, checksum: str) -> threading.Lock:
+        """
+        Returns the lock of a checksum, so files with the same content are only downloaded once at a time.
+
+        :param checksum: The MD5 checksum.
+        :type checksum: str
+        :return: The lock, to be used as context manager.
+        :rtype: threading.Lock
+        """
+        with self._locks_lock:
+            return self._locks.setdefault(checksum.lower(), threading.Lock())
+
+    def verify(self, checksum: str) -> bool:
+        """
+        Checks that the blob of a checksum still has its content, e.g. after a hardlinked file was modified in place.
+        A blob that doesn't match its checksum is removed from the store.
+
+        :param checksum: The MD5 checksum.
+        :type checksum: str
+        :return: True if the blob exists and matches the checksum.
+        :rtype: bool
+        """
+        checksum = checksum.lower()
+        if checksum in self._verified:
+            return self.get(checksum) is not None
+        blob = self.get(checksum)
+        if blob is None:
+            return False
+
+        try:
+            digest = _hash_file(blob)
+        except OSError as e:
+            logger = get_logger(__name__)
+            logger.error(f"Could not read '{blob}' of the store: {e}")
+            return False
+        if digest != checksum:
+            logger = get_logger(__name__)
+            logger.warning(
+                f"'{blob}' of the store doesn't match its checksum, it is removed."
+            )
+            with contextlib.suppress(OSError):
+                os.remove(blob)
+            return False
+
+        self._verified.add(checksum)
+        return True
+
+    def materialize(self, checksum: str, target: Path) -> bool:
+        """
+        Creates target from the blob of a checksum, replacing an existing file.
+        The blob is hashed before its first use, a blob that doesn't match is removed and not used.
+
+        :param checksum: The MD5 checksum.
+        :type checksum: str
+        :param target: The path of the file.
+        :type target: Path
+        :return: True if the blob exists, matches the checksum and target was created.
+        :rtype: bool
+        """
+        if not self.verify(checksum):
+            return False
+        blob = self.get(checksum)
+
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            self._link(blob, tmp_path, self.link)
+            os.replace(tmp_path, target)
+            return True
+        except OSError as e:
+            logger = get_logger(__name__)
+            logger.error(f"Could not create '{target}' from the store: {e}")
+            if tmp_path.exists() or tmp_path.is_symlink():
+                os.remove(tmp_path)
+            return False
+
+    def add(self, checksum: str, source: Path) -> bool:
+        """
+        Adds a verified file to the store. With link "symlink", source is replaced by a link to the blob.
+
+        :param checksum: The MD5 checksum of source.
+        :type checksum: str
+        :param source: The path of the file.
+        :type source: Path
+        :return: True if the blob exists afterwards.
+        :rtype: bool
+        """
+        source = Path(source)
+        blob = self.blob_path(checksum)
+        if blob.is_file():
+            return True
+        if not source.is_file():
+            return False
+
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = blob.with_name(f".{blob.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            # A symlinked file points to the blob, the other modes link or copy in the other direction
+            self._link(
+                source, tmp_path, "copy" if self.link == "symlink" else self.link
+            )
+            os.replace(tmp_path, blob)
+            # The source was verified against the checksum before it was added
+            self._verified.add(checksum.lower())
+            if self.link == "symlink":
+                self.materialize(checksum, source)
+            return True
+        except OSError as e:
+            logger = get_logger(__name__)
+            logger.error(f"Could not add '{source}' to the store '{self.root}': {e}")
+            if tmp_path.exists():
+                os.remove(tmp_path)
+            return False
+
+    @staticmethod
+    def _link(source: Path, target: Path, link: str):
+        """Creates target from source, falling back to a copy if the link is not possible (e.g. across filesystems)."""
+        try:
+            if link == "hardlink":
+                os.link(source, target)
+                return
+            if link == "reflink":
+                _reflink(source, target)
+                return
+            if link == "symlink":
+                os.symlink(Path(source).resolve(), target)
+                return
+        except OSError as e:
+            logger = get_logger(__name__)
+            logger.debug(f"Could not {link} '{target}', copying it instead: {e}")
+        shutil.copyfile(source, target)
@@ -1,40 +1,115 @@
+import contextlib
+import humanize
 import json
+import os
 import requests
+import shutil
+import tempfile
+import threading
+import time
 import validators
 import warnings
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
 from urllib.parse import urlparse
-from datetime import datetime
 
+from requests.adapters import BaseAdapter
 from rich.console import Console
-from rich.progress import (
-    Progress,
-    TextColumn,
-    BarColumn,
-    TaskProgressColumn,
-    TimeElapsedColumn,
-    TimeRemainingColumn,
-    DownloadColumn,
-    TransferSpeedColumn,
-    SpinnerColumn,
-)
+from rich.progress import TaskProgressColumn, SpinnerColumn
 from rich.spinner import Spinner
 from rich.table import Table
 from rich.text import Text
 
-from .DatasetFile import DatasetFile
-from .utils import dir_exists, get_logger
+from .BandwidthLimiter import BandwidthLimiter
+from .ContentStore import ContentStore
+from .DatasetFile import (
+    PART_SUFFIX,
+    DatasetFile,
+    _hash_file,
+    _part_length,
+    _read_chunks,
+)
+from .DatasetMetadata import DatasetMetadata
+from .DownloadEvent import DownloadEvent
+from .DownloadReport import DOWNLOAD_RESULTS, DownloadReport, FileReport
+from .EventSink import CallbackSink, EventSink, RichSink, progress_display
+from .Manifest import Manifest
+from .MemberFilter import MemberFilter
+from .MetadataCache import MetadataCache
+from .SchedulingPolicy import SchedulingPolicy
+from .TimeoutAdapter import DEFAULT_TIMEOUT, TimeoutAdapter
+from .utils import dir_exists, get_logger, parse_size
+from .ZipStreamExtractor import (
+    ZipStreamExtractor,
+    fetch_central_directory,
+    member_path,
+)
+
+DEFAULT_POOL_SIZE = 10  # Connections kept alive per host, like requests' default
+QUARANTINE_DIR = (
+    ".darus-removed"  # Files removed from the dataset are moved here by sync
+)
+BULK_BATCH_FILES = 100  # File ids per bulk request, keeps the url short
+EXTRACT_SIZE_FACTOR = 2  # Estimated extracted size of an archive per archive byte, if its central directory is not read
+VERIFY_RESULTS = (
+    "verified",
+    "corrupt",
+    "missing",
+    "processed",
+    "extra",
+)  # Outcomes of verify
+
 
+def _existing_parent(path: Path) -> Path:
+    """Returns path or its closest existing parent, e.g. to query the filesystem of a path that is created later."""
+    path = Path(path).expanduser().resolve()
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    return path
 
-class Dataset:
-    def __init__(self, url: str, api_token: str = None):
+
+class Dataset(DatasetMetadata):
+    def __init__(
+        self,
+        url: str,
+        api_token: str = None,
+        session: requests.Session = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        adapter: BaseAdapter = None,
+        cache: bool = False,
+        cache_dir: str = None,
+        offline: bool = False,
+        version: str = None,
+        timeout=DEFAULT_TIMEOUT,
+    ):
         """
         Creates Instance of the Dataloader.
 
+        All requests of the dataset and its files share one pooled session, so connections are kept alive between files.
+        With the metadata cache, the dataset information is revalidated with ETag / If-Modified-Since, so an unchanged dataset costs a single 304 response.
+
         :param url: The url to download the dataset from.
         :type url: str
         :param api_token: The token needed for private data access. [Default: None]
         :type api_token: str
+        :param session: A session to share with other datasets. If None, an own session is created. The api_token is then sent per request. [Default: None]
+        :type session: requests.Session
+        :param pool_size: The number of connections kept alive by an own session. Should be at least max_workers * segments of the download. [Default: 10]
+        :type pool_size: int
+        :param adapter: A transport adapter mounted for http:// and https:// instead of the default pooled adapter, e.g. to configure retries or certificates. [Default: None]
+        :type adapter: BaseAdapter
+        :param cache: Indicates if the dataset information is cached on disk. [Default: False]
+        :type cache: bool
+        :param cache_dir: The directory of the metadata cache, enables the cache. [Default: $XDG_CACHE_HOME/darus or ~/.cache/darus]
+        :type cache_dir: str
+        :param offline: Indicates if the dataset information is only read from the metadata cache, without any request. [Default: False]
+        :type offline: bool
+        :param version: The version of the dataset, e.g. "1.2", ":latest-published" or ":draft". If None, the latest version is used. [Default: None]
+        :type version: str
+        :param timeout: The seconds an own session waits to connect and for the next bytes of a response, as tuple (connect, read) or a single value for both. A timeout is retried like a dropped connection. None waits forever. [Default: (10.0, 60.0)]
+        :type timeout: float or tuple
 
         :raise ValueError: If the provided url is not a valid url.
         """
@@ -45,122 +120,694 @@ class Dataset:
         self.downloading_files = []
         self.header = {"X-Dataverse-key": api_token} if api_token else None
 
-        self.url = urlparse(url)
+        self._owns_session = session is None
+        if self._owns_session:
+            session = requests.Session()
+            if adapter is None:
+                adapter = TimeoutAdapter(
+                    timeout, pool_connections=pool_size, pool_maxsize=pool_size
+                )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            if self.header:
+                session.headers.update(self.header)
+        self.session = session
 
-        self.server_url = self.url._replace(
-            path="", params="", query="", fragment=""
-        ).geturl()
+        # The header is part of an own session, a shared session gets it per request
+        self._request_header = None if self._owns_session else self.header
 
-        self.dataset_url = self.url._replace(
-            path="/api/datasets/:persistentId/"
-        ).geturl()
-
-        self.persistent_id = None
-        self.version_state = None
-        self.last_update_time = None
-        self.create_time = None
-        self.license_name = None
-        self.title = None
-        self.authors = []
+        self.offline = offline
+        self.cache = MetadataCache(cache_dir) if cache or cache_dir or offline else None
 
+        self._init_metadata(url, version)
         self._get_dataset_information()
 
     def _get_dataset_information(self):
         """Extracts the dataset information from the url."""
 
         try:
-            r = requests.get(self.dataset_url, headers=self.header)
-            r.raise_for_status()
+            key, entry, headers = self._prepare_metadata_request()
+            if self.offline:
+                self._parse_offline_information(entry)
+                return
 
-            dataset_info = json.loads(r.text)["data"]["latestVersion"]
+            # The session sends "Accept-Encoding: gzip", the json is transferred compressed
+            r = self.session.get(self.dataset_url, headers=headers or None)
+            if r.status_code == 304 and entry is not None:
+                # Not modified since it was cached
+                self._parse_dataset_information(entry["response"])
+                return
 
-            for field in dataset_info["metadataBlocks"]["citation"]["fields"]:
-                if field["typeName"] == "title":
-                    self.title = field["value"]
-                elif field["typeName"] == "author":
-                    self.authors = [f["authorName"]["value"] for f in field["value"]]
-
-            self.persistent_id = dataset_info["datasetPersistentId"]
-            self.version_state = dataset_info["versionState"]
-            self.last_update_time = dataset_info["lastUpdateTime"]
-            self.create_time = dataset_info["createTime"]
-            self.license_name = dataset_info["license"]["name"]
+            r.raise_for_status()
+            response = json.loads(r.text)
+            self._parse_dataset_information(response)
 
-            files_info = dataset_info["files"]
-            self.download_files = [
-                DatasetFile(file_info, self.server_url) for file_info in files_info
-            ]
+            if self.cache is not None:
+                self.cache.store(
+                    key, response, r.headers.get("ETag"), r.headers.get("Last-Modified")
+                )
         except KeyError as ke:
             logger = get_logger(__name__)
             logger.error(f"Couldn't find following key in web response: {ke}")
+            self.persistent_id = None
             self.download_files = []
         except requests.HTTPError as exception:
             logger = get_logger(__name__)
             logger.error(
                 f"An error occurred while trying to access dataset: {str(exception)}"
             )
+            self.persistent_id = None
             self.download_files = []
         except Exception as exception:
             logger = get_logger(__name__)
             logger.error(f"Unexpected error: {exception}")
+            self.persistent_id = None
             self.download_files = []
 
-    def summary(self):
-        """Gives an Overview of the dataset retrieved information"""
-        console = Console()
+    def check_disk_space(
+        self,
+        path: str,
+        post_process: bool = True,
+        remove_after_pp: bool = True,
+        stream_extract: bool = False,
+        member_filter: MemberFilter = None,
+        virtual: bool = False,
+        max_workers: int = 1,
+        manifest: Manifest = None,
+        store: ContentStore = None,
+    ) -> bool:
+        """
+        Checks if the download files fit on the filesystem of path, before anything is downloaded.
+
+        ZIP archives that are extracted need the uncompressed size of their members. It is only read from the remote
+        central directory with stream_extract or a member_filter, otherwise (or if the central directory can't be read)
+        it is estimated as EXTRACT_SIZE_FACTOR times the archive size. With remove_after_pp, an archive only takes space until it is extracted,
+        so at most max_workers archives are on disk at once. If the files don't fit, a subset that fits is logged.
+        With a store, files that are not stored yet also need space for their blob, unless it shares the content
+        of the file (hardlink or reflink on the same filesystem). Stored archives stay in the store after extraction.
+
+        :param path: The path where the files are downloaded.
+        :type path: str
+        :param post_process: Indicates if the files are post processed. [Default: True]
+        :type post_process: bool
+        :param remove_after_pp: Indicates if the files are deleted after being post processed. [Default: True]
+        :type remove_after_pp: bool
+        :param stream_extract: Indicates if ZIP archives are extracted while they are downloaded. [Default: False]
+        :type stream_extract: bool
+        :param member_filter: Selects the members of ZIP archives that are extracted. [Default: None]
+        :type member_filter: MemberFilter
+        :param virtual: Indicates if ZIP archives are read in place instead of being extracted. [Default: False]
+        :type virtual: bool
+        :param max_workers: The number of files that are downloaded and processed concurrently. [Default: 1]
+        :type max_workers: int
+        :param manifest: The manifest, verified files need no space. [Default: None]
+        :type manifest: Manifest
+        :param store: The content store, files that are linked from it need no space, new blobs are counted on the filesystem of the store. [Default: None]
+        :type store: ContentStore
+        :return: True if there is enough free space.
+        :rtype: bool
+        """
+        logger = get_logger(__name__)
+        files = [
+            f
+            for f in self.download_files
+            if manifest is None or not manifest.is_verified(f)
+        ]
+        extracted = [f for f in files if post_process and f.do_extract and not virtual]
+        if extracted and (stream_extract or member_filter):
+            # Streaming depends on the central directory and a filter may select a small part of an archive
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                sizes = list(
+                    executor.map(
+                        lambda f: f.get_uncompressed_size(
+                            self._request_header, self.session, member_filter
+                        ),
+                        extracted,
+                    )
+                )
+        else:
+            sizes = [None] * len(extracted)
+        uncompressed = {f.get_id(): size for f, size in zip(extracted, sizes)}
 
-        # Create a table to display the information
-        table = Table(title="Dataset Summary", title_justify="left")
+        target = _existing_parent(Path(path))
+        store_root = _existing_parent(store.root) if store is not None else None
+        same_device = (
+            store is not None and store_root.stat().st_dev == target.stat().st_dev
+        )
 
-        table.add_column("Property")
-        table.add_column("Value")
+        # Hardlinks and reflinks only share the content on the filesystem of the store
+        linked = store is not None and (
+            store.link == "symlink" or (store.link != "copy" and same_device)
+        )
+        shared = linked and store.link != "symlink"
 
-        # Add rows with rich formatting
-        table.add_row("URL", str(self.url.geturl()))
-        table.add_row("Title", self.title)
+        # Space kept after the download, space only taken until an archive is extracted and space of a new blob
+        needs = []
+        for f in files:
+            filesize = f.get_filesize(False)
+            stored = store is not None and store.get(f.get_checksum()) is not None
+            downloaded = 0 if stored and linked else filesize
+            # A symlinked file is moved into the store and only its link stays in the target
+            kept = 0 if linked and store.link == "symlink" else downloaded
+            transient = 0
+            blob = filesize if store is not None and not stored and not shared else 0
+            if f.get_id() in uncompressed:
+                size = uncompressed[f.get_id()]
+                # Without the central directory, a streamed archive is written as fallback
+                streamed = stream_extract and size is not None and not stored
+                if size is None:
+                    logger.debug(
+                        f"Estimating the extracted size of '{f.name}' as {EXTRACT_SIZE_FACTOR} times its archive size."
+                    )
+                    size = filesize * EXTRACT_SIZE_FACTOR
+                if not remove_after_pp:
+                    kept += size
+                elif streamed:
+                    # The archive is never written, nor stored
+                    kept, blob = size, 0
+                else:
+                    kept, transient = size, downloaded
+                    if store is not None and not stored:
+                        # The blob stays in the store after the archive is removed
+                        blob = filesize
 
-        if len(self.authors) > 0:
-            table.add_row("Authors", "; ".join(self.authors))
+            # Bytes of an interrupted download are already on disk
+            part_path = f.get_file_path(path)
+            part_path = part_path.with_name(part_path.name + PART_SUFFIX)
+            if part_path.is_file():
+                kept = max(0, kept - part_path.stat().st_size)
+            needs.append((f, kept + blob if same_device else kept, transient, blob))
 
-        table.add_row("Persistent ID", str(self.persistent_id))
-        table.add_row("Last Update", self.format_datetime(self.last_update_time))
-        table.add_row("License", self.license_name)
+        transients = sorted((transient for _, _, transient, _ in needs), reverse=True)
+        required = sum(kept for _, kept, _, _ in needs) + sum(transients[:max_workers])
 
-        # Display the table
-        console.print(table)
+        if store is not None and not same_device:
+            # New blobs take space on the filesystem of the store
+            blobs = sum(blob for _, _, _, blob in needs)
+            store_free = shutil.disk_usage(store_root).free
+            if blobs > store_free:
+                logger.error(
+                    f"Not enough disk space for the store '{store.root}': {humanize.naturalsize(blobs)} needed, "
+                    f"but only {humanize.naturalsize(store_free)} free."
+                )
+                return False
 
-        # Create a table to display the information
-        table = Table(title="Files in Dataset", title_justify="left")
+        free = shutil.disk_usage(target).free
 
-        table.add_column("Name", justify="left")
-        table.add_column("Size", justify="left")
-        table.add_column("Original Available", justify="left")
-        table.add_column("Description", justify="left")
+        if required <= free:
+            logger.info(
+                f"Disk space: {humanize.naturalsize(required)} needed, {humanize.naturalsize(free)} free."
+            )
+            return True
+
+        logger.error(
+            f"Not enough disk space in '{target}': {humanize.naturalsize(required)} needed, "
+            f"but only {humanize.naturalsize(free)} free."
+        )
+        # Keep the download order, skipping files that don't fit anymore
+        subset, budget = [], free
+        for f, kept, transient, _ in needs:
+            if kept + transient <= budget:
+                subset.append(f.name)
+                budget -= kept
+        if subset:
+            logger.info(
+                f"These {len(subset)} of {len(needs)} files fit, e.g. with files={subset}"
+            )
+        return False
+
+    def sync(
+        self,
+        path: str,
+        removed: str = "quarantine",
+        dry_run: bool = False,
+        **kwargs,
+    ) -> dict:
+        """
+        Updates a local copy of the dataset to this version, downloading only added and changed files.
+
+        The remote files are compared with the manifest of path by file id and checksum. A file with a new id
+        at the path of a recorded file replaces it (changed), as does a recorded file with another checksum
+        or a local copy that can't be verified. Recorded files that are no longer in the dataset are removed.
+        The delta is printed before anything is changed.
+        With files, only the selected added and changed files are synced and nothing is removed. The version
+        of the local copy is then only updated if the selection covers the whole delta.
+
+        :param path: The path of the local copy.
+        :type path: str
+        :param removed: What happens to removed files: "quarantine" moves them to path/.darus-removed/<version>, "delete" deletes them and "keep" only forgets them. [Default: "quarantine"]
+        :type removed: str
+        :param dry_run: Indicates if only the delta is printed. [Default: False]
+        :type dry_run: bool
+        :param kwargs: Further options of download, e.g. files, max_workers or post_process.
+        :return: The lists "added" and "changed" of DatasetFile, the number of "deferred" changes outside of files, the list "removed" of local paths (including the files extracted from removed and replaced archives), the list "stale" of removed archives whose extracted files are unknown and kept, the number of "unchanged" files, the outcome of the download like download and its DownloadReport as "report" (None without download), or None if aborted, e.g. as the dataset information could not be loaded.
+        :rtype: dict
+
+        :raise ValueError: If removed is unknown.
+        """
+        if removed not in ("quarantine", "delete", "keep"):
+            raise ValueError(
+                f"removed must be 'quarantine', 'delete' or 'keep', got {removed!r}."
+            )
+
+        if self.persistent_id is None:
+            # Every recorded file would look removed from the dataset
+            logger = get_logger(__name__)
+            logger.error(
+                f"Sync of '{self.url.geturl()}' aborted, the dataset information could not be loaded."
+            )
+            return None
+
+        path = Path(path)
+        if not dir_exists(path):
+            logger = get_logger(__name__)
+            logger.info("Sync aborted.")
+            return None
+
+        # Names not in the dataset are logged once, the selection is applied to the delta
+        files = kwargs.pop("files", None) or []
+        selected = {f.get_id() for f in self._select_files(files)}
+
+        manifest = Manifest(path)
+        entries = manifest.entries()
+        by_path = {entry["path"]: key for key, entry in entries.items()}
+
+        delta = {"added": [], "changed": [], "removed": [], "unchanged": 0}
+        replaces = {}  # Recorded file replaced by a file with a new id, by the new id
+        for f in self.download_files:
+            key = str(f.get_id())
+            relative = f.get_file_path().as_posix()
+            if key in entries:
+                if manifest.is_verified(f):
+                    delta["unchanged"] += 1
+                else:
+                    delta["changed"].append(f)
+            elif relative in by_path and by_path[relative] not in replaces.values():
+                replaces[f.get_id()] = by_path[relative]
+                delta["changed"].append(f)
+            else:
+                delta["added"].append(f)
+
+        remote = {str(f.get_id()) for f in self.download_files}
+        gone = [
+            key for key in entries if key not in remote and key not in replaces.values()
+        ]
+
+        delta["deferred"] = 0
+        if files:
+            # A partial sync leaves the other changes and the removals to a full sync
+            delta["deferred"] = len(gone) + sum(
+                f.get_id() not in selected for f in delta["added"] + delta["changed"]
+            )
+            delta["added"] = [f for f in delta["added"] if f.get_id() in selected]
+            delta["changed"] = [f for f in delta["changed"] if f.get_id() in selected]
+            replaces = {
+                file_id: key for file_id, key in replaces.items() if file_id in selected
+            }
+            gone = []
+        superseded = set(replaces.values())  # Ids of the replaced recorded files
+        delta["removed"] = [path / entries[key]["path"] for key in gone]
+
+        # Extracted members of removed and replaced archives, the archives themselves are usually removed already
+        dataset_paths = {f.get_file_path(path) for f in self.download_files}
+        members = {}
+        delta["stale"] = []
+        for key in gone + sorted(superseded):
+            if entries[key]["status"] != "processed":
+                continue
+            names = self._archive_members(key, entries[key], path)
+            if names is None:
+                delta["stale"].append(path / entries[key]["path"])
+                continue
+            members[key] = [
+                member
+                for member in names
+                if member not in dataset_paths and member.is_file()
+            ]
+            delta["removed"] += members[key]
 
-        for file in self.download_files:
+        # Report the delta before anything is changed
+        # Printed to the rich display of the download, not at all without one
+        sinks = kwargs.get("sinks")
+        displays = [s for s in sinks or [] if isinstance(s, RichSink)]
+        console = (
+            Console() if sinks is None else (displays[0].console if displays else None)
+        )
+        table = Table(
+            title=f"Sync {self.persistent_id}: {manifest.dataset_version or 'local copy'} → {self.version}",
+            title_justify="left",
+        )
+        table.add_column("Change", justify="left")
+        table.add_column("Name", justify="left")
+        table.add_column("Size", justify="right")
+        for f in delta["added"]:
+            table.add_row("[green]added[/green]", f.name, f.get_filesize())
+        for f in delta["changed"]:
+            table.add_row("[yellow]changed[/yellow]", f.name, f.get_filesize())
+        for key in gone:
             table.add_row(
-                file.name,
-                file.get_filesize(),
-                (
-                    f"[green]✓({file.original_file_name})[/green]"
-                    if file.original_file_name
-                    else ""
-                ),
-                file.description,
+                f"[red]removed ({removed})[/red]",
+                entries[key]["path"],
+                humanize.naturalsize(entries[key]["size"]),
+            )
+        for key, paths in members.items():
+            if paths:
+                table.add_row(
+                    f"[red]removed ({removed})[/red]",
+                    f"{len(paths)} files extracted from {entries[key]['path']}",
+                    humanize.naturalsize(sum(p.stat().st_size for p in paths)),
+                )
+        for archive in delta["stale"]:
+            table.add_row(
+                "[yellow]stale[/yellow]",
+                f"files extracted from {archive.relative_to(path).as_posix()} (unknown)",
+                "",
+            )
+        table.add_section()
+        table.add_row(
+            f"{delta['unchanged']} unchanged"
+            + (f", {delta['deferred']} deferred" if delta["deferred"] else ""),
+            "",
+            "",
+        )
+        if console is not None:
+            console.print(table)
+
+        delta.update(dict.fromkeys(DOWNLOAD_RESULTS, 0))
+        delta["report"] = None
+        if dry_run:
+            return delta
+
+        quarantine = path / QUARANTINE_DIR / str(manifest.dataset_version or "unknown")
+        for file_path in delta["removed"]:
+            try:
+                if removed == "delete" and file_path.is_file():
+                    os.remove(file_path)
+                elif removed == "quarantine" and file_path.is_file():
+                    target = quarantine / file_path.relative_to(path)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(file_path, target)
+            except OSError as e:
+                logger = get_logger(__name__)
+                logger.error(f"Error while removing '{file_path}': {e}")
+        if delta["stale"]:
+            logger = get_logger(__name__)
+            logger.warning(
+                f"The extracted files of {len(delta['stale'])} removed archives are unknown and kept: "
+                + ", ".join(str(archive) for archive in delta["stale"])
+            )
+        for key in gone:
+            manifest.discard(key)
+        for key in superseded:
+            manifest.discard(key)
+        manifest.flush()
+
+        pending = delta["added"] + delta["changed"]
+        if pending:
+            kwargs.pop("use_manifest", None)
+            all_files = self.download_files
+            self.download_files = pending
+            try:
+                results = self.download(path, use_manifest=True, **kwargs)
+            finally:
+                self.download_files = all_files
+            if results is None:
+                return None
+            delta.update(results)
+            delta["report"] = results
+
+        # The local copy is at this version only if every file of the delta arrived
+        if delta["deferred"]:
+            logger = get_logger(__name__)
+            logger.info(
+                f"{delta['deferred']} changes outside of the selected files are left for a full sync, the local copy stays at version {manifest.dataset_version}."
+            )
+        elif not delta["failed"] and not delta["interrupted"]:
+            manifest = Manifest(path)
+            manifest.set_dataset_version(self.version)
+            manifest.flush()
+        return delta
+
+    def _archive_members(self, key: str, entry: dict, path: Path) -> list:
+        """
+        Returns the local paths of the members of a recorded archive, read from the archive or from its remote central directory.
+
+        :param key: The file id of the archive.
+        :type key: str
+        :param entry: The manifest entry of the archive.
+        :type entry: dict
+        :param path: The path of the local copy.
+        :type path: Path
+        :return: The paths of the members or None, if the central directory can't be read.
+        :rtype: list
+        """
+        archive = path / entry["path"]
+        if archive.is_file():
+            try:
+                with zipfile.ZipFile(archive, "r") as zip_ref:
+                    names = zip_ref.namelist()
+            except (OSError, zipfile.BadZipFile):
+                return None
+        else:
+            url = urlparse(self.server_url)._replace(path=f"api/access/datafile/{key}/")
+            names = fetch_central_directory(
+                self.session, url.geturl(), self._request_header
             )
+            if names is None:
+                return None
+        return [
+            member_path(archive.parent, name)
+            for name in names
+            if not name.endswith("/")
+        ]
+
+    def verify(
+        self,
+        path: str,
+        files: list = [],
+        workers: int = 1,
+        executor: str = "thread",
+        use_manifest: bool = True,
+        report: str = None,
+        progress: bool = True,
+    ) -> dict:
+        """
+        Verifies a downloaded copy of the dataset by hashing every expected file, e.g. after a storage incident.
+
+        The files are hashed concurrently by workers threads or processes, each file is read through a memory map.
+        Archives that were extracted and removed according to the manifest can't be hashed, they are reported as processed.
+        Files in path that belong neither to the dataset nor to an extracted archive are reported as extra.
+        With use_manifest, corrupt and missing files are discarded from the manifest, so the next download fetches them again.
 
-        # Display the table
-        console.print(table)
+        :param path: The path of the local copy.
+        :type path: str
+        :param files: A list of files that are verified. If the list is empty, the whole dataset is verified and extra files are searched. [Default []]
+        :type files: list
+        :param workers: The number of files that are hashed concurrently. [Default: 1]
+        :type workers: int
+        :param executor: The pool hashing the files, "thread" or "process". [Default: "thread"]
+        :type executor: str
+        :param use_manifest: Indicates if the manifest in path is read and updated. [Default: True]
+        :type use_manifest: bool
+        :param report: A file the report is written to as JSON. [Default: None]
+        :type report: str
+        :param progress: Indicates if the progress and the result table are shown. [Default: True]
+        :type progress: bool
+        :return: The relative paths of the files by outcome (VERIFY_RESULTS), corrupt files with their "expected" and "actual" checksum, and the hashed "bytes" in "seconds", or None if path doesn't exist.
+        :rtype: dict
+
+        :raise ValueError: If workers is smaller than 1 or the executor is unknown.
+        """
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}.")
+        if executor not in ("thread", "process"):
+            raise ValueError(
+                f"executor must be 'thread' or 'process', got {executor!r}."
+            )
 
-    def format_datetime(self, timestamp):
-        """Formats the datetime for display"""
-        return (
-            str(datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ")) if timestamp else ""
+        logger = get_logger(__name__)
+        path = Path(path)
+        if not path.is_dir():
+            logger.error(f"The directory '{path}' does not exist.")
+            return None
+
+        selected = self._select_files(files)
+        manifest = Manifest(path) if use_manifest else None
+        result = {
+            "dataset": self.persistent_id,
+            "version": self.version,
+            "path": str(path),
+        }
+        result.update({outcome: [] for outcome in VERIFY_RESULTS})
+
+        pending = []
+        for f in selected:
+            file_path = f.get_file_path(path)
+            relative = f.get_file_path().as_posix()
+            entry = manifest.get(f) if manifest is not None else None
+            if file_path.is_file():
+                pending.append((f, file_path))
+            elif (
+                entry and entry.get("removed") and entry["checksum"] == f.get_checksum()
+            ):
+                result["processed"].append(relative)
+            else:
+                result["missing"].append(relative)
+                if manifest is not None:
+                    manifest.discard(f)
+
+        console = Console()
+        start = time.monotonic()
+        hashed = 0
+        pool_class = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+        with progress_display(console, disable=not progress) as display, pool_class(
+            max_workers=workers
+        ) as pool:
+            sizes = {f.get_id(): file_path.stat().st_size for f, file_path in pending}
+            task_id = display.add_task(
+                f"[bold]Verifying {len(pending)} files[/bold]",
+                total=sum(sizes.values()),
+            )
+            futures = {
+                pool.submit(_hash_file, str(file_path)): (f, file_path)
+                for f, file_path in pending
+            }
+            digests = {}
+            for future in as_completed(futures):
+                f, file_path = futures[future]
+                try:
+                    digests[f.get_id()] = future.result()
+                except OSError as e:
+                    logger.error(f"Could not read '{file_path}': {e}")
+                    digests[f.get_id()] = None
+                hashed += sizes[f.get_id()]
+                display.update(task_id, advance=sizes[f.get_id()])
+
+        # Report in the order of the dataset
+        for f, file_path in pending:
+            relative = f.get_file_path().as_posix()
+            digest = digests[f.get_id()]
+            if digest == f.get_checksum():
+                result["verified"].append(relative)
+                if manifest is not None:
+                    # Records the current mtime, the next download skips the file without hashing
+                    entry = manifest.get(f)
+                    f.file_path = file_path
+                    manifest.record(
+                        f,
+                        entry["status"] if entry else "verified",
+                        removed=False,
+                    )
+            else:
+                result["corrupt"].append(
+                    {
+                        "path": relative,
+                        "expected": f.get_checksum(),
+                        "actual": digest,
+                    }
+                )
+                if manifest is not None:
+                    manifest.discard(f)
+        if manifest is not None:
+            manifest.flush()
+
+        if not files:
+            result["extra"] = self._extra_files(path)
+        result["bytes"] = hashed
+        result["seconds"] = round(time.monotonic() - start, 3)
+
+        table = Table(
+            title=f"Verification of {self.persistent_id} ({humanize.naturalsize(hashed)} in {result['seconds']:.1f}s)",
+            title_justify="left",
+        )
+        table.add_column("Result", justify="left")
+        table.add_column("Name", justify="left")
+        for entry in result["corrupt"]:
+            table.add_row("[red]corrupt[/red]", entry["path"])
+        for relative in result["missing"]:
+            table.add_row("[red]missing[/red]", relative)
+        for relative in result["extra"]:
+            table.add_row("[yellow]extra[/yellow]", relative)
+        table.add_section()
+        table.add_row(
+            ", ".join(
+                f"{len(result[outcome])} {outcome}" for outcome in VERIFY_RESULTS
+            ),
+            "",
         )
+        if progress:
+            console.print(table)
+
+        if report:
+            try:
+                with open(report, "w") as report_file:
+                    json.dump(result, report_file, indent=2)
+            except OSError as e:
+                logger.error(f"Could not write the report '{report}': {e}")
+        return result
+
+    def _extra_files(self, path: Path) -> list:
+        """
+        Returns the files in path that belong neither to the dataset nor to an extracted archive.
+        The manifest, quarantine and other .darus-* entries of path are ignored.
+
+        :param path: The path of the local copy.
+        :type path: Path
+        :return: The paths relative to path.
+        :rtype: list
+        """
+        expected = set()
+        for f in self.download_files:
+            file_path = f.get_file_path(path)
+            expected.add(file_path)
+            names = f.member_names(path, self._request_header, self.session)
+            expected.update(member_path(file_path.parent, name) for name in names or [])
+
+        extra = []
+        for root, dirs, names in os.walk(path):
+            root = Path(root)
+            if root == path:
+                dirs[:] = [d for d in dirs if not d.startswith(".darus-")]
+                names = [n for n in names if not n.startswith(".darus-")]
+            dirs.sort()
+            for name in sorted(names):
+                if root / name not in expected:
+                    extra.append((root / name).relative_to(path).as_posix())
+        return extra
+
+    def close(self):
+        """Closes the connections of the session, if it is owned by the dataset."""
+        if self._owns_session:
+            self.session.close()
 
     def download(
-        self, path: str, files: list = [], post_process=True, remove_after_pp=True
-    ):
+        self,
+        path: str,
+        files: list = [],
+        post_process=True,
+        remove_after_pp=True,
+        max_workers: int = 1,
+        segments: int = 1,
+        hash_in_thread: bool = False,
+        use_manifest: bool = True,
+        stream_extract: bool = False,
+        extract_workers: int = 1,
+        extract_executor: str = "thread",
+        member_filter: MemberFilter = None,
+        virtual: bool = False,
+        bulk_threshold=None,
+        preallocate: bool = False,
+        bandwidth_limit=None,
+        schedule="metadata",
+        priorities: dict = None,
+        retries: int = 3,
+        backoff: float = 1.0,
+        check_space: bool = True,
+        sinks: list = None,
+        executor: ThreadPoolExecutor = None,
+        cancel: threading.Event = None,
+        store=None,
+    ) -> dict:
         """
         Starts the download
 
@@ -172,141 +819,578 @@ class Dataset:
         :type post_process: bool
         :param remove_after_pp: Indicates if the files should be deleted after being post processed. [Default: True]
         :type remove_after_pp: bool
+        :param max_workers: The number of files that are downloaded, validated and post processed concurrently. [Default: 1]
+        :type max_workers: int
+        :param segments: The number of byte ranges each large file is split into and downloaded concurrently. [Default: 1]
+        :type segments: int
+        :param hash_in_thread: Indicates if the MD5 of each file is computed on a separate thread while downloading. [Default: False]
+        :type hash_in_thread: bool
+        :param use_manifest: Indicates if files that are already verified according to the manifest in path are skipped. [Default: True]
+        :type use_manifest: bool
+        :param stream_extract: Indicates if ZIP archives are extracted while they are downloaded. With remove_after_pp, the archive is never written to disk. [Default: False]
+        :type stream_extract: bool
+        :param extract_workers: The number of members of a ZIP archive that are extracted concurrently. [Default: 1]
+        :type extract_workers: int
+        :param extract_executor: The pool extracting the members, "thread" or "process". [Default: "thread"]
+        :type extract_executor: str
+        :param member_filter: Selects the members of ZIP archives that are extracted, e.g. MemberFilter(include=["*.h5"]). [Default: None]
+        :type member_filter: MemberFilter
+        :param virtual: Indicates if ZIP archives are kept and read in place (see DatasetFile.open_member) instead of being extracted. [Default: False]
+        :type virtual: bool
+        :param bulk_threshold: Files up to this size (in bytes or with unit, e.g. "1MB") are fetched in batches with a single request each, instead of one request per file. [Default: None]
+        :type bulk_threshold: int or str
+        :param preallocate: Indicates if each file is allocated with its final size before writing (posix_fallocate) and received into a reused buffer. [Default: False]
+        :type preallocate: bool
+        :param bandwidth_limit: The combined rate of all concurrent downloads, in bytes per second, with unit (e.g. "10MB/s") or a BandwidthLimiter, e.g. with a schedule or shared with other datasets. [Default: None]
+        :type bandwidth_limit: int or str or BandwidthLimiter
+        :param schedule: The order the files are started in, "metadata", "largest" (shortest total time), "smallest" (first files ready soonest), "interleave" or a SchedulingPolicy. [Default: "metadata"]
+        :type schedule: str or SchedulingPolicy
+        :param priorities: Priorities by glob of the file path or by directory, higher priorities are started first, e.g. {"docs": 1}. [Default: None]
+        :type priorities: dict
+        :param retries: The number of retries of a file after a dropped connection, timeout or transient HTTP error (429, 5xx), resuming from the received bytes. [Default: 3]
+        :type retries: int
+        :param backoff: The delay before the first retry in seconds, doubled with every retry and jittered. Retry-After headers are honored instead. [Default: 1.0]
+        :type backoff: float
+        :param check_space: Indicates if the download is aborted before the first byte, if the files and extracted archives don't fit on the filesystem, see check_disk_space. [Default: True]
+        :type check_space: bool
+        :param sinks: The EventSinks receiving the DownloadEvent of every step, functions are wrapped in a CallbackSink. An empty list downloads without any output. If None, a RichSink shows the progress. [Default: None]
+        :type sinks: list
+        :param executor: A worker pool shared with other datasets, the files are downloaded on it instead of an own pool of max_workers. [Default: None]
+        :type executor: ThreadPoolExecutor
+        :param cancel: An event shared with other datasets, stops the download if set. [Default: None]
+        :type cancel: threading.Event
+        :param store: A content store, as directory or ContentStore, e.g. shared with other datasets. Files with a checksum in the store are linked instead of downloaded, downloaded files are added. [Default: None]
+        :type store: str or ContentStore
+        :return: The report with the number of files by outcome ("done", "skipped" as already verified, "failed", "interrupted") and the timings of every file, or None if the download was aborted.
+        :rtype: DownloadReport
+
+        :raise ValueError: If max_workers, segments or extract_workers is smaller than 1, retries is negative, bulk_threshold is invalid or the schedule is unknown.
         """
 
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}.")
+        if segments < 1:
+            raise ValueError(f"segments must be at least 1, got {segments}.")
+        if extract_workers < 1:
+            raise ValueError(
+                f"extract_workers must be at least 1, got {extract_workers}."
+            )
+        if retries < 0:
+            raise ValueError(f"retries must not be negative, got {retries}.")
+        if bulk_threshold is not None:
+            bulk_threshold = parse_size(bulk_threshold)
+        limiter = bandwidth_limit
+        if limiter is not None and not isinstance(limiter, BandwidthLimiter):
+            limiter = BandwidthLimiter(limiter)
+        if not isinstance(schedule, SchedulingPolicy):
+            schedule = SchedulingPolicy(schedule or "metadata", priorities)
+        elif priorities:
+            raise ValueError("Pass the priorities to the SchedulingPolicy.")
+        if store is not None and not isinstance(store, ContentStore):
+            store = ContentStore(store)
+        if sinks is None:
+            sinks = [RichSink()]
+        sinks = [s if isinstance(s, EventSink) else CallbackSink(s) for s in sinks]
+
         if not post_process and remove_after_pp:
             remove_after_pp = False
             warnings.warn(
                 "Disabled removing files after post processing, as no post processing is desired."
             )
+        if virtual and remove_after_pp:
+            remove_after_pp = False
+            warnings.warn(
+                "Disabled removing files after post processing, as archives are read in place."
+            )
 
         path = Path(path)
         if dir_exists(path):
             if len(self.download_files) > 0:
 
                 # Check if user wants to download only specific files
-                if files:
-                    available_files = {f.name for f in self.download_files}
-                    requested_files = set(files)
-                    missing_files = requested_files - available_files
-
-                    if missing_files:
-                        logger = get_logger(__name__)
-                        missing_list = ", ".join(sorted(missing_files))
-                        logger.error(
-                            f"Requested files not found in dataset: {missing_list}"
-                        )
-                        logger.info(
-                            f"Available files: {', '.join(sorted(available_files))}"
-                        )
-
-                    self.download_files = [
-                        f for f in self.download_files if f.name in files
-                    ]
-
-                console = Console()
-                table = Table(title="Downloading...", title_justify="left")
-
-                table.add_column("Name", justify="left")
-                table.add_column("Size", justify="left")
-                table.add_column("Directory", justify="left")
-                table.add_column("Download Original", justify="left")
-                table.add_column("Description", justify="left")
-
-                for file in self.download_files:
-                    table.add_row(
-                        file.name,
-                        file.get_filesize(),
-                        str(path / file.sub_dir),
-                        (
-                            f"[green]✓({file.original_file_name})[/green]"
-                            if file.original_file_name
-                            else ""
-                        ),
-                        file.description,
+                self.download_files = self._select_files(files)
+                # Concurrent downloads and bulk batches start in this order
+                self.download_files = schedule.apply(self.download_files)
+
+                manifest = Manifest(path) if use_manifest else None
+                if check_space and not self.check_disk_space(
+                    path,
+                    post_process=post_process,
+                    remove_after_pp=remove_after_pp,
+                    stream_extract=stream_extract,
+                    member_filter=member_filter,
+                    virtual=virtual,
+                    max_workers=max_workers,
+                    manifest=manifest,
+                    store=store,
+                ):
+                    return
+
+                def emit(kind, f, completed=0, total=0, message=""):
+                    event = DownloadEvent(
+                        kind, f, completed, total, message, self.persistent_id
                     )
+                    for sink in sinks:
+                        sink.send(event)
 
-                console.print(table)
-
-                # Create a single progress display with ETA and file size
-                with Progress(
-                    TextColumn("[bold]{task.description}"),
-                    BarColumn(),
-                    "[progress.percentage]{task.percentage:>3.1f}%",
-                    "•",
-                    DownloadColumn(),
-                    "•",
-                    TimeElapsedColumn(),
-                    "•",
-                    TimeRemainingColumn(),
-                    "•",
-                    TransferSpeedColumn(),
-                    console=console,
-                ) as progress:
-
-                    for i, f in enumerate(self.download_files):
-                        if f.has_original and f.download_original:
-                            f.name = f.original_file_name
-                        name = f.name
-
-                        # Downloading
-                        task_id = progress.add_task(
-                            f"[blue]Downloading {f.name}[/blue]",
-                            total=f.get_filesize(False),
-                        )
-                        for current_size in f.download(path, header=self.header):
-                            progress.update(task_id, completed=int(current_size))
-
-                        progress.update(
-                            task_id, description=f"[yellow]Processing {f.name}[/yellow]"
-                        )
-                        download_correct = f.validate()
-                        if download_correct:
-                            if f.do_extract and post_process:
-                                # Post processing
-                                process_result = f.process()
-
-                                # Removing only if processing succeeded
-                                remove_result = False
-                                if process_result and remove_after_pp:
-                                    progress.update(
-                                        task_id,
-                                        description=f"[red]Removing {f.name}[/red]",
-                                    )
-                                    remove_result = f.remove()
-
-                                # Final status in the same line
-                                if process_result and remove_result:
-                                    status = f"[green]✓ {f.name} (processed & removed)[/green]"
-                                elif process_result:
-                                    status = f"[yellow]⚠ {f.name} (processed, removal failed)[/yellow]"
-                                elif remove_result:
-                                    status = f"[yellow]⚠ {f.name} (processed failed, removed)[/yellow]"
-                                else:
-                                    status = f"[red]✗ {f.name} (processed & removal failed)[/red]"
-
-                                progress.update(
-                                    task_id,
-                                    description=status,
-                                    completed=f.get_filesize(False),
-                                )
-                            else:
-                                status = f"[green]✓ {f.name}[/green]"
-                                progress.update(
-                                    task_id,
-                                    description=status,
-                                    completed=f.get_filesize(False),
+                results = DownloadReport(self.persistent_id, self.version, path)
+                for sink in sinks:
+                    sink.start(self.persistent_id, self.download_files, path, limiter)
+                try:
+                    cancel = cancel if cancel is not None else threading.Event()
+                    prefetched = set()  # Ids of the files unpacked from bulk archives
+                    run_file = partial(
+                        self._download_file,
+                        path=path,
+                        emit=emit,
+                        post_process=post_process,
+                        remove_after_pp=remove_after_pp,
+                        segments=segments,
+                        hash_in_thread=hash_in_thread,
+                        manifest=manifest,
+                        cancel=cancel,
+                        stream_extract=stream_extract,
+                        extract_workers=extract_workers,
+                        extract_executor=extract_executor,
+                        member_filter=member_filter,
+                        virtual=virtual,
+                        prefetched=prefetched,
+                        preallocate=preallocate,
+                        limiter=limiter,
+                        retries=retries,
+                        backoff=backoff,
+                        store=store,
+                    )
+
+                    def download_file(f):
+                        record = results.start_file(f)
+                        outcome = run_file(f, record=record)
+                        record.finish(outcome, f)
+                        return outcome
+
+                    try:
+                        if bulk_threshold is not None:
+                            prefetched.update(
+                                self._download_bulk(
+                                    path,
+                                    emit,
+                                    bulk_threshold,
+                                    manifest,
+                                    cancel,
+                                    limiter,
+                                    store,
                                 )
-                        else:
-                            status = f"[red]✗ {f.name} (wrong hash value)[/red]"
-                            progress.update(
-                                task_id,
-                                description=status,
-                                completed=f.get_filesize(False),
                             )
+
+                        if max_workers == 1 and executor is None:
+                            for f in self.download_files:
+                                results[download_file(f)] += 1
+                        else:
+                            owns_executor = executor is None
+                            if owns_executor:
+                                executor = ThreadPoolExecutor(max_workers=max_workers)
+                            futures = [
+                                executor.submit(download_file, f)
+                                for f in self.download_files
+                            ]
+                            try:
+                                for future in as_completed(futures):
+                                    results[future.result()] += 1
+                            except BaseException:
+                                # Stop running and pending files, e.g. on KeyboardInterrupt
+                                cancel.set()
+                                for future in futures:
+                                    future.cancel()
+                                raise
+                            finally:
+                                if owns_executor:
+                                    executor.shutdown(wait=True)
+                    finally:
+                        # Persist the state of an interrupted job, a rerun continues from here
+                        if manifest is not None:
+                            manifest.flush()
+                        results.finish()
+                finally:
+                    for sink in sinks:
+                        sink.finish(self.persistent_id)
+                return results
             else:
                 logger = get_logger(__name__)
                 logger.info("No files to download.")
+                return DownloadReport(self.persistent_id, self.version, path)
         else:
             logger = get_logger(__name__)
             logger.info("Download aborted.")
+
+    def _download_bulk(
+        self,
+        path: Path,
+        emit,
+        threshold: int,
+        manifest: Manifest = None,
+        cancel: threading.Event = None,
+        limiter: BandwidthLimiter = None,
+        store: ContentStore = None,
+    ) -> set:
+        """
+        Fetches the small files of the download in batches through the bulk access api (/api/access/datafiles/{ids}).
+
+        :param path: The root path where the files are downloaded.
+        :type path: Path
+        :param emit: Sends a DownloadEvent to the sinks of the download.
+        :type emit: callable
+        :param threshold: The maximal size of a file in a batch in bytes.
+        :type threshold: int
+        :param manifest: The manifest, verified files are not fetched again. [Default: None]
+        :type manifest: Manifest
+        :param cancel: If set, no further batch is fetched. [Default: None]
+        :type cancel: threading.Event
+        :param limiter: Limits the combined throughput of all downloads. [Default: None]
+        :type limiter: BandwidthLimiter
+        :param store: The content store, stored files are linked one by one instead. [Default: None]
+        :type store: ContentStore
+        :return: The ids of the files that were unpacked, the others are downloaded one by one.
+        :rtype: set
+        """
+        # Originals (format=original) and ingested files need separate requests
+        groups = {}
+        for f in self.download_files:
+            if f.get_filesize(False) > threshold:
+                continue
+            if manifest is not None and manifest.is_verified(f):
+                continue
+            if store is not None and store.get(f.get_checksum()) is not None:
+                continue
+            groups.setdefault(f.has_original and f.download_original, []).append(f)
+
+        batches = [
+            (original, files[i : i + BULK_BATCH_FILES])
+            for original, files in groups.items()
+            for i in range(0, len(files), BULK_BATCH_FILES)
+        ]
+
+        fetched = set()
+        for original, batch in batches:
+            if cancel is not None and cancel.is_set():
+                break
+            if len(batch) > 1:
+                fetched |= self._download_batch(
+                    batch, path, emit, original, cancel, limiter
+                )
+        return fetched
+
+    def _download_batch(
+        self,
+        files: list,
+        path: Path,
+        emit,
+        original: bool = False,
+        cancel: threading.Event = None,
+        limiter: BandwidthLimiter = None,
+    ) -> set:
+        """
+        Streams the archive of several files and unpacks it into the directory layout of the dataset.
+        The MD5 of every file is computed while unpacking, so it is validated like a single download.
+
+        :param files: The files of the batch.
+        :type files: list
+        :param path: The root path where the files are downloaded.
+        :type path: Path
+        :param emit: Sends a DownloadEvent to the sinks of the download.
+        :type emit: callable
+        :param original: Indicates if the original format of the files is requested. [Default: False]
+        :type original: bool
+        :param cancel: If set, the batch is stopped. [Default: None]
+        :type cancel: threading.Event
+        :param limiter: Limits the combined throughput of all downloads. [Default: None]
+        :type limiter: BandwidthLimiter
+        :return: The ids of the files that were unpacked.
+        :rtype: set
+        """
+        ids = ",".join(str(f.get_id()) for f in files)
+        url = (
+            urlparse(self.server_url)
+            ._replace(
+                path=f"/api/access/datafiles/{ids}",
+                query="format=original" if original else "",
+            )
+            .geturl()
+        )
+
+        total = sum(f.get_filesize(False) for f in files)
+        received = 0
+        emit(DownloadEvent.BULK, None, 0, total, f"{len(files)} files")
+
+        fetched = set()
+        staging = Path(tempfile.mkdtemp(prefix=".darus-bulk-", dir=path))
+        try:
+            # Unpacked next to the targets, so the files are moved without copying
+            extractor = ZipStreamExtractor(staging, hash_members=True)
+            with self.session.get(url, headers=self._request_header, stream=True) as r:
+                r.raise_for_status()
+                for chunk in _read_chunks(r):
+                    if cancel is not None and cancel.is_set():
+                        return fetched
+                    if limiter is not None:
+                        limiter.consume(len(chunk))
+                    extractor.feed(chunk)
+                    received += len(chunk)
+                    emit(
+                        DownloadEvent.BULK, None, received, total, f"{len(files)} files"
+                    )
+            extractor.close()
+
+            # Members are named directoryLabel/filename, by the file name on servers without folders
+            names = [f.get_file_path().name for f in files]
+            for f, name in zip(files, names):
+                staged = member_path(staging, f.get_file_path().as_posix())
+                if staged not in extractor.digests and names.count(name) == 1:
+                    staged = member_path(staging, name)
+                if staged not in extractor.digests:
+                    continue
+
+                file_path = f.get_file_path(path)
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(staged, file_path)
+                f.mark_downloaded(file_path, extractor.digests[staged])
+                fetched.add(f.get_id())
+        except Exception as e:
+            logger = get_logger(__name__)
+            logger.error(
+                f"Bulk download of {len(files)} files failed, downloading them one by one: {e}"
+            )
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        emit(
+            DownloadEvent.BULK_FINISHED,
+            None,
+            total,
+            total,
+            f"{len(fetched)}/{len(files)} files",
+        )
+        return fetched
+
+    def _download_file(
+        self,
+        f: DatasetFile,
+        path: Path,
+        emit,
+        post_process: bool,
+        remove_after_pp: bool,
+        segments: int = 1,
+        hash_in_thread: bool = False,
+        manifest: Manifest = None,
+        cancel: threading.Event = None,
+        stream_extract: bool = False,
+        extract_workers: int = 1,
+        extract_executor: str = "thread",
+        member_filter: MemberFilter = None,
+        virtual: bool = False,
+        prefetched: set = None,
+        preallocate: bool = False,
+        limiter: BandwidthLimiter = None,
+        retries: int = 0,
+        backoff: float = 1.0,
+        store: ContentStore = None,
+        record: FileReport = None,
+    ) -> str:
+        """
+        Downloads, validates and post processes a single file. Safe to run on a worker thread.
+
+        :param f: The file to download.
+        :type f: DatasetFile
+        :param path: The root path where the file is downloaded.
+        :type path: Path
+        :param emit: Sends a DownloadEvent to the sinks of the download.
+        :type emit: callable
+        :param post_process: Indicates if the file should be post processed.
+        :type post_process: bool
+        :param remove_after_pp: Indicates if the file should be deleted after being post processed.
+        :type remove_after_pp: bool
+        :param segments: The number of byte ranges the file is downloaded in. [Default: 1]
+        :type segments: int
+        :param hash_in_thread: Indicates if the MD5 is computed on a separate thread. [Default: False]
+        :type hash_in_thread: bool
+        :param manifest: The manifest to skip verified files and record finished ones. [Default: None]
+        :type manifest: Manifest
+        :param cancel: If set, the download is stopped and its .part file kept. [Default: None]
+        :type cancel: threading.Event
+        :param stream_extract: Indicates if a ZIP archive is extracted while it is downloaded. [Default: False]
+        :type stream_extract: bool
+        :param extract_workers: The number of members extracted concurrently. [Default: 1]
+        :type extract_workers: int
+        :param extract_executor: The pool extracting the members, "thread" or "process". [Default: "thread"]
+        :type extract_executor: str
+        :param member_filter: Selects the members of a ZIP archive that are extracted. [Default: None]
+        :type member_filter: MemberFilter
+        :param virtual: Indicates if a ZIP archive is kept for reading in place instead of being extracted. [Default: False]
+        :type virtual: bool
+        :param prefetched: The ids of the files that are already unpacked from a bulk archive. [Default: None]
+        :type prefetched: set
+        :param preallocate: Indicates if the file is allocated with its final size before writing. [Default: False]
+        :type preallocate: bool
+        :param limiter: Limits the combined throughput of all downloads. [Default: None]
+        :type limiter: BandwidthLimiter
+        :param retries: The number of retries after a transient error. [Default: 0]
+        :type retries: int
+        :param backoff: The delay before the first retry in seconds. [Default: 1.0]
+        :type backoff: float
+        :param store: The content store the file is linked from or added to. [Default: None]
+        :type store: ContentStore
+        :param record: The report the bytes and the timings of the stages are recorded in. [Default: None]
+        :type record: FileReport
+        :return: The outcome, one of DOWNLOAD_RESULTS.
+        :rtype: str
+        """
+        if f.has_original and f.download_original:
+            f.name = f.original_file_name
+
+        filesize = f.get_filesize(False)
+        if record is None:
+            record = FileReport(f, time.monotonic())
+
+        if manifest is not None and manifest.is_verified(f):
+            f.file_path = f.get_file_path(path)
+            emit(DownloadEvent.SKIPPED, f, filesize, filesize, "already verified")
+            return "skipped"
+
+        # Files with the same content are downloaded once at a time, the others are linked from the store
+        lock = (
+            store.lock(f.get_checksum())
+            if store is not None
+            else contextlib.nullcontext()
+        )
+        with lock:
+            # Downloading
+            emit(DownloadEvent.STARTED, f, 0, filesize)
+            from_bulk = bool(prefetched) and f.get_id() in prefetched
+            if from_bulk:
+                # Already unpacked from a bulk archive
+                downloads = (size for size in [filesize])
+            else:
+                downloads = f.download(
+                    path,
+                    header=self._request_header,
+                    session=self.session,
+                    segments=segments,
+                    hash_in_thread=hash_in_thread,
+                    stream_extract=stream_extract and post_process and not virtual,
+                    keep_archive=not remove_after_pp,
+                    member_filter=member_filter,
+                    preallocate=preallocate,
+                    limiter=limiter,
+                    retries=retries,
+                    backoff=backoff,
+                    store=store,
+                )
+            # Bytes of an interrupted download are not received again
+            part_path = f.get_file_path(path)
+            part_path = part_path.with_name(part_path.name + PART_SUFFIX)
+            resumed = _part_length(part_path)
+            with record.stage("transfer"):
+                for current_size in downloads:
+                    if cancel is not None and cancel.is_set():
+                        # Closing the generator stops the transfer and keeps the .part file
+                        downloads.close()
+                        emit(DownloadEvent.INTERRUPTED, f, int(current_size), filesize)
+                        return "interrupted"
+                    emit(DownloadEvent.PROGRESS, f, int(current_size), filesize)
+                    record.bytes = max(0, int(current_size) - resumed)
+            if from_bulk:
+                # Received by the bulk request, its time is not attributed to single files
+                record.bytes = filesize
+                record.bulk = True
+            elif f.from_store:
+                record.bytes = 0
+            else:
+                record.split("transfer", "connect", f.ttfb)
+
+            emit(DownloadEvent.STAGE, f, filesize, filesize, "validating")
+            # Hashing while receiving is part of the transfer, only hashing from disk is a stage
+            with (
+                record.stage("hash") if not f.has_digest() else contextlib.nullcontext()
+            ):
+                download_correct = f.validate()
+            if download_correct and store is not None and not f.from_store:
+                store.add(f.get_checksum(), f.file_path)
+
+        retried = (
+            ", from store"
+            if f.from_store
+            else (
+                f", {f.retries} {'retry' if f.retries == 1 else 'retries'}"
+                if f.retries
+                else ""
+            )
+        )
+        if download_correct:
+            if f.do_extract and post_process:
+                # Post processing, the bar follows the extracted bytes of the members
+                def report_extraction(extracted, total):
+                    emit(DownloadEvent.PROGRESS, f, extracted, total, "extracting")
+
+                with record.stage("extract"):
+                    process_result = f.process(
+                        workers=extract_workers,
+                        executor=extract_executor,
+                        progress=report_extraction,
+                        member_filter=member_filter,
+                        virtual=virtual,
+                    )
+
+                # Removing only if processing succeeded
+                remove_result = False
+                if process_result and remove_after_pp:
+                    emit(DownloadEvent.STAGE, f, filesize, filesize, "removing")
+                    with record.stage("remove"):
+                        remove_result = f.remove()
+
+                if manifest is not None:
+                    if process_result:
+                        manifest.record(f, "processed", removed=remove_result)
+                    else:
+                        manifest.discard(f)
+
+                # Final status in the same line
+                skipped = (
+                    f", {humanize.naturalsize(f.skipped_bytes)} skipped"
+                    if f.skipped_bytes
+                    else ""
+                ) + retried
+                # An archive is only reported as not removed if its removal was requested, e.g. not when it is read in place
+                if process_result and remove_result:
+                    kind = DownloadEvent.PROCESSED
+                    message = f"processed & removed{skipped}"
+                elif process_result and remove_after_pp:
+                    kind = DownloadEvent.PROCESSED
+                    message = f"processed{skipped}, removal failed"
+                elif process_result:
+                    kind = DownloadEvent.PROCESSED
+                    message = f"processed & kept{skipped}"
+                elif remove_result:
+                    kind = DownloadEvent.FAILED
+                    message = f"processing failed, removed{retried}"
+                elif remove_after_pp:
+                    kind = DownloadEvent.FAILED
+                    message = f"processing & removal failed{retried}"
+                else:
+                    kind = DownloadEvent.FAILED
+                    message = f"processing failed{retried}"
+            else:
+                if manifest is not None:
+                    manifest.record(f, "verified")
+                kind = DownloadEvent.VERIFIED
+                message = f"verified{retried}" if retried else ""
+        else:
+            if manifest is not None:
+                manifest.discard(f)
+            kind = DownloadEvent.FAILED
+            message = f"wrong hash value{retried}"
+
+        emit(kind, f, filesize, filesize, message)
+        if not download_correct or (
+            f.do_extract and post_process and not process_result
+        ):
+            return "failed"
+        return "done"
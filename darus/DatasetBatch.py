@@ -0,0 +1,324 @@
+import contextlib
+import humanize
+import json
+import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+from .BandwidthLimiter import BandwidthLimiter
+from .ContentStore import ContentStore
+from .Dataset import DEFAULT_POOL_SIZE, DOWNLOAD_RESULTS, Dataset
+from .EventSink import RichSink, progress_display
+from .TimeoutAdapter import DEFAULT_TIMEOUT, TimeoutAdapter
+from .utils import dataset_url, get_logger
+
+
+class DatasetBatch:
+    def __init__(
+        self,
+        jobs: list,
+        api_token: str = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        cache: bool = False,
+        cache_dir: str = None,
+        offline: bool = False,
+        version: str = None,
+        timeout=DEFAULT_TIMEOUT,
+    ):
+        """
+        Downloads several datasets in one process, sharing a connection pool, a worker pool and a progress display.
+
+        Each job is a url or DOI, or a dict with the keys "url", "path", "files", "api_token" and "version" of one dataset.
+        Jobs without path are downloaded to the path given to download, in a directory named after their DOI.
+
+        :param jobs: The datasets to download.
+        :type jobs: list
+        :param api_token: The token of jobs without own token. [Default: None]
+        :type api_token: str
+        :param pool_size: The number of connections kept alive by the shared session. Should be at least max_workers * segments of the download. [Default: 10]
+        :type pool_size: int
+        :param cache: Indicates if the dataset information is cached on disk. [Default: False]
+        :type cache: bool
+        :param cache_dir: The directory of the metadata cache, enables the cache. [Default: $XDG_CACHE_HOME/darus or ~/.cache/darus]
+        :type cache_dir: str
+        :param offline: Indicates if the dataset information is only read from the metadata cache. [Default: False]
+        :type offline: bool
+        :param version: The version of jobs without own version, see Dataset. [Default: None]
+        :type version: str
+        :param timeout: The seconds the shared session waits to connect and for the next bytes of a response, see Dataset. [Default: (10.0, 60.0)]
+        :type timeout: float or tuple
+
+        :raise ValueError: If a job has no valid url.
+        """
+        self.session = requests.Session()
+        adapter = TimeoutAdapter(
+            timeout, pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.jobs = []
+        for job in jobs:
+            job = {"url": job} if isinstance(job, str) else dict(job)
+            if not job.get("url"):
+                raise ValueError(f"The dataset {job} has no url.")
+            dataset = Dataset(
+                dataset_url(job["url"]),
+                api_token=job.get("api_token") or api_token,
+                session=self.session,
+                cache=cache,
+                cache_dir=cache_dir,
+                offline=offline,
+                version=job.get("version") or version,
+            )
+            self.jobs.append(
+                {
+                    "dataset": dataset,
+                    "path": job.get("path"),
+                    "files": job.get("files") or [],
+                }
+            )
+
+    def close(self):
+        """Closes the connections of the shared session."""
+        self.session.close()
+
+    def _job_path(self, job: dict, path: str) -> Path:
+        """Returns the download path of a job, by default a directory per DOI below path."""
+        if job["path"]:
+            return Path(job["path"])
+        persistent_id = job["dataset"].persistent_id or job["dataset"].url.geturl()
+        name = persistent_id.split(":", 1)[-1].replace("/", "_")
+        return Path(path) / name
+
+    def download(
+        self,
+        path: str = "./data",
+        max_workers: int = 1,
+        bandwidth_limit=None,
+        **kwargs,
+    ) -> list:
+        """
+        Downloads all datasets concurrently, the files of all datasets share one pool of max_workers.
+
+        :param path: The root path of jobs without own path. [Default: "./data"]
+        :type path: str
+        :param max_workers: The number of files that are downloaded concurrently over all datasets. [Default: 1]
+        :type max_workers: int
+        :param bandwidth_limit: The combined rate of all datasets, see Dataset.download. [Default: None]
+        :type bandwidth_limit: int or str or BandwidthLimiter
+        :param kwargs: Further options of Dataset.download, e.g. post_process or segments.
+        :return: The outcome of every dataset, as returned by Dataset.download.
+        :rtype: list
+
+        :raise ValueError: If max_workers is smaller than 1.
+        """
+        return self._run("download", path, max_workers, bandwidth_limit, **kwargs)
+
+    def sync(
+        self,
+        path: str = "./data",
+        max_workers: int = 1,
+        bandwidth_limit=None,
+        **kwargs,
+    ) -> list:
+        """
+        Syncs all datasets concurrently, see Dataset.sync. The files of all datasets share one pool of max_workers.
+
+        :param path: The root path of jobs without own path. [Default: "./data"]
+        :type path: str
+        :param max_workers: The number of files that are downloaded concurrently over all datasets. [Default: 1]
+        :type max_workers: int
+        :param bandwidth_limit: The combined rate of all datasets, see Dataset.download. [Default: None]
+        :type bandwidth_limit: int or str or BandwidthLimiter
+        :param kwargs: Further options of Dataset.sync, e.g. removed or dry_run.
+        :return: The delta and outcome of every dataset, as returned by Dataset.sync.
+        :rtype: list
+
+        :raise ValueError: If max_workers is smaller than 1.
+        """
+        return self._run("sync", path, max_workers, bandwidth_limit, **kwargs)
+
+    def verify(
+        self,
+        path: str = "./data",
+        workers: int = 1,
+        report: str = None,
+        **kwargs,
+    ) -> list:
+        """
+        Verifies the local copies of all datasets one after another, see Dataset.verify.
+
+        :param path: The root path of jobs without own path. [Default: "./data"]
+        :type path: str
+        :param workers: The number of files of a dataset that are hashed concurrently. [Default: 1]
+        :type workers: int
+        :param report: A file the reports of all datasets are written to as JSON list. [Default: None]
+        :type report: str
+        :param kwargs: Further options of Dataset.verify, e.g. executor or use_manifest.
+        :return: The report of every dataset, as returned by Dataset.verify.
+        :rtype: list
+
+        :raise ValueError: If workers is smaller than 1.
+        """
+        results = [
+            job["dataset"].verify(
+                self._job_path(job, path), files=job["files"], workers=workers, **kwargs
+            )
+            for job in self.jobs
+        ]
+        if report:
+            try:
+                with open(report, "w") as report_file:
+                    json.dump(results, report_file, indent=2)
+            except OSError as e:
+                logger = get_logger(__name__)
+                logger.error(f"Could not write the report '{report}': {e}")
+        return results
+
+    def _run(
+        self,
+        method: str,
+        path: str = "./data",
+        max_workers: int = 1,
+        bandwidth_limit=None,
+        **kwargs,
+    ) -> list:
+        """
+        Runs a method of all datasets concurrently, with a shared worker pool and progress display.
+
+        :param method: The method of Dataset, "download" or "sync".
+        :type method: str
+        :param path: The root path of jobs without own path. [Default: "./data"]
+        :type path: str
+        :param max_workers: The number of files that are downloaded concurrently over all datasets. [Default: 1]
+        :type max_workers: int
+        :param bandwidth_limit: The combined rate of all datasets, see Dataset.download. [Default: None]
+        :type bandwidth_limit: int or str or BandwidthLimiter
+        :param kwargs: Further options of the method, e.g. sinks shared by all datasets. Without sinks, one display shows all datasets.
+        :return: The result of every dataset.
+        :rtype: list
+
+        :raise ValueError: If max_workers is smaller than 1.
+        """
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}.")
+        limiter = bandwidth_limit
+        if limiter is not None and not isinstance(limiter, BandwidthLimiter):
+            limiter = BandwidthLimiter(limiter)
+        # One store for all datasets, so files they share are only downloaded once
+        store = kwargs.pop("store", None)
+        if store is not None and not isinstance(store, ContentStore):
+            store = ContentStore(store)
+
+        # Created upfront, the interactive question of Dataset.download doesn't work concurrently
+        for job in self.jobs:
+            if job["dataset"].persistent_id is not None:
+                self._job_path(job, path).mkdir(parents=True, exist_ok=True)
+
+        sinks = kwargs.pop("sinks", None)
+        progress = None
+        if sinks is None:
+            # One display for the whole run, the bars of the datasets are labeled
+            progress = progress_display()
+            sinks = [RichSink(progress, label_datasets=True)]
+        displays = [s for s in sinks if isinstance(s, RichSink)]
+
+        cancel = threading.Event()
+        with progress or contextlib.nullcontext(), ThreadPoolExecutor(
+            max_workers=max_workers
+        ) as executor:
+
+            def run(job):
+                if job["dataset"].persistent_id is None:
+                    # Without the dataset information, a sync would remove the whole local copy
+                    logger = get_logger(__name__)
+                    logger.error(
+                        f"{method.capitalize()} of '{job['dataset'].url.geturl()}' skipped, the dataset information could not be loaded."
+                    )
+                    return None
+                return getattr(job["dataset"], method)(
+                    self._job_path(job, path),
+                    files=job["files"],
+                    max_workers=max_workers,
+                    bandwidth_limit=limiter,
+                    sinks=sinks,
+                    executor=executor,
+                    cancel=cancel,
+                    store=store,
+                    **kwargs,
+                )
+
+            # The datasets only submit their files to the shared pool and wait for them
+            with ThreadPoolExecutor(max_workers=len(self.jobs) or 1) as datasets:
+                futures = [datasets.submit(run, job) for job in self.jobs]
+                try:
+                    results = []
+                    for job, future in zip(self.jobs, futures):
+                        try:
+                            results.append(future.result())
+                        except Exception as e:
+                            logger = get_logger(__name__)
+                            logger.error(
+                                f"{method.capitalize()} of '{job['dataset'].url.geturl()}' failed: {e}"
+                            )
+                            results.append(None)
+                except BaseException:
+                    # Stop the files of all datasets, e.g. on KeyboardInterrupt
+                    cancel.set()
+                    raise
+
+        if displays:
+            self.summary(results, path, displays[0].console)
+        return results
+
+    def summary(self, results: list, path: str = "./data", console: Console = None):
+        """
+        Prints the outcome of every dataset and the combined outcome.
+
+        :param results: The outcomes returned by download.
+        :type results: list
+        :param path: The root path of jobs without own path. [Default: "./data"]
+        :type path: str
+        :param console: The console to print to. [Default: None]
+        :type console: Console
+        """
+        table = Table(title="Summary", title_justify="left")
+        table.add_column("Dataset", justify="left")
+        table.add_column("Path", justify="left")
+        table.add_column("Size", justify="right")
+        for outcome in DOWNLOAD_RESULTS:
+            table.add_column(outcome.capitalize(), justify="right")
+
+        totals = dict.fromkeys(DOWNLOAD_RESULTS, 0)
+        total_size = 0
+        for job, result in zip(self.jobs, results):
+            dataset = job["dataset"]
+            size = sum(f.get_filesize(False) for f in dataset.download_files)
+            name = dataset.title or dataset.persistent_id or dataset.url.geturl()
+            if result is None:
+                counts = ["[red]aborted[/red]"] + [""] * (len(DOWNLOAD_RESULTS) - 1)
+            else:
+                total_size += size
+                for outcome in DOWNLOAD_RESULTS:
+                    totals[outcome] += result[outcome]
+                counts = [str(result[outcome]) for outcome in DOWNLOAD_RESULTS]
+            table.add_row(
+                name,
+                str(self._job_path(job, path)),
+                humanize.naturalsize(size),
+                *counts,
+            )
+
+        table.add_section()
+        table.add_row(
+            f"[bold]Total ({len(self.jobs)} datasets)[/bold]",
+            "",
+            humanize.naturalsize(total_size),
+            *(str(totals[outcome]) for outcome in DOWNLOAD_RESULTS),
+        )
+        (console or Console()).print(table)
@@ -1,13 +1,382 @@
+import contextlib
+import email.utils
 import zipfile
 import validators
 import hashlib
 import humanize
+import mmap
 import requests
 import os
+import random
+import struct
+import queue
+import threading
+import time
+import urllib3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from urllib.parse import urlparse
 
 from .utils import get_logger
+from .ZipStreamExtractor import (
+    ZipStreamExtractor,
+    can_stream,
+    fetch_central_directory,
+    member_path,
+)
+
+MIN_SEGMENT_SIZE = 8 * 1024 * 1024  # Smallest byte range of a segmented download
+PART_SUFFIX = ".part"  # Suffix of incomplete downloads
+LENGTH_SUFFIX = ".len"  # Sidecar of a .part file that is larger than its written prefix
+HASH_CHUNK_SIZE = 1024 * 1024  # Read size when hashing a file from disk
+LOCAL_HEADER_SIZE = 30  # Fixed part of a ZIP local file header
+MIN_CHUNK_SIZE = 64 * 1024  # First read size of an adaptive download
+MAX_CHUNK_SIZE = 4 * 1024 * 1024  # Largest read size of an adaptive download
+CHUNK_READ_TIME = 0.05  # Adaptive reads grow or shrink towards this duration in seconds
+WRITE_BUFFER_SIZE = (
+    8 * 1024 * 1024
+)  # Smaller chunks are coalesced into writes of this size
+CHECKPOINT_SIZE = (
+    64 * 1024 * 1024
+)  # Bytes written between two updates of the length sidecar
+PROGRESS_INTERVAL = 0.2  # Minimal seconds between two progress yields
+RETRY_STATUSES = (429, 500, 502, 503, 504)  # Transient HTTP errors that are retried
+MAX_RETRY_DELAY = 300  # Longest wait before a retry in seconds, also caps Retry-After
+
+
+def _content_range(response) -> tuple:
+    """
+    Returns the first byte and total size of a partial response, if the server honored the range request.
+
+    :param response: The response of a range request.
+    :type response: requests.Response
+    :return: The first byte and complete size given in the Content-Range header or (None, None) for a full response.
+    :rtype: tuple
+    """
+    content_range = response.headers.get("Content-Range", "")
+    if response.status_code != 206 or "/" not in content_range:
+        return None, None
+    byte_range, total = content_range.rsplit("/", 1)
+    start = byte_range.replace("bytes", "").strip().split("-")[0]
+    if not start.isdigit() or not total.isdigit():
+        return None, None
+    return int(start), int(total)
+
+
+def _retry_delay(error: Exception, attempt: int, backoff: float = 1.0):
+    """
+    Returns the seconds to wait before retrying a failed request, or None if the error is not transient.
+
+    Dropped connections, timeouts and the statuses in RETRY_STATUSES are retried after a jittered
+    exponential backoff. A Retry-After header of a 429 or 503 response takes precedence.
+
+    :param error: The error of the request.
+    :type error: Exception
+    :param attempt: The number of retries so far.
+    :type attempt: int
+    :param backoff: The base delay in seconds, doubled with every retry. [Default: 1.0]
+    :type backoff: float
+    :return: The delay in seconds or None.
+    :rtype: float
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        if response is None or response.status_code not in RETRY_STATUSES:
+            return None
+        retry_after = response.headers.get("Retry-After", "").strip()
+        if response.status_code in (429, 503) and retry_after:
+            if retry_after.isdigit():
+                return min(float(retry_after), MAX_RETRY_DELAY)
+            try:
+                date = email.utils.parsedate_to_datetime(retry_after)
+                return min(max(0.0, date.timestamp() - time.time()), MAX_RETRY_DELAY)
+            except (TypeError, ValueError):
+                pass
+    elif not isinstance(
+        error,
+        (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+        ),
+    ):
+        return None
+
+    # Jitter spreads the retries of concurrent downloads hitting the same error
+    delay = min(backoff * 2**attempt, MAX_RETRY_DELAY)
+    return random.uniform(delay / 2, delay)
+
+
+def _read_chunks(response, chunk_size: int = None, buffer: bytearray = None):
+    """
+    Iterates over the body of a streamed response.
+
+    Without chunk_size, the read size adapts to the throughput: it doubles while a read takes less than
+    half of CHUNK_READ_TIME and halves if it takes more than twice as long, between MIN_CHUNK_SIZE and MAX_CHUNK_SIZE.
+    Fast links are read in few large chunks, slow links still report progress regularly.
+
+    With a buffer, the body is read into it (readinto) and the chunks are views of the buffer, which are only
+    valid until the next chunk. Content encoded responses (e.g. gzip) are decoded by iter_content instead.
+
+    :param response: The streamed response.
+    :type response: requests.Response
+    :param chunk_size: A fixed read size or None for adaptive reads. [Default: None]
+    :type chunk_size: int
+    :param buffer: The receive buffer reused for every chunk, limits the read size. [Default: None]
+    :type buffer: bytearray
+    :yields: The chunks of the body.
+    """
+    if buffer is not None and (
+        response.headers.get("Content-Encoding", "identity") != "identity"
+    ):
+        buffer = None
+    if chunk_size and buffer is None:
+        yield from response.iter_content(chunk_size=chunk_size)
+        return
+
+    view = memoryview(buffer) if buffer is not None else None
+    max_size = min(MAX_CHUNK_SIZE, len(buffer)) if view is not None else MAX_CHUNK_SIZE
+    size = min(chunk_size or MIN_CHUNK_SIZE, max_size)
+    while True:
+        start = time.monotonic()
+        if view is None:
+            # A new iterator per read, as iter_content fixes the size per iterator
+            chunk = next(response.iter_content(chunk_size=size), b"")
+        else:
+            # Errors of the raw stream are raised like iter_content does, so they are retried
+            try:
+                chunk = view[: response.raw.readinto(view[:size])]
+            except urllib3.exceptions.ProtocolError as e:
+                raise requests.exceptions.ChunkedEncodingError(e)
+            except urllib3.exceptions.DecodeError as e:
+                raise requests.exceptions.ContentDecodingError(e)
+            except urllib3.exceptions.ReadTimeoutError as e:
+                raise requests.exceptions.ConnectionError(e)
+            except urllib3.exceptions.SSLError as e:
+                raise requests.exceptions.SSLError(e)
+        elapsed = time.monotonic() - start
+        if not chunk:
+            return
+        yield chunk
+
+        if chunk_size:
+            continue
+        if len(chunk) == size and elapsed < CHUNK_READ_TIME / 2:
+            size = min(size * 2, max_size)
+        elif elapsed > CHUNK_READ_TIME * 2:
+            size = max(size // 2, MIN_CHUNK_SIZE)
+
+
+def _preallocate(f, offset: int, length: int):
+    """
+    Reserves the blocks of a file region upfront (posix_fallocate), so the filesystem can place it contiguously.
+    Silently skipped on platforms or filesystems without support.
+
+    :param f: The file opened for writing.
+    :param offset: The first byte of the region.
+    :type offset: int
+    :param length: The length of the region in bytes.
+    :type length: int
+    """
+    if length <= 0 or not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(f.fileno(), offset, length)
+    except OSError as e:
+        logger = get_logger(__name__)
+        logger.debug(f"Could not preallocate '{f.name}': {e}")
+
+
+def _length_path(part_path: Path) -> Path:
+    """Returns the sidecar of a .part file, which holds the length of its written prefix."""
+    return part_path.with_name(part_path.name + LENGTH_SUFFIX)
+
+
+def _write_length(part_path: Path, length: int):
+    """
+    Records the length of the written prefix of a .part file, before the file is extended beyond it.
+    The sidecar is replaced atomically, so a killed process leaves either the old or the new length.
+
+    :param part_path: The path of the partial file.
+    :type part_path: Path
+    :param length: The number of contiguous bytes from the start that are written.
+    :type length: int
+    """
+    sidecar = _length_path(part_path)
+    tmp_path = sidecar.with_name(sidecar.name + ".tmp")
+    tmp_path.write_text(str(length))
+    os.replace(tmp_path, sidecar)
+
+
+def _part_length(part_path: Path) -> int:
+    """
+    Returns the number of bytes of a .part file that can be resumed.
+    A preallocated or segmented .part file has its final size before it is written, its prefix is read from the sidecar.
+
+    :param part_path: The path of the partial file.
+    :type part_path: Path
+    :return: The length of the written prefix, 0 if there is no .part file.
+    :rtype: int
+    """
+    if not part_path.is_file():
+        return 0
+    size = part_path.stat().st_size
+    try:
+        return min(size, int(_length_path(part_path).read_text()))
+    except (OSError, ValueError):
+        return size
+
+
+def _resume_part(part_path: Path) -> int:
+    """
+    Prepares a .part file to be resumed, the bytes after its written prefix are dropped together with the sidecar.
+
+    :param part_path: The path of the partial file.
+    :type part_path: Path
+    :return: The length of the written prefix, 0 if there is no .part file.
+    :rtype: int
+    """
+    length = _part_length(part_path)
+    if part_path.is_file() and part_path.stat().st_size > length:
+        with open(part_path, "r+b") as f:
+            f.truncate(length)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(_length_path(part_path))
+    return length
+
+
+class _ProgressThrottle:
+    """Limits how often the downloaded bytes are yielded to the progress display."""
+
+    def __init__(self, interval: float = PROGRESS_INTERVAL):
+        """
+        Creates a throttle.
+
+        :param interval: The minimal seconds between two reports. [Default: PROGRESS_INTERVAL]
+        :type interval: float
+        """
+        self.interval = interval
+        self._last = None
+
+    def due(self) -> bool:
+        """
+        Checks if the progress should be reported now. The first call is always due.
+
+        :return: True if the last report is at least interval seconds ago.
+        :rtype: bool
+        """
+        now = time.monotonic()
+        if self._last is not None and now - self._last < self.interval:
+            return False
+        self._last = now
+        return True
+
+
+# Handle of the archive opened by each extraction worker (thread or process)
+_worker_archive = threading.local()
+
+
+def _open_worker_archive(zip_path: str):
+    """Opens the archive once per extraction worker."""
+    _worker_archive.handle = zipfile.ZipFile(zip_path, "r")
+
+
+def _extract_member(name: str, target_dir: str) -> int:
+    """
+    Extracts a single member with the handle of the current worker.
+
+    :param name: The name of the member.
+    :type name: str
+    :param target_dir: The directory the archive is extracted to.
+    :type target_dir: str
+    :return: The uncompressed size of the member.
+    :rtype: int
+    """
+    handle = _worker_archive.handle
+    handle.extract(name, target_dir)
+    return handle.getinfo(name).file_size
+
+
+def _hash_file(file_path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Computes the MD5 of a file from disk, read through a memory map without copying.
+    Defined on module level, so it runs in process pools.
+
+    :param file_path: The path of the file.
+    :type file_path: str
+    :param chunk_size: The number of bytes hashed at once. [Default: HASH_CHUNK_SIZE]
+    :type chunk_size: int
+    :return: The hex digest.
+    :rtype: str
+    """
+    m = hashlib.md5()
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            # Empty files can't be mapped
+            return m.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mapped) as view:
+                for start in range(0, size, chunk_size):
+                    m.update(view[start : start + chunk_size])
+    return m.hexdigest()
+
+
+class _StreamHasher:
+    """Computes the MD5 of a stream of chunks, optionally on a separate thread."""
+
+    def __init__(self, threaded: bool = False):
+        """
+        Creates a hasher.
+
+        :param threaded: Indicates if the chunks are hashed on a separate thread. [Default: False]
+        :type threaded: bool
+        """
+        self._md5 = hashlib.md5()
+        self._queue = None
+        self._thread = None
+
+        if threaded:
+            # Bounded, so a slow hasher applies back pressure instead of buffering the file
+            self._queue = queue.Queue(maxsize=16)
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Hashes queued chunks until None is received."""
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            self._md5.update(chunk)
+
+    def update(self, chunk: bytes):
+        """
+        Adds a chunk to the hash.
+
+        :param chunk: The next chunk of the stream.
+        :type chunk: bytes
+        """
+        if self._thread is None:
+            self._md5.update(chunk)
+        else:
+            # A view of a reused receive buffer changes before the thread hashes it
+            self._queue.put(bytes(chunk) if isinstance(chunk, memoryview) else chunk)
+
+    def hexdigest(self) -> str:
+        """
+        Returns the MD5 of all chunks, waiting for the hashing thread to finish.
+
+        :return: The hex digest.
+        :rtype: str
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        return self._md5.hexdigest()
 
 
 class DatasetFile:
@@ -43,6 +412,14 @@ class DatasetFile:
         )
         self.do_extract = self.friendly_type == "ZIP Archive"
         self.file_path = None  # Will be set if downloaded successfully
+        self._digest = None  # MD5 computed while downloading self.file_path
+        # Set if the archive was extracted while downloading, or only extracted and not written
+        self._stream_extracted = False
+        self._archive_discarded = False
+        self.skipped_bytes = 0  # Uncompressed bytes of members skipped by the filter
+        self.retries = 0  # Retries of the last download
+        self.ttfb = None  # Seconds until the first response headers of the last download arrived
+        self.from_store = False  # Linked from a content store by the last download
 
         self.parsed_server_url = urlparse(server_url)
         self._url = self.parsed_server_url._replace(
@@ -67,42 +444,387 @@ class DatasetFile:
         """
         return humanize.naturalsize(self.__filesize) if pretty else self.__filesize
 
-    def download(self, path="", header=None, chunk_size=8192) -> int:
+    def get_id(self) -> int:
+        """
+        Returns the Dataverse id of the file
+
+        :return: The id of the dataset file
+        :rtype: int
+        """
+        return self.__id
+
+    def get_checksum(self) -> str:
+        """
+        Returns the MD5 checksum of the file given by the metadata
+
+        :return: The checksum of the dataset file
+        :rtype: str
+        """
+        return self.__hash
+
+    def get_uncompressed_size(self, header=None, session=None, member_filter=None):
+        """
+        Returns the size of the members of the ZIP archive that are extracted, read from its remote central directory.
+
+        :param header: The header if needed for the web requests. [Default: None]
+        :type header: dict
+        :param session: The session used for the requests. [Default: None]
+        :type session: requests.Session
+        :param member_filter: Selects the members that are extracted. [Default: None]
+        :type member_filter: MemberFilter
+        :return: The uncompressed size in bytes or None, if the file is no ZIP archive or its central directory can't be read.
+        :rtype: int
+        """
+        if not self.do_extract:
+            return None
+        members = fetch_central_directory(
+            session if session is not None else requests, self._url, header
+        )
+        if members is None:
+            return None
+        infos = [info for info in members.values() if not info.is_dir()]
+        if member_filter:
+            infos, _ = member_filter.select(infos)
+        return sum(info.file_size for info in infos)
+
+    def member_names(self, path="", header=None, session=None) -> list:
+        """
+        Returns the names of the members of the ZIP archive, read from the local copy in path or from the remote central directory.
+
+        :param path: The root path of the dataset. [Default: ""]
+        :type path: str
+        :param header: The header if needed for the web requests. [Default: None]
+        :type header: dict
+        :param session: The session used for the requests. [Default: None]
+        :type session: requests.Session
+        :return: The names of the members or None, if the file is no ZIP archive or its central directory can't be read.
+        :rtype: list
+        """
+        if not self.do_extract:
+            return None
+        file_path = self.get_file_path(path)
+        if file_path.is_file():
+            try:
+                with zipfile.ZipFile(file_path, "r") as zip_ref:
+                    return zip_ref.namelist()
+            except (OSError, zipfile.BadZipFile):
+                return None
+        members = fetch_central_directory(
+            session if session is not None else requests, self._url, header
+        )
+        return list(members) if members is not None else None
+
+    def mark_downloaded(self, file_path: Path, digest: str = None):
+        """
+        Sets the file as downloaded by other means than download, e.g. unpacked from a bulk archive.
+
+        :param file_path: The path of the downloaded file.
+        :type file_path: Path
+        :param digest: The MD5 computed while writing the file, reused by validate. [Default: None]
+        :type digest: str
+        """
+        self.file_path = Path(file_path)
+        self._digest = digest
+        self._stream_extracted = False
+        self._archive_discarded = False
+
+    def has_digest(self) -> bool:
+        """
+        Indicates if the MD5 was computed while the file was received, so validate doesn't read it from disk.
+
+        :return: True if the digest is known.
+        :rtype: bool
+        """
+        return self._digest is not None
+
+    def get_file_path(self, path="") -> Path:
+        """
+        Returns the path the file is downloaded to, respecting its directory and original file name
+
+        :param path: The root path of the dataset
+        :type path: str
+        :return: The path of the downloaded file
+        :rtype: Path
+        """
+        name = self.name
+        if self.download_original and self.original_file_name:
+            name = self.original_file_name
+        return Path(path) / self.sub_dir / name
+
+    def download(
+        self,
+        path="",
+        header=None,
+        chunk_size=None,
+        segments=1,
+        hash_in_thread=False,
+        session=None,
+        stream_extract=False,
+        keep_archive=True,
+        member_filter=None,
+        preallocate=False,
+        limiter=None,
+        retries=0,
+        backoff=1.0,
+        store=None,
+    ) -> int:
         """
         Downloads the file based on self._url and saves it to path/self.filename
         Credits: https://stackoverflow.com/questions/37573483/progress-bar-while-download-file-over-http-with-requests
 
+        The data is written to path/self.filename.part, which is renamed once the download is complete.
+        If a .part file of an interrupted download exists, the download continues from its length.
+
         :param path: The path to save the file
         :type path: str
         :param header: The header if needed for the web requests [Default: None]
         :type header: dict
-        :param chunk_size: The size to iterate over the response [Default: 1024]
+        :param chunk_size: The size to iterate over the response. If None, the size adapts to the throughput. [Default: None]
         :type chunk_size: int
-        :yields: The downloaded bytes so far.
+        :param segments: The number of byte ranges that are downloaded concurrently. Falls back to a single stream if the server does not honor range requests. [Default: 1]
+        :type segments: int
+        :param hash_in_thread: Indicates if the MD5 of a single stream is computed on a separate thread instead of between the reads. [Default: False]
+        :type hash_in_thread: bool
+        :param session: The session used for the requests, keeping connections alive between files. If None, a new connection is opened per request. [Default: None]
+        :type session: requests.Session
+        :param stream_extract: Indicates if a ZIP archive is extracted while it is downloaded, see ZipStreamExtractor. Forces a single stream. [Default: False]
+        :type stream_extract: bool
+        :param keep_archive: Indicates if the archive is written to disk while it is stream extracted. If False, it can't be resumed. It is still written, if the central directory can't be read upfront. [Default: True]
+        :type keep_archive: bool
+        :param member_filter: Selects the members that are stream extracted. [Default: None]
+        :type member_filter: MemberFilter
+        :param preallocate: Indicates if the file is allocated with its final size before writing and the data is received into a reused buffer. [Default: False]
+        :type preallocate: bool
+        :param limiter: Limits the throughput, shared with other downloads. [Default: None]
+        :type limiter: BandwidthLimiter
+        :param retries: The number of retries after a dropped connection, timeout or transient HTTP error (429, 5xx). A retry resumes from the received bytes. [Default: 0]
+        :type retries: int
+        :param backoff: The delay before the first retry in seconds, doubled with every retry and jittered. A Retry-After header of a 429 or 503 response is honored instead. [Default: 1.0]
+        :type backoff: float
+        :param store: A content store, if it has the checksum of the file, the file is linked to it instead of being downloaded. [Default: None]
+        :type store: ContentStore
+        :yields: The downloaded bytes so far, starting with the size of a resumed .part file. A retry starts again at the resumed size.
         """
         # Check for original file
-        name = self.name
         url = self._url
+        http = session if session is not None else requests
 
         if self.download_original:
             url = urlparse(self._url)._replace(query="format=original").geturl()
-            name = self.original_file_name if self.original_file_name else self.name
+
+        # Segments smaller than MIN_SEGMENT_SIZE are not worth an extra connection
+        segments = max(1, min(segments, self.__filesize // MIN_SEGMENT_SIZE))
+        segment_size = -(-self.__filesize // segments)
 
         try:
-            dir = Path(path) / self.sub_dir
+            file_path = self.get_file_path(path)
+            dir = file_path.parent
             dir.mkdir(parents=True, exist_ok=True)
 
-            file_path = dir / name
+            part_path = file_path.with_name(file_path.name + PART_SUFFIX)
             self.file_path = file_path
+            self._digest = None
+            self._stream_extracted = False
+            self._archive_discarded = False
+            self.retries = 0
+            self.ttfb = None
+            self.from_store = False
+
+            if store is not None and store.materialize(self.__hash, file_path):
+                # The content is already in the store, e.g. from another dataset or path
+                self.from_store = True
+                self._digest = self.__hash
+                if part_path.is_file():
+                    os.remove(part_path)
+                yield (self.__filesize)
+                return
+
+            # A failed attempt leaves the received prefix in the .part file, a retry resumes from there
+            attempt = 0
+            while True:
+                try:
+                    extractor = None
+                    write_archive = True
+                    if (
+                        stream_extract
+                        and self.do_extract
+                        and file_path.suffix == ".zip"
+                    ):
+                        members = fetch_central_directory(http, url, header)
+                        if members is not None and not can_stream(members):
+                            logger = get_logger(__name__)
+                            logger.info(
+                                f"'{self.name}' has members that can't be extracted while downloading, it is extracted after the download."
+                            )
+                        else:
+                            # Members arrive in file order only with a single stream
+                            segments = 1
+                            # Without the central directory the extraction may still fail, the archive is written as fallback
+                            write_archive = keep_archive or members is None
+                            if not write_archive and part_path.is_file():
+                                os.remove(part_path)
+                            extractor = ZipStreamExtractor(dir, members, member_filter)
+
+                    # Continue an interrupted download. With segments, the first range doubles as probe whether ranges are honored
+                    offset = _resume_part(part_path)
+                    if self.__filesize and offset >= self.__filesize:
+                        # A complete .part file, e.g. interrupted before the rename. A range beyond its end gets a 416
+                        digest = _hash_file(part_path)
+                        if digest == self.__hash:
+                            self._digest = digest
+                            yield (offset)
+                            break
+                        os.remove(part_path)
+                        offset = 0
+                    request_header = dict(header) if header else {}
+                    if segments > 1:
+                        request_header["Range"] = (
+                            f"bytes={offset}-{offset + segment_size - 1}"
+                        )
+                    elif offset:
+                        request_header["Range"] = f"bytes={offset}-"
+
+                    response = http.get(url, headers=request_header, stream=True)
+                    start, total = _content_range(response)
+                    if response.status_code == 416 or (
+                        response.status_code == 206 and start != offset
+                    ):
+                        # The partial file doesn't match the file on the server, start over with a single stream
+                        response.close()
+                        offset = 0
+                        response = http.get(url, headers=header, stream=True)
+                        start, total = _content_range(response)
+
+                    with response as r:
+                        if self.ttfb is None and r.elapsed is not None:
+                            # Connect and time to first byte, measured by requests
+                            self.ttfb = r.elapsed.total_seconds()
+                        r.raise_for_status()
+                        if r.status_code != 206:
+                            # Range ignored, the response contains the whole file
+                            offset = 0
 
-            downloaded = 0
-            with requests.get(url, headers=header, stream=True) as r:
-                r.raise_for_status()
-                with open(file_path, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=chunk_size):
-                        downloaded += len(chunk)
-                        yield (downloaded)
-                        f.write(chunk)
+                        if segments > 1 and total is not None:
+                            yield from self._download_segments(
+                                http,
+                                r,
+                                url,
+                                part_path,
+                                header,
+                                offset,
+                                segment_size,
+                                total,
+                                chunk_size,
+                                preallocate,
+                                limiter,
+                            )
+                        else:
+                            # Hash the chunks as they arrive, a resumed prefix is read once from disk
+                            hasher = _StreamHasher(threaded=hash_in_thread)
+                            extracted = False
+                            try:
+                                if offset:
+                                    with open(part_path, "rb") as f:
+                                        for chunk in iter(
+                                            lambda: f.read(HASH_CHUNK_SIZE), b""
+                                        ):
+                                            hasher.update(chunk)
+                                            if extractor is not None:
+                                                extractor.feed(chunk)
+
+                                downloaded = offset
+                                reported = None
+                                throttle = _ProgressThrottle()
+                                buffer = (
+                                    bytearray(chunk_size or MAX_CHUNK_SIZE)
+                                    if preallocate
+                                    else None
+                                )
+                                with (
+                                    self._open_part(part_path, offset, preallocate)
+                                    if write_archive
+                                    else contextlib.nullcontext()
+                                ) as f:
+                                    try:
+                                        if offset:
+                                            throttle.due()
+                                            reported = downloaded
+                                            yield (downloaded)
+                                        checkpoint = downloaded
+                                        for chunk in _read_chunks(
+                                            r, chunk_size, buffer
+                                        ):
+                                            if limiter is not None:
+                                                limiter.consume(len(chunk))
+                                            downloaded += len(chunk)
+                                            if throttle.due():
+                                                reported = downloaded
+                                                yield (downloaded)
+                                            if f is not None:
+                                                f.write(chunk)
+                                                if (
+                                                    preallocate
+                                                    and downloaded - checkpoint
+                                                    >= CHECKPOINT_SIZE
+                                                ):
+                                                    # The flushed prefix is resumed after a killed process
+                                                    f.flush()
+                                                    _write_length(part_path, downloaded)
+                                                    checkpoint = downloaded
+                                            hasher.update(chunk)
+                                            if extractor is not None:
+                                                extractor.feed(chunk)
+                                        if reported != downloaded:
+                                            yield (downloaded)
+                                    finally:
+                                        if preallocate and f is not None:
+                                            # Drop the space after the written bytes, a rerun resumes from there
+                                            f.truncate()
+                                            os.remove(_length_path(part_path))
+                            finally:
+                                digest = hasher.hexdigest()
+                                if extractor is not None:
+                                    # Removes a partially extracted member of an interrupted download
+                                    extracted = extractor.close()
+                            self._digest = digest
+
+                            if extracted and digest != self.__hash:
+                                # Members of a corrupt archive are not kept, even with a valid CRC
+                                for extracted_path in extractor.extracted:
+                                    os.remove(extracted_path)
+                                extracted = False
+                            self._stream_extracted = extracted
+                            self.skipped_bytes = (
+                                extractor.skipped_bytes if extracted else 0
+                            )
+                    break
+                except requests.exceptions.RequestException as e:
+                    delay = _retry_delay(e, attempt, backoff)
+                    if delay is None or attempt >= retries:
+                        raise
+                    attempt += 1
+                    self.retries = attempt
+                    logger = get_logger(__name__)
+                    logger.warning(
+                        f"Retrying '{self.name}' in {delay:.1f} s ({attempt}/{retries}): {e}"
+                    )
+                    time.sleep(delay)
+
+            if extractor is not None and write_archive and not self._stream_extracted:
+                logger = get_logger(__name__)
+                logger.info(
+                    f"'{self.name}' could not be extracted while downloading, it is extracted after the download."
+                )
+            if not write_archive:
+                self._archive_discarded = True
+                if not self._stream_extracted:
+                    logger = get_logger(__name__)
+                    logger.error(
+                        f"'{self.name}' could not be extracted while downloading and was not kept."
+                    )
+                return
+
+            os.replace(part_path, file_path)
         except FileExistsError as fe:
             logger = get_logger(__name__)
             logger.error(
@@ -122,13 +844,192 @@ class DatasetFile:
             logger = get_logger(__name__)
             logger.error(f"An unexpected error occurred: {e}")
 
-    def validate(self, chunk_size=8192) -> bool:
+    def _open_part(self, part_path: Path, offset: int, preallocate: bool = False):
+        """
+        Opens the .part file for writing at offset.
+
+        :param part_path: The path of the partial file.
+        :type part_path: Path
+        :param offset: The number of bytes that are already downloaded.
+        :type offset: int
+        :param preallocate: Indicates if the remaining size of the file is allocated upfront. The file then has its final size until it is truncated, the length of its written prefix is kept in a sidecar. [Default: False]
+        :type preallocate: bool
+        :return: The file object, positioned at offset.
+        """
+        if not preallocate:
+            return open(
+                part_path, "ab" if offset else "wb", buffering=WRITE_BUFFER_SIZE
+            )
+
+        f = open(part_path, "r+b" if offset else "wb", buffering=WRITE_BUFFER_SIZE)
+        f.seek(offset)
+        # The file is extended beyond its written bytes, the sidecar keeps their length
+        _write_length(part_path, offset)
+        _preallocate(f, offset, self.__filesize - offset)
+        return f
+
+    def _download_segments(
+        self,
+        http,
+        first_response,
+        url,
+        part_path,
+        header,
+        offset,
+        segment_size,
+        total,
+        chunk_size,
+        preallocate=False,
+        limiter=None,
+    ):
+        """
+        Downloads the file as concurrent byte ranges, each written at its offset in part_path.
+        If a range fails, part_path is truncated to the completely downloaded prefix, so it can be resumed.
+        While the ranges are written, the length of the flushed prefix is kept in a sidecar, so a killed process resumes from it.
+        As the ranges arrive out of order, no MD5 is computed while downloading.
+
+        :param http: The session or requests module used for the requests.
+        :param first_response: The already opened response of the first range.
+        :type first_response: requests.Response
+        :param url: The url to download the ranges from.
+        :type url: str
+        :param part_path: The path of the partial target file.
+        :type part_path: Path
+        :param header: The header if needed for the web requests.
+        :type header: dict
+        :param offset: The number of bytes that are already downloaded.
+        :type offset: int
+        :param segment_size: The size of a single range in bytes.
+        :type segment_size: int
+        :param total: The size of the file as reported by the server.
+        :type total: int
+        :param chunk_size: The size to iterate over the responses or None for adaptive reads.
+        :type chunk_size: int
+        :param preallocate: Indicates if the blocks of the file are allocated upfront and each range is received into a reused buffer. [Default: False]
+        :type preallocate: bool
+        :param limiter: Limits the combined throughput of the ranges. [Default: None]
+        :type limiter: BandwidthLimiter
+        :yields: The downloaded bytes so far.
+
+        :raise requests.exceptions.HTTPError: If a range could not be downloaded.
+        """
+        ranges = [
+            (start, min(start + segment_size, total) - 1)
+            for start in range(offset, total, segment_size)
+        ]
+        written = [0] * len(ranges)
+        flushed = [0] * len(ranges)
+
+        def prefix(sizes) -> int:
+            """Returns the length of the contiguous prefix of the ranges with the given sizes."""
+            complete = offset
+            for (start, end), size in zip(ranges, sizes):
+                complete = start + size
+                if complete <= end:
+                    break
+            return complete
+
+        # Allocate the file, so every segment can be written at its offset
+        with open(part_path, "r+b" if offset else "wb") as f:
+            _write_length(part_path, offset)
+            f.truncate(total)
+            if preallocate:
+                _preallocate(f, offset, total - offset)
+
+        progress = queue.Queue()
+        errors = []
+        stop = threading.Event()
+
+        def fetch(index, response=None):
+            start, end = ranges[index]
+            try:
+                if response is None:
+                    request_header = dict(header) if header else {}
+                    request_header["Range"] = f"bytes={start}-{end}"
+                    response = http.get(url, headers=request_header, stream=True)
+                with response as r:
+                    r.raise_for_status()
+                    if r.status_code != 206:
+                        raise requests.exceptions.HTTPError(
+                            f"Server did not honor range bytes={start}-{end}"
+                        )
+                    buffer = (
+                        bytearray(chunk_size or MAX_CHUNK_SIZE) if preallocate else None
+                    )
+                    with open(part_path, "r+b", buffering=WRITE_BUFFER_SIZE) as f:
+                        f.seek(start)
+                        for chunk in _read_chunks(r, chunk_size, buffer):
+                            if limiter is not None:
+                                limiter.consume(len(chunk))
+                            if stop.is_set():
+                                return
+                            f.write(chunk)
+                            written[index] += len(chunk)
+                            if written[index] - flushed[index] >= CHECKPOINT_SIZE:
+                                f.flush()
+                                flushed[index] = written[index]
+                            progress.put(len(chunk))
+                    flushed[index] = written[index]
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+
+        workers = [threading.Thread(target=fetch, args=(0, first_response))]
+        workers += [
+            threading.Thread(target=fetch, args=(i,)) for i in range(1, len(ranges))
+        ]
+        for worker in workers:
+            worker.start()
+
+        downloaded = offset
+        reported = None
+        checkpoint = offset
+        throttle = _ProgressThrottle()
+        try:
+            if offset:
+                throttle.due()
+                reported = downloaded
+                yield (downloaded)
+            while any(worker.is_alive() for worker in workers) or not progress.empty():
+                try:
+                    downloaded += progress.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if throttle.due():
+                    reported = downloaded
+                    yield (downloaded)
+                    if prefix(flushed) - checkpoint >= CHECKPOINT_SIZE:
+                        # The flushed prefix is resumed after a killed process
+                        checkpoint = prefix(flushed)
+                        _write_length(part_path, checkpoint)
+            if reported != downloaded:
+                yield (downloaded)
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+            # Keep only the contiguous prefix, a rerun continues from its length
+            complete = prefix(written)
+            if complete < total:
+                with open(part_path, "r+b") as f:
+                    f.truncate(complete)
+            os.remove(_length_path(part_path))
+
+        if errors:
+            raise errors[0]
+
+    def validate(self, chunk_size=HASH_CHUNK_SIZE, use_digest=True) -> bool:
         """
         Validates a file against an MD5 hash value
         Credits: https://gist.github.com/mjohnsullivan/9322154
 
+        Reuses the MD5 computed while downloading. Only files that were not downloaded by this instance are read from disk.
+
         :param file_path: path to the file for hash validation
         :type file_path: string
+        :param use_digest: Indicates if the MD5 computed while downloading is reused. [Default: True]
+        :type use_digest: bool
         :return: True if the hashes are the same, False otherwise or the file not exists.
         :rtype: bool
         """
@@ -136,20 +1037,23 @@ class DatasetFile:
         if not self.file_path or not self.__hash:
             return False
 
-        m = hashlib.md5()
-        with open(self.file_path, "rb") as f:
-            while True:
-                chunk = f.read(chunk_size)
-                if not chunk:
-                    break
-                m.update(chunk)
+        # An archive that was only stream extracted is validated by its digest
+        if use_digest and self._digest is not None:
+            return self._digest == self.__hash
+
+        if not os.path.isfile(self.file_path):
+            return False
 
-        return m.hexdigest() == self.__hash
+        return _hash_file(self.file_path, chunk_size) == self.__hash
 
     def remove(self):
         """
         Removes the downloaded file.
         """
+        if self._archive_discarded:
+            # Never written to disk
+            return True
+
         removed_successfully = False
         if self.file_path and os.path.isfile(self.file_path):
             try:
@@ -161,18 +1065,224 @@ class DatasetFile:
                 removed_successfully = True
         return removed_successfully
 
-    def process(self):
-        """post process the file."""
+    def process(
+        self,
+        workers=1,
+        executor="thread",
+        progress=None,
+        member_filter=None,
+        virtual=False,
+    ):
+        """
+        post process the file.
+
+        Zip archives can be extracted by a pool of workers, each with its own handle of the archive.
+        Decompression releases the GIL, so threads scale as well unless the members are very small.
+        In virtual mode nothing is extracted, the members are read in place with open_member and member_buffer.
+
+        :param workers: The number of members extracted concurrently. [Default: 1]
+        :type workers: int
+        :param executor: The pool of the workers, "thread" or "process". [Default: "thread"]
+        :type executor: str
+        :param progress: Called with the extracted and total uncompressed bytes after each member. [Default: None]
+        :type progress: callable
+        :param member_filter: Selects the extracted members, the size of the others is stored in skipped_bytes. [Default: None]
+        :type member_filter: MemberFilter
+        :param virtual: Indicates if the archive is kept for reading in place instead of being extracted. Only checks it can be read. [Default: False]
+        :type virtual: bool
+        :return: True if the file was processed successfully.
+        :rtype: bool
+
+        :raise ValueError: If workers is smaller than 1 or the executor is unknown.
+        """
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}.")
+        if executor not in ("thread", "process"):
+            raise ValueError(
+                f"executor must be 'thread' or 'process', got {executor!r}."
+            )
+
+        if self._stream_extracted:
+            # Already extracted while downloading
+            self._log_skipped()
+            return True
+        if self._archive_discarded:
+            return False
+
         processed_successfully = True
 
         if self.file_path and os.path.isfile(self.file_path):
             # process zip files
-            if self.file_path.suffix == ".zip":
+            if self.file_path.suffix == ".zip" and virtual:
+                if not zipfile.is_zipfile(self.file_path):
+                    logger = get_logger(__name__)
+                    logger.error(f"Can't read {self.file_path} as ZIP archive.")
+                    processed_successfully = False
+            elif self.file_path.suffix == ".zip":
                 try:
-                    with zipfile.ZipFile(self.file_path, "r") as zip_ref:
-                        zip_ref.extractall(self.file_path.parent)
+                    self.skipped_bytes = 0
+                    if workers == 1 and progress is None and not member_filter:
+                        with zipfile.ZipFile(self.file_path, "r") as zip_ref:
+                            zip_ref.extractall(self.file_path.parent)
+                    else:
+                        self._extract_parallel(
+                            workers, executor, progress, member_filter
+                        )
+                        self._log_skipped()
                 except Exception as e:
                     logger = get_logger(__name__)
                     logger.error(f"Error while trying to extract {self.file_path}: {e}")
                     processed_successfully = False
         return processed_successfully
+
+    def _archive_path(self, path=None) -> Path:
+        """
+        Returns the path of the downloaded archive.
+
+        :param path: The root path of the dataset, if the file was not downloaded by this instance. [Default: None]
+        :type path: str
+        :return: The path of the archive.
+        :rtype: Path
+
+        :raise FileNotFoundError: If the archive does not exist.
+        """
+        file_path = self.get_file_path(path) if path is not None else self.file_path
+        if not file_path or not os.path.isfile(file_path):
+            raise FileNotFoundError(f"The archive of '{self.name}' is not downloaded.")
+        return Path(file_path)
+
+    def list_members(self, path=None) -> list:
+        """
+        Lists the members of the downloaded ZIP archive without extracting it.
+
+        :param path: The root path of the dataset, if the file was not downloaded by this instance. [Default: None]
+        :type path: str
+        :return: The ZipInfo of every member, with its filename, file_size and compress_type.
+        :rtype: list
+
+        :raise FileNotFoundError: If the archive does not exist.
+        """
+        with zipfile.ZipFile(self._archive_path(path), "r") as zip_ref:
+            return zip_ref.infolist()
+
+    def open_member(self, name: str, path=None):
+        """
+        Opens a member of the downloaded ZIP archive for reading, decompressing it on the fly.
+
+        :param name: The name of the member.
+        :type name: str
+        :param path: The root path of the dataset, if the file was not downloaded by this instance. [Default: None]
+        :type path: str
+        :return: A binary file object of the member, close it after reading.
+        :rtype: zipfile.ZipExtFile
+
+        :raise FileNotFoundError: If the archive does not exist.
+        :raise KeyError: If the archive has no member name.
+        """
+        # The member keeps the archive open until it is closed itself
+        with zipfile.ZipFile(self._archive_path(path), "r") as zip_ref:
+            return zip_ref.open(name)
+
+    def member_buffer(self, name: str, path=None) -> memoryview:
+        """
+        Returns a stored (uncompressed) member of the downloaded ZIP archive as memory mapped buffer, without copying it.
+
+        :param name: The name of the member.
+        :type name: str
+        :param path: The root path of the dataset, if the file was not downloaded by this instance. [Default: None]
+        :type path: str
+        :return: A read only view of the member data in the archive.
+        :rtype: memoryview
+
+        :raise FileNotFoundError: If the archive does not exist.
+        :raise KeyError: If the archive has no member name.
+        :raise ValueError: If the member is compressed or encrypted, use open_member instead.
+        """
+        archive_path = self._archive_path(path)
+        with zipfile.ZipFile(archive_path, "r") as zip_ref:
+            info = zip_ref.getinfo(name)
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+            raise ValueError(
+                f"Member '{name}' is compressed or encrypted, use open_member instead."
+            )
+        if info.file_size == 0:
+            return memoryview(b"")
+
+        with open(archive_path, "rb") as f:
+            # The data follows the local header, whose extra field may differ from the central directory
+            f.seek(info.header_offset)
+            header = f.read(LOCAL_HEADER_SIZE)
+            name_length, extra_length = struct.unpack("<2H", header[26:30])
+            start = info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length
+            # The map stays valid after the file is closed, as long as the view exists
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped)[start : start + info.file_size]
+
+    def _log_skipped(self):
+        """Reports the size of the members skipped by the member filter."""
+        if self.skipped_bytes:
+            logger = get_logger(__name__)
+            logger.info(
+                f"Skipped {humanize.naturalsize(self.skipped_bytes)} of '{self.name}' not matching the member filter."
+            )
+
+    def _extract_parallel(
+        self, workers: int, executor: str, progress=None, member_filter=None
+    ):
+        """
+        Extracts the archive member by member on a pool of workers.
+
+        :param workers: The number of members extracted concurrently.
+        :type workers: int
+        :param executor: The pool of the workers, "thread" or "process".
+        :type executor: str
+        :param progress: Called with the extracted and total uncompressed bytes after each member. [Default: None]
+        :type progress: callable
+        :param member_filter: Selects the extracted members. [Default: None]
+        :type member_filter: MemberFilter
+
+        :raise Exception: The first error of a worker.
+        """
+        target_dir = self.file_path.parent
+        with zipfile.ZipFile(self.file_path, "r") as zip_ref:
+            members = zip_ref.infolist()
+
+        if member_filter:
+            # Only the selected members are read, skipped ones are never decompressed
+            members, self.skipped_bytes = member_filter.select(members)
+
+        # Workers extract concurrently into shared directories, create them upfront
+        for info in members:
+            path = member_path(target_dir, info.filename)
+            (path if info.is_dir() else path.parent).mkdir(parents=True, exist_ok=True)
+
+        # Largest first, so a huge member doesn't finish last on a single worker
+        files = sorted(
+            (info for info in members if not info.is_dir()),
+            key=lambda info: info.file_size,
+            reverse=True,
+        )
+        total = sum(info.file_size for info in files)
+        extracted = 0
+        if progress is not None:
+            progress(extracted, total)
+
+        pool_class = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+        with pool_class(
+            max_workers=workers,
+            initializer=_open_worker_archive,
+            initargs=(str(self.file_path),),
+        ) as pool:
+            futures = [
+                pool.submit(_extract_member, info.filename, str(target_dir))
+                for info in files
+            ]
+            try:
+                for future in as_completed(futures):
+                    extracted += future.result()
+                    if progress is not None:
+                        progress(extracted, total)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
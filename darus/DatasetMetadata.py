@@ -0,0 +1,198 @@
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+
+from rich.console import Console
+from rich.table import Table
+
+from .DatasetFile import DatasetFile
+from .MetadataCache import MetadataCache
+from .utils import get_logger
+
+
+class DatasetMetadata:
+    """
+    The dataset information shared by Dataset and AsyncDataset: the api urls, the parsing of the
+    dataset api response and the metadata cache lookup. The subclasses fetch the response with their client.
+
+    Subclasses set url, cache, offline and _request_header before calling _init_metadata.
+    """
+
+    file_class = DatasetFile  # Class the file metadata is parsed into
+
+    def _init_metadata(self, url: str, version: str = None):
+        """
+        Derives the api urls from the dataset url and resets the dataset information.
+
+        :param url: The url of the dataset.
+        :type url: str
+        :param version: The requested version of the dataset or None for the latest. [Default: None]
+        :type version: str
+        """
+        self.url = urlparse(url)
+        self.requested_version = str(version) if version is not None else None
+
+        self.server_url = self.url._replace(
+            path="", params="", query="", fragment=""
+        ).geturl()
+
+        self.dataset_url = self.url._replace(
+            path=(
+                f"/api/datasets/:persistentId/versions/{self.requested_version}"
+                if self.requested_version
+                else "/api/datasets/:persistentId/"
+            )
+        ).geturl()
+
+        self.persistent_id = None
+        self.version_state = None
+        self.version = None
+        self.last_update_time = None
+        self.create_time = None
+        self.license_name = None
+        self.title = None
+        self.authors = []
+        self.download_files = []
+
+    def _prepare_metadata_request(self) -> tuple:
+        """
+        Looks up the dataset in the metadata cache.
+
+        :return: The cache key, the cache entry (or None) and the headers of the request revalidating it.
+        :rtype: tuple
+        """
+        persistent_id = parse_qs(self.url.query).get("persistentId", [self.url.path])[0]
+        key = MetadataCache.key(
+            self.server_url, persistent_id, self.requested_version or ":latest"
+        )
+        entry = self.cache.load(key) if self.cache is not None else None
+
+        headers = dict(self._request_header) if self._request_header else {}
+        headers.update(MetadataCache.conditional_headers(entry))
+        return key, entry, headers
+
+    def _parse_offline_information(self, entry: dict):
+        """
+        Sets the dataset information from the metadata cache only.
+
+        :param entry: The cache entry of the dataset or None.
+        :type entry: dict
+        """
+        if entry is None:
+            logger = get_logger(__name__)
+            logger.error(
+                f"Dataset '{self.url.geturl()}' is not in the metadata cache '{self.cache.cache_dir}', it can't be loaded offline."
+            )
+            self.download_files = []
+            return
+        self._parse_dataset_information(entry["response"])
+
+    def _parse_dataset_information(self, response: dict):
+        """
+        Sets the dataset information and files from the json response of the dataset api.
+
+        :param response: The parsed json response.
+        :type response: dict
+
+        :raise KeyError: If a required key is not in the response.
+        """
+        # The versions api returns the version itself, the dataset api its latest version
+        dataset_info = response["data"].get("latestVersion", response["data"])
+
+        for field in dataset_info["metadataBlocks"]["citation"]["fields"]:
+            if field["typeName"] == "title":
+                self.title = field["value"]
+            elif field["typeName"] == "author":
+                self.authors = [f["authorName"]["value"] for f in field["value"]]
+
+        self.persistent_id = dataset_info["datasetPersistentId"]
+        self.version_state = dataset_info["versionState"]
+        self.version = (
+            f"{dataset_info['versionNumber']}.{dataset_info['versionMinorNumber']}"
+            if "versionNumber" in dataset_info
+            else self.version_state
+        )
+        self.last_update_time = dataset_info["lastUpdateTime"]
+        self.create_time = dataset_info["createTime"]
+        self.license_name = dataset_info["license"]["name"]
+
+        files_info = dataset_info["files"]
+        self.download_files = [
+            self.file_class(file_info, self.server_url) for file_info in files_info
+        ]
+
+    def _select_files(self, files: list) -> list:
+        """
+        Returns the dataset files with the given names, logging names that are not in the dataset.
+
+        :param files: The names of the files. If the list is empty, all files are returned.
+        :type files: list
+        :return: The selected dataset files.
+        :rtype: list
+        """
+        if not files:
+            return list(self.download_files)
+
+        available_files = {f.name for f in self.download_files}
+        missing_files = set(files) - available_files
+
+        if missing_files:
+            logger = get_logger(__name__)
+            missing_list = ", ".join(sorted(missing_files))
+            logger.error(f"Requested files not found in dataset: {missing_list}")
+            logger.info(f"Available files: {', '.join(sorted(available_files))}")
+
+        return [f for f in self.download_files if f.name in files]
+
+    def summary(self):
+        """Gives an Overview of the dataset retrieved information"""
+        console = Console()
+
+        # Create a table to display the information
+        table = Table(title="Dataset Summary", title_justify="left")
+
+        table.add_column("Property")
+        table.add_column("Value")
+
+        # Add rows with rich formatting
+        table.add_row("URL", str(self.url.geturl()))
+        table.add_row("Title", self.title)
+
+        if len(self.authors) > 0:
+            table.add_row("Authors", "; ".join(self.authors))
+
+        table.add_row("Persistent ID", str(self.persistent_id))
+        table.add_row("Version", str(self.version))
+        table.add_row("Last Update", self.format_datetime(self.last_update_time))
+        table.add_row("License", self.license_name)
+
+        # Display the table
+        console.print(table)
+
+        # Create a table to display the information
+        table = Table(title="Files in Dataset", title_justify="left")
+
+        table.add_column("Name", justify="left")
+        table.add_column("Size", justify="left")
+        table.add_column("Original Available", justify="left")
+        table.add_column("Description", justify="left")
+
+        for file in self.download_files:
+            table.add_row(
+                file.name,
+                file.get_filesize(),
+                (
+                    f"[green]✓({file.original_file_name})[/green]"
+                    if file.original_file_name
+                    else ""
+                ),
+                file.description,
+            )
+
+        # Display the table
+        console.print(table)
+
+    def format_datetime(self, timestamp):
+        """Formats the datetime for display"""
+        return (
+            str(datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ")) if timestamp else ""
+        )
@@ -0,0 +1,58 @@
+import time
+
+
+class DownloadEvent:
+    """A step in the download of a dataset file, e.g. its progress or the result of the validation."""
+
+    STARTED = "started"
+    # Downloaded bytes, or extracted bytes with message "extracting"
+    PROGRESS = "progress"
+    # The file enters a stage named by message, e.g. "validating" or "removing"
+    STAGE = "stage"
+    SKIPPED = "skipped"
+    VERIFIED = "verified"
+    PROCESSED = "processed"  # Verified and extracted
+    FAILED = "failed"
+    INTERRUPTED = "interrupted"
+    BULK = "bulk"  # Progress of a bulk request of several small files, without file
+    BULK_FINISHED = "bulk_finished"
+
+    def __init__(
+        self,
+        kind: str,
+        file,
+        completed: int = 0,
+        total: int = 0,
+        message: str = "",
+        dataset: str = None,
+    ):
+        """
+        Creates a download event.
+
+        :param kind: The kind of the event, one of the class constants (e.g. DownloadEvent.PROGRESS).
+        :type kind: str
+        :param file: The dataset file the event belongs to, None for a bulk request.
+        :type file: DatasetFile
+        :param completed: The bytes downloaded so far. [Default: 0]
+        :type completed: int
+        :param total: The expected size of the file in bytes. [Default: 0]
+        :type total: int
+        :param message: A description, e.g. the reason of a failure. [Default: ""]
+        :type message: str
+        :param dataset: The persistent id of the dataset. [Default: None]
+        :type dataset: str
+        """
+        self.kind = kind
+        self.file = file
+        self.completed = completed
+        self.total = total
+        self.message = message
+        self.dataset = dataset
+        self.time = time.time()
+
+    def __repr__(self) -> str:
+        """Overrides implementation of repr"""
+        return (
+            f"DownloadEvent({self.kind!r}, {self.file.name if self.file else None!r}, "
+            f"completed={self.completed}, total={self.total}, message={self.message!r})"
+        )
@@ -0,0 +1,382 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+DOWNLOAD_RESULTS = ("done", "skipped", "failed", "interrupted")  # Outcomes of a file
+STAGES = ("connect", "transfer", "hash", "extract", "remove")  # Timed steps of a file
+
+
+class FileReport:
+    def __init__(self, f, origin: float):
+        """
+        The timings and the outcome of a single file of a download.
+
+        Every stage is stored as start and end in seconds since the start of the download.
+        "connect" is the time until the first response headers arrived (time to first byte),
+        "transfer" the rest of the download including retries and the MD5 computed while receiving,
+        "hash" reading the file from disk to validate it, if its MD5 was not computed while receiving.
+        Files received by a bulk request have no throughput, the request is shared by all its files.
+
+        :param f: The dataset file.
+        :type f: DatasetFile
+        :param origin: The start of the download, as time.monotonic().
+        :type origin: float
+        """
+        self.name = f.name
+        self.file_id = f.get_id()
+        self.size = f.get_filesize(False)
+        self.bytes = 0  # Received bytes, without the resumed prefix
+        self.outcome = None
+        self.retries = 0
+        self.from_store = False
+        self.bulk = False  # Received by a bulk request
+        self.stages = {}
+        self.thread = threading.get_ident()
+        self._origin = origin
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Times a stage of the file, used as context manager.
+
+        :param name: The stage, one of STAGES.
+        :type name: str
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.stages[name] = (start - self._origin, time.monotonic() - self._origin)
+
+    def split(self, stage: str, first: str, seconds: float):
+        """
+        Moves the first seconds of a stage to another stage, e.g. the time to first byte of the transfer to "connect".
+
+        :param stage: The timed stage.
+        :type stage: str
+        :param first: The stage that takes the beginning.
+        :type first: str
+        :param seconds: The duration of the beginning.
+        :type seconds: float
+        """
+        if stage not in self.stages or not seconds:
+            return
+        start, end = self.stages[stage]
+        middle = min(start + float(seconds), end)
+        self.stages[first] = (start, middle)
+        self.stages[stage] = (middle, end)
+
+    def duration(self, stage: str) -> float:
+        """
+        Returns the seconds spent in a stage.
+
+        :param stage: The stage, one of STAGES.
+        :type stage: str
+        :return: The duration, 0 if the stage didn't run.
+        :rtype: float
+        """
+        start, end = self.stages.get(stage, (0.0, 0.0))
+        return end - start
+
+    @property
+    def throughput(self) -> float:
+        """The received bytes per second of the transfer or None, if nothing was transferred or it was received by a bulk request."""
+        if self.bulk:
+            return None
+        seconds = self.duration("transfer")
+        return self.bytes / seconds if self.bytes and seconds > 0 else None
+
+    def finish(self, outcome: str, f):
+        """
+        Records the outcome and the retries of the file.
+
+        :param outcome: The outcome, one of DOWNLOAD_RESULTS.
+        :type outcome: str
+        :param f: The dataset file.
+        :type f: DatasetFile
+        """
+        self.name = f.name
+        self.outcome = outcome
+        self.retries = f.retries
+        self.from_store = f.from_store
+
+    def to_dict(self) -> dict:
+        """Returns the report as JSON serializable dict."""
+        return {
+            "name": self.name,
+            "id": self.file_id,
+            "size": self.size,
+            "bytes": self.bytes,
+            "outcome": self.outcome,
+            "retries": self.retries,
+            "from_store": self.from_store,
+            "bulk": self.bulk,
+            "throughput": self.throughput,
+            "stages": {
+                stage: {
+                    "start": round(start, 6),
+                    "seconds": round(end - start, 6),
+                }
+                for stage, (start, end) in sorted(
+                    self.stages.items(), key=lambda item: item[1]
+                )
+            },
+        }
+
+
+class DownloadReport(dict):
+    def __init__(self, dataset: str = None, version: str = None, path: str = None):
+        """
+        The structured result of a download: the number of files by outcome and a FileReport of every file.
+
+        The report is a dict of the counts by outcome (DOWNLOAD_RESULTS), so it can be used like the counts.
+        It can be exported as JSON, as Prometheus textfile and as Chrome trace (chrome://tracing, Perfetto).
+
+        :param dataset: The persistent id of the dataset. [Default: None]
+        :type dataset: str
+        :param version: The version of the dataset. [Default: None]
+        :type version: str
+        :param path: The download path. [Default: None]
+        :type path: str
+        """
+        super().__init__(dict.fromkeys(DOWNLOAD_RESULTS, 0))
+        self.dataset = dataset
+        self.version = version
+        self.path = str(path) if path is not None else None
+        self.started = time.time()
+        self.seconds = 0.0
+        self.files = []
+        self._origin = time.monotonic()
+        self._lock = threading.Lock()
+
+    def start_file(self, f) -> FileReport:
+        """
+        Adds the report of a file whose download starts now. Safe to call from worker threads.
+
+        :param f: The dataset file.
+        :type f: DatasetFile
+        :return: The report of the file.
+        :rtype: FileReport
+        """
+        record = FileReport(f, self._origin)
+        with self._lock:
+            self.files.append(record)
+        return record
+
+    def finish(self):
+        """Records the duration of the download."""
+        self.seconds = time.monotonic() - self._origin
+
+    @property
+    def bytes(self) -> int:
+        """The received bytes of all files."""
+        return sum(record.bytes for record in self.files)
+
+    @property
+    def throughput(self) -> float:
+        """The received bytes per second of the whole download or None, if nothing was received."""
+        return self.bytes / self.seconds if self.bytes and self.seconds > 0 else None
+
+    def stage_seconds(self) -> dict:
+        """
+        Returns the seconds spent in every stage, summed over all files.
+
+        :return: The seconds by stage.
+        :rtype: dict
+        """
+        return {
+            stage: sum(record.duration(stage) for record in self.files)
+            for stage in STAGES
+        }
+
+    def to_dict(self) -> dict:
+        """Returns the report as JSON serializable dict."""
+        return {
+            "dataset": self.dataset,
+            "version": self.version,
+            "path": self.path,
+            "started": self.started,
+            "seconds": round(self.seconds, 6),
+            "bytes": self.bytes,
+            "throughput": self.throughput,
+            "results": dict(self),
+            "retries": sum(record.retries for record in self.files),
+            "stages": {
+                stage: round(seconds, 6)
+                for stage, seconds in self.stage_seconds().items()
+            },
+            "files": [record.to_dict() for record in self.files],
+        }
+
+    def write_json(self, path: str):
+        """
+        Writes the report as JSON.
+
+        :param path: The file.
+        :type path: str
+        """
+        write_json([self], path)
+
+    def write_prometheus(self, path: str):
+        """
+        Writes the report as Prometheus textfile, e.g. for the textfile collector of the node exporter.
+
+        :param path: The file, replaced atomically.
+        :type path: str
+        """
+        write_prometheus([self], path)
+
+    def write_trace(self, path: str):
+        """
+        Writes the stages of every file as Chrome trace events, one row per worker thread.
+
+        :param path: The file.
+        :type path: str
+        """
+        write_trace([self], path)
+
+
+def write_json(reports: list, path: str):
+    """
+    Writes reports as JSON, a single report as object and several as list.
+
+    :param reports: The reports.
+    :type reports: list
+    :param path: The file.
+    :type path: str
+    """
+    content = [report.to_dict() for report in reports]
+    with open(path, "w") as f:
+        json.dump(content[0] if len(content) == 1 else content, f, indent=2)
+
+
+def _label(value) -> str:
+    """Escapes a Prometheus label value."""
+    return (
+        str(value if value is not None else "")
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def write_prometheus(reports: list, path: str):
+    """
+    Writes reports as Prometheus textfile, the metrics of every dataset are labeled with its persistent id.
+
+    :param reports: The reports.
+    :type reports: list
+    :param path: The file, replaced atomically so a scrape never reads a partial file.
+    :type path: str
+    """
+    metrics = {
+        "darus_download_files": ("Files of the last download by outcome.", []),
+        "darus_download_bytes": ("Bytes received by the last download.", []),
+        "darus_download_duration_seconds": ("Duration of the last download.", []),
+        "darus_download_throughput_bytes_per_second": (
+            "Received bytes per second of the last download.",
+            [],
+        ),
+        "darus_download_retries": ("Retries of the last download.", []),
+        "darus_download_stage_seconds": (
+            "Seconds of the last download by stage, summed over all files.",
+            [],
+        ),
+        "darus_download_last_run_timestamp_seconds": (
+            "Start of the last download.",
+            [],
+        ),
+    }
+    for report in reports:
+        dataset = f'dataset="{_label(report.dataset)}"'
+        for outcome in DOWNLOAD_RESULTS:
+            metrics["darus_download_files"][1].append(
+                (f'{dataset},outcome="{outcome}"', report[outcome])
+            )
+        metrics["darus_download_bytes"][1].append((dataset, report.bytes))
+        metrics["darus_download_duration_seconds"][1].append((dataset, report.seconds))
+        metrics["darus_download_throughput_bytes_per_second"][1].append(
+            (dataset, report.throughput or 0)
+        )
+        metrics["darus_download_retries"][1].append(
+            (dataset, sum(record.retries for record in report.files))
+        )
+        for stage, seconds in report.stage_seconds().items():
+            metrics["darus_download_stage_seconds"][1].append(
+                (f'{dataset},stage="{stage}"', seconds)
+            )
+        metrics["darus_download_last_run_timestamp_seconds"][1].append(
+            (dataset, report.started)
+        )
+
+    lines = []
+    for name, (description, samples) in metrics.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(f"{name}{{{labels}}} {value:g}" for labels, value in samples)
+
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp_path.write_text("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            os.remove(tmp_path)
+
+
+def write_trace(reports: list, path: str):
+    """
+    Writes the stages of every file as Chrome trace events (chrome://tracing, Perfetto).
+    Every dataset is a process, every worker thread a row.
+
+    :param reports: The reports.
+    :type reports: list
+    :param path: The file.
+    :type path: str
+    """
+    events = []
+    origin = min((report.started for report in reports), default=0)
+    threads = {}
+    for pid, report in enumerate(reports, start=1):
+        events.append(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": report.dataset or report.path or f"dataset {pid}"},
+            }
+        )
+        offset = (report.started - origin) * 1e6
+        for record in report.files:
+            tid = threads.setdefault((pid, record.thread), len(threads) + 1)
+            for stage, (start, end) in record.stages.items():
+                events.append(
+                    {
+                        "name": stage,
+                        "cat": record.outcome or "unknown",
+                        "ph": "X",
+                        "ts": round(offset + start * 1e6),
+                        "dur": round((end - start) * 1e6),
+                        "pid": pid,
+                        "tid": tid,
+                        "args": {"file": record.name, "bytes": record.bytes},
+                    }
+                )
+    for (pid, _), tid in threads.items():
+        events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": f"worker {tid}"},
+            }
+        )
+
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,360 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+from rich.console import Console
+from rich.progress import (
+    Progress,
+    TextColumn,
+    BarColumn,
+    TimeElapsedColumn,
+    TimeRemainingColumn,
+    DownloadColumn,
+    TransferSpeedColumn,
+)
+from rich.table import Table
+
+from .DownloadEvent import DownloadEvent
+
+THROTTLED = (
+    DownloadEvent.PROGRESS,
+    DownloadEvent.BULK,
+)  # Kinds dropped within the interval
+FINAL = (
+    DownloadEvent.SKIPPED,
+    DownloadEvent.VERIFIED,
+    DownloadEvent.PROCESSED,
+    DownloadEvent.FAILED,
+)  # Kinds that complete a file
+
+
+def progress_display(console: Console = None, disable: bool = False) -> Progress:
+    """
+    Creates the progress display of downloads, with ETA and file size.
+
+    :param console: The console of the display. If None, a new console is used. [Default: None]
+    :type console: Console
+    :param disable: Indicates if the display is hidden, e.g. in a headless job. [Default: False]
+    :type disable: bool
+    :return: The display, not started.
+    :rtype: Progress
+    """
+    return Progress(
+        TextColumn("[bold]{task.description}"),
+        BarColumn(),
+        "[progress.percentage]{task.percentage:>3.1f}%",
+        "•",
+        DownloadColumn(),
+        "•",
+        TimeElapsedColumn(),
+        "•",
+        TimeRemainingColumn(),
+        "•",
+        TransferSpeedColumn(),
+        console=console or Console(),
+        disable=disable,
+    )
+
+
+class EventSink:
+    def __init__(self, interval: float = 0.0):
+        """
+        Receives the DownloadEvents of a download, e.g. to display or log them.
+
+        Progress events of a file (and of a bulk request) are throttled to one per interval, the last one
+        (completed == total) and all other kinds always pass. A sink can be shared by several concurrent
+        downloads, events are sent from the worker threads.
+
+        Subclasses override emit and optionally start and finish.
+
+        :param interval: The minimal seconds between two progress events of a file. [Default: 0.0]
+        :type interval: float
+        """
+        self.interval = interval
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def send(self, event: DownloadEvent):
+        """
+        Passes an event to emit, unless it is throttled.
+
+        :param event: The event.
+        :type event: DownloadEvent
+        """
+        key = (event.dataset, event.file.get_id() if event.file is not None else None)
+        if event.kind in THROTTLED and self.interval:
+            now = time.monotonic()
+            with self._lock:
+                if (
+                    event.completed < event.total
+                    and now - self._last.get(key, float("-inf")) < self.interval
+                ):
+                    return
+                self._last[key] = now
+        elif self.interval:
+            with self._lock:
+                self._last.pop(key, None)
+        self.emit(event)
+
+    def emit(self, event: DownloadEvent):
+        """
+        Handles an event that passed the throttling.
+
+        :param event: The event.
+        :type event: DownloadEvent
+        """
+
+    def start(self, dataset: str, files: list, path: Path, limiter=None):
+        """
+        Called before the files of a download start.
+
+        :param dataset: The persistent id of the dataset.
+        :type dataset: str
+        :param files: The files in download order.
+        :type files: list
+        :param path: The download path.
+        :type path: Path
+        :param limiter: The bandwidth limit of the download. [Default: None]
+        :type limiter: BandwidthLimiter
+        """
+
+    def finish(self, dataset: str):
+        """
+        Called after the files of a download finished, also if it was interrupted.
+
+        :param dataset: The persistent id of the dataset.
+        :type dataset: str
+        """
+
+
+class CallbackSink(EventSink):
+    def __init__(self, callback, interval: float = 0.0):
+        """
+        Passes every event to a function, e.g. of an application with its own display.
+
+        :param callback: The function receiving the DownloadEvent.
+        :type callback: callable
+        :param interval: The minimal seconds between two progress events of a file. [Default: 0.0]
+        :type interval: float
+        """
+        super().__init__(interval)
+        self.callback = callback
+
+    def emit(self, event: DownloadEvent):
+        """Passes the event to the callback."""
+        self.callback(event)
+
+
+class JsonLinesSink(EventSink):
+    def __init__(self, file, interval: float = 1.0):
+        """
+        Writes every event as a line of JSON, e.g. to a log file of a batch job.
+
+        :param file: The path the lines are appended to or an open text stream.
+        :type file: str or Path or TextIO
+        :param interval: The minimal seconds between two progress events of a file. [Default: 1.0]
+        :type interval: float
+        """
+        super().__init__(interval)
+        self._owns_stream = isinstance(file, (str, Path))
+        self.stream = open(file, "a") if self._owns_stream else file
+        self._write_lock = threading.Lock()
+
+    def emit(self, event: DownloadEvent):
+        """Writes the event as line and flushes it, so the log can be followed."""
+        line = json.dumps(
+            {
+                "time": event.time,
+                "dataset": event.dataset,
+                "kind": event.kind,
+                "file": event.file.name if event.file is not None else None,
+                "id": event.file.get_id() if event.file is not None else None,
+                "completed": event.completed,
+                "total": event.total,
+                "message": event.message,
+            }
+        )
+        with self._write_lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def close(self):
+        """Closes the file, if it was opened by the sink."""
+        if self._owns_stream:
+            self.stream.close()
+
+
+class RichSink(EventSink):
+    def __init__(
+        self,
+        progress: Progress = None,
+        label_datasets: bool = False,
+        interval: float = 0.1,
+    ):
+        """
+        Shows the files of a download in a rich table and progress display, with an aggregated bar per dataset.
+
+        :param progress: A progress display shared with other output. If None, an own display is shown while a download runs. [Default: None]
+        :type progress: Progress
+        :param label_datasets: Indicates if the aggregated bars are labeled with the dataset, e.g. when several datasets share the display. [Default: False]
+        :type label_datasets: bool
+        :param interval: The minimal seconds between two progress events of a file. [Default: 0.1]
+        :type interval: float
+        """
+        super().__init__(interval)
+        self._owns_progress = progress is None
+        self.progress = progress if progress is not None else progress_display()
+        self.label_datasets = label_datasets
+        self._tasks = {}  # Task of every file, by dataset and file id
+        self._fresh = set()  # Files without progress yet
+        self._reported = {}  # Bytes of every file added to the aggregated bar
+        self._totals = {}  # Aggregated bar of every dataset
+        self._bulk = {}  # Task of the running bulk request of every dataset
+        self._active = 0
+        self._state_lock = threading.Lock()
+
+    @property
+    def console(self) -> Console:
+        """The console of the progress display, output printed to it doesn't break the display."""
+        return self.progress.console
+
+    def start(self, dataset: str, files: list, path: Path, limiter=None):
+        """Prints the files and adds the aggregated bar of the dataset."""
+        table = Table(title="Downloading...", title_justify="left")
+
+        table.add_column("Name", justify="left")
+        table.add_column("Size", justify="left")
+        table.add_column("Directory", justify="left")
+        table.add_column("Download Original", justify="left")
+        table.add_column("Description", justify="left")
+
+        for file in files:
+            table.add_row(
+                file.name,
+                file.get_filesize(),
+                str(path / file.sub_dir),
+                (
+                    f"[green]✓({file.original_file_name})[/green]"
+                    if file.original_file_name
+                    else ""
+                ),
+                file.description,
+            )
+
+        self.console.print(table)
+
+        with self._state_lock:
+            if self._owns_progress and self._active == 0:
+                self.progress.start()
+            self._active += 1
+
+            # Aggregated bar over all files, gives the combined ETA
+            # The speed column shows the throttled rate, the cap is shown in the description
+            limit = f", limited to {limiter}" if limiter is not None else ""
+            name = f"{dataset} " if self.label_datasets else ""
+            self._totals[dataset] = self.progress.add_task(
+                f"[bold]Total {name}({len(files)} files{limit})[/bold]",
+                total=sum(f.get_filesize(False) for f in files),
+            )
+
+    def finish(self, dataset: str):
+        """Stops an own display after the last running download."""
+        with self._state_lock:
+            self._active -= 1
+            if self._owns_progress and self._active == 0:
+                self.progress.stop()
+
+    def _advance_total(self, event: DownloadEvent, key: tuple, completed: int):
+        """Advances the aggregated bar of the dataset to the bytes of a file."""
+        with self._state_lock:
+            advance = completed - self._reported.get(key, 0)
+            self._reported[key] = completed
+            total_id = self._totals.get(event.dataset)
+        if total_id is not None and advance:
+            self.progress.update(total_id, advance=advance)
+
+    def emit(self, event: DownloadEvent):
+        """Updates the task of the file and the aggregated bar."""
+        if event.file is None:
+            self._emit_bulk(event)
+            return
+
+        f = event.file
+        key = (event.dataset, f.get_id())
+        task_id = self._tasks.get(key)
+
+        if event.kind == DownloadEvent.STARTED:
+            self._tasks[key] = self.progress.add_task(
+                f"[blue]Downloading {f.name}[/blue]", total=event.total
+            )
+            self._fresh.add(key)
+            self._advance_total(event, key, 0)
+        elif event.kind == DownloadEvent.SKIPPED:
+            self.progress.add_task(
+                f"[green]✓ {f.name} ({event.message})[/green]",
+                total=event.total,
+                completed=event.total,
+            )
+            self._advance_total(event, key, event.total)
+        elif task_id is None:
+            return
+        elif event.kind == DownloadEvent.PROGRESS and event.message:
+            # Post processing, the bar follows the extracted bytes of the members
+            self.progress.update(
+                task_id,
+                description=f"[yellow]{event.message.capitalize()} {f.name}[/yellow]",
+                completed=event.completed,
+                total=event.total,
+            )
+        elif event.kind == DownloadEvent.PROGRESS:
+            if key in self._fresh:
+                self._fresh.discard(key)
+                # Start at the offset of a resumed download without a speed spike
+                self.progress.reset(task_id, completed=event.completed)
+            else:
+                self.progress.update(task_id, completed=event.completed)
+            self._advance_total(event, key, event.completed)
+        elif event.kind == DownloadEvent.STAGE:
+            color = "red" if event.message == "removing" else "yellow"
+            self.progress.update(
+                task_id,
+                description=f"[{color}]{event.message.capitalize()} {f.name}[/{color}]",
+            )
+        elif event.kind == DownloadEvent.INTERRUPTED:
+            self.progress.update(
+                task_id, description=f"[yellow]⚠ {f.name} (interrupted)[/yellow]"
+            )
+        elif event.kind in FINAL:
+            detail = f" ({event.message})" if event.message else ""
+            if event.kind == DownloadEvent.FAILED:
+                status = f"[red]✗ {f.name}{detail}[/red]"
+            elif "failed" in event.message:
+                status = f"[yellow]⚠ {f.name}{detail}[/yellow]"
+            else:
+                status = f"[green]✓ {f.name}{detail}[/green]"
+            self.progress.update(
+                task_id, description=status, completed=event.total, total=event.total
+            )
+            self._advance_total(event, key, event.total)
+
+    def _emit_bulk(self, event: DownloadEvent):
+        """Updates the task of the running bulk request of the dataset."""
+        if event.kind == DownloadEvent.BULK:
+            task_id = self._bulk.get(event.dataset)
+            if task_id is None:
+                self._bulk[event.dataset] = self.progress.add_task(
+                    f"[blue]Bulk download of {event.message}[/blue]",
+                    total=event.total,
+                    completed=event.completed,
+                )
+            else:
+                self.progress.update(task_id, completed=event.completed)
+        elif event.kind == DownloadEvent.BULK_FINISHED:
+            task_id = self._bulk.pop(event.dataset, None)
+            if task_id is not None:
+                self.progress.update(
+                    task_id,
+                    description=f"[green]✓ Bulk download of {event.message}[/green]",
+                    completed=event.total,
+                )
@@ -0,0 +1,218 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from .DatasetFile import DatasetFile
+from .utils import get_logger
+
+MANIFEST_NAME = ".darus-manifest.json"
+MANIFEST_VERSION = 1
+FLUSH_INTERVAL = 1.0  # Minimal seconds between two writes of the manifest
+
+
+class Manifest:
+    def __init__(self, path: str):
+        """
+        Creates or loads the download manifest of a target directory.
+
+        The manifest records every file that was downloaded and verified, keyed by its Dataverse file id.
+        Together with the checksum, size and mtime of the local file it allows to skip files on a rerun.
+
+        :param path: The root directory of the downloaded dataset.
+        :type path: str
+        """
+        self.path = Path(path)
+        self.file_path = self.path / MANIFEST_NAME
+        self._entries = {}
+        self.dataset_version = (
+            None  # Version of the dataset the files belong to, set by Dataset.sync
+        )
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_flush = 0.0
+
+        self._load()
+
+    def _load(self):
+        """Loads the entries of an existing manifest file."""
+        if not self.file_path.is_file():
+            return
+
+        try:
+            with open(self.file_path, encoding="utf-8") as f:
+                content = json.load(f)
+            self._entries = content["files"]
+            self.dataset_version = content.get("dataset_version")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger = get_logger(__name__)
+            logger.warning(
+                f"Ignoring unreadable manifest '{self.file_path}', all files are downloaded again: {e}"
+            )
+            self._entries = {}
+
+    def get(self, f: DatasetFile) -> dict:
+        """
+        Returns the entry of a file.
+
+        :param f: The dataset file.
+        :type f: DatasetFile
+        :return: The recorded entry or None if the file is not in the manifest.
+        :rtype: dict
+        """
+        with self._lock:
+            entry = self._entries.get(str(f.get_id()))
+            return dict(entry) if entry else None
+
+    def entries(self) -> dict:
+        """
+        Returns all entries.
+
+        :return: The recorded entries by file id.
+        :rtype: dict
+        """
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._entries.items()}
+
+    def set_dataset_version(self, version: str):
+        """
+        Records the version of the dataset the files belong to.
+
+        :param version: The version, e.g. "1.2".
+        :type version: str
+        """
+        with self._lock:
+            if self.dataset_version != version:
+                self.dataset_version = version
+                self._dirty = True
+
+    def is_verified(self, f: DatasetFile) -> bool:
+        """
+        Checks if the local copy of a file is complete and matches its checksum.
+
+        The file is only hashed again if its size or mtime differs from the manifest.
+        Archives that were extracted and removed are complete, as long as the checksum did not change.
+
+        :param f: The dataset file.
+        :type f: DatasetFile
+        :return: True if the file doesn't need to be downloaded again.
+        :rtype: bool
+        """
+        entry = self.get(f)
+        if not entry or entry["checksum"] != f.get_checksum():
+            return False
+
+        file_path = f.get_file_path(self.path)
+        if entry["path"] != self._relative(file_path):
+            return False
+        if entry.get("removed"):
+            return True
+
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return False
+
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns == entry["mtime"]:
+            return True
+
+        # Same size but touched, verify the content once and store the new mtime
+        f.file_path = file_path
+        if not f.validate(use_digest=False):
+            return False
+        self.record(f, entry["status"])
+        return True
+
+    def record(self, f: DatasetFile, status: str, removed: bool = False):
+        """
+        Records a verified or processed file.
+
+        :param f: The dataset file, f.file_path must point to the local copy.
+        :type f: DatasetFile
+        :param status: The state of the file, either "verified" or "processed".
+        :type status: str
+        :param removed: Indicates if the file was removed after being processed. [Default: False]
+        :type removed: bool
+        """
+        if not f.file_path:
+            return
+
+        file_path = Path(f.file_path)
+        if removed:
+            size, mtime = f.get_filesize(False), None
+        else:
+            try:
+                stat = file_path.stat()
+            except OSError:
+                return
+            size, mtime = stat.st_size, stat.st_mtime_ns
+
+        with self._lock:
+            self._entries[str(f.get_id())] = {
+                "name": f.name,
+                "path": self._relative(file_path),
+                "checksum": f.get_checksum(),
+                "size": size,
+                "mtime": mtime,
+                "status": status,
+                "removed": removed,
+            }
+            self._dirty = True
+        self.flush(force=False)
+
+    def discard(self, f: DatasetFile):
+        """
+        Removes the entry of a file, e.g. because its local copy is corrupt.
+
+        :param f: The dataset file or its id.
+        :type f: DatasetFile or int
+        """
+        file_id = f.get_id() if isinstance(f, DatasetFile) else f
+        with self._lock:
+            if self._entries.pop(str(file_id), None) is not None:
+                self._dirty = True
+        self.flush(force=False)
+
+    def flush(self, force: bool = True):
+        """
+        Writes the manifest atomically, so an interrupted write never corrupts it.
+
+        :param force: If False, the manifest is written at most every FLUSH_INTERVAL seconds. [Default: True]
+        :type force: bool
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            if not force and time.monotonic() - self._last_flush < FLUSH_INTERVAL:
+                return
+
+            tmp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "version": MANIFEST_VERSION,
+                            "dataset_version": self.dataset_version,
+                            "files": self._entries,
+                        },
+                        f,
+                        indent=1,
+                    )
+                os.replace(tmp_path, self.file_path)
+            except OSError as e:
+                logger = get_logger(__name__)
+                logger.error(f"Error while writing manifest '{self.file_path}': {e}")
+                return
+
+            self._dirty = False
+            self._last_flush = time.monotonic()
+
+    def _relative(self, file_path: Path) -> str:
+        """Returns file_path relative to the manifest directory in posix notation."""
+        try:
+            return Path(file_path).relative_to(self.path).as_posix()
+        except ValueError:
+            return Path(file_path).as_posix()
@@ -0,0 +1,114 @@
+import fnmatch
+import re
+
+from .utils import parse_size
+
+
+class MemberFilter:
+    def __init__(
+        self,
+        include: list = None,
+        exclude: list = None,
+        regex: str = None,
+        min_size=None,
+        max_size=None,
+    ):
+        """
+        Selects the members of a ZIP archive that are extracted.
+
+        A member is extracted if it matches any include glob (or no include is given), no exclude glob,
+        the regex and the size limits. Globs and regex are matched against the full member name,
+        e.g. "*.h5" or "simulation/run_1/*".
+
+        :param include: Globs of the members to extract. [Default: None]
+        :type include: list
+        :param exclude: Globs of the members to skip. [Default: None]
+        :type exclude: list
+        :param regex: A regular expression the member name must contain a match of. [Default: None]
+        :type regex: str
+        :param min_size: The minimal uncompressed size, in bytes or with unit (e.g. "1MB"). [Default: None]
+        :type min_size: int or str
+        :param max_size: The maximal uncompressed size, in bytes or with unit (e.g. "10GB"). [Default: None]
+        :type max_size: int or str
+
+        :raise ValueError: If the regex or a size is invalid.
+        """
+        self.include = [include] if isinstance(include, str) else list(include or [])
+        self.exclude = [exclude] if isinstance(exclude, str) else list(exclude or [])
+        try:
+            self.regex = re.compile(regex) if regex else None
+        except re.error as e:
+            raise ValueError(f"Invalid member regex {regex!r}: {e}")
+        self.min_size = parse_size(min_size) if min_size not in (None, "") else None
+        self.max_size = parse_size(max_size) if max_size not in (None, "") else None
+
+    def __bool__(self) -> bool:
+        """Returns True if the filter excludes anything."""
+        return bool(
+            self.include
+            or self.exclude
+            or self.regex
+            or self.min_size is not None
+            or self.max_size is not None
+        )
+
+    def matches_name(self, name: str) -> bool:
+        """
+        Checks the name of a member against the globs and the regex.
+
+        :param name: The name of the member in the archive.
+        :type name: str
+        :return: True if the name is selected.
+        :rtype: bool
+        """
+        if self.include and not any(fnmatch.fnmatchcase(name, p) for p in self.include):
+            return False
+        if any(fnmatch.fnmatchcase(name, p) for p in self.exclude):
+            return False
+        return self.regex is None or self.regex.search(name) is not None
+
+    def matches_size(self, size: int) -> bool:
+        """
+        Checks the uncompressed size of a member against the size limits.
+
+        :param size: The uncompressed size in bytes.
+        :type size: int
+        :return: True if the size is selected.
+        :rtype: bool
+        """
+        if self.min_size is not None and size < self.min_size:
+            return False
+        return self.max_size is None or size <= self.max_size
+
+    def matches(self, name: str, size: int) -> bool:
+        """
+        Checks a member against the filter.
+
+        :param name: The name of the member in the archive.
+        :type name: str
+        :param size: The uncompressed size in bytes.
+        :type size: int
+        :return: True if the member is extracted.
+        :rtype: bool
+        """
+        return self.matches_name(name) and self.matches_size(size)
+
+    def select(self, members: list) -> tuple:
+        """
+        Splits the files of an archive into the selected ones and the skipped bytes.
+
+        :param members: The ZipInfo of every member.
+        :type members: list
+        :return: The selected ZipInfo of files (no directories) and the uncompressed size of the skipped ones.
+        :rtype: tuple
+        """
+        selected = []
+        skipped_bytes = 0
+        for info in members:
+            if info.is_dir():
+                continue
+            if self.matches(info.filename, info.file_size):
+                selected.append(info)
+            else:
+                skipped_bytes += info.file_size
+        return selected, skipped_bytes
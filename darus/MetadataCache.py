@@ -0,0 +1,124 @@
+import json
+import os
+import re
+from pathlib import Path
+
+from .utils import get_logger
+
+
+def default_cache_dir() -> Path:
+    """
+    Returns the default directory of the metadata cache ($XDG_CACHE_HOME/darus or ~/.cache/darus).
+
+    :return: The cache directory.
+    :rtype: Path
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "darus"
+
+
+class MetadataCache:
+    def __init__(self, cache_dir: str = None):
+        """
+        Creates an on-disk cache of dataset api responses, stored together with their ETag and Last-Modified header.
+
+        :param cache_dir: The directory of the cache. [Default: $XDG_CACHE_HOME/darus or ~/.cache/darus]
+        :type cache_dir: str
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+
+    @staticmethod
+    def key(server_url: str, persistent_id: str, version: str) -> str:
+        """
+        Returns the cache key of a dataset version.
+
+        :param server_url: The url of the server where the dataset is stored.
+        :type server_url: str
+        :param persistent_id: The persistent id of the dataset, e.g. doi:10.18419/DARUS-4801.
+        :type persistent_id: str
+        :param version: The version of the dataset, e.g. :latest or 1.2.
+        :type version: str
+        :return: The key, usable as file name.
+        :rtype: str
+        """
+        return re.sub(
+            r"[^A-Za-z0-9.-]+", "_", f"{server_url}_{persistent_id}_{version}"
+        )
+
+    def _path(self, key: str) -> Path:
+        """Returns the file of a cache entry."""
+        return self.cache_dir / f"{key}.json"
+
+    def load(self, key: str) -> dict:
+        """
+        Returns a cache entry.
+
+        :param key: The cache key.
+        :type key: str
+        :return: A dict with the cached "response" and its "etag" and "last_modified" or None if not cached.
+        :rtype: dict
+        """
+        path = self._path(key)
+        if not path.is_file():
+            return None
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            entry["response"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger = get_logger(__name__)
+            logger.warning(f"Ignoring unreadable metadata cache entry '{path}': {e}")
+            return None
+        return entry
+
+    def store(
+        self, key: str, response: dict, etag: str = None, last_modified: str = None
+    ):
+        """
+        Stores a response atomically.
+
+        :param key: The cache key.
+        :type key: str
+        :param response: The parsed json response of the dataset api.
+        :type response: dict
+        :param etag: The ETag header of the response. [Default: None]
+        :type etag: str
+        :param last_modified: The Last-Modified header of the response. [Default: None]
+        :type last_modified: str
+        """
+        path = self._path(key)
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "etag": etag,
+                        "last_modified": last_modified,
+                        "response": response,
+                    },
+                    f,
+                )
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger = get_logger(__name__)
+            logger.warning(f"Could not write metadata cache entry '{path}': {e}")
+
+    @staticmethod
+    def conditional_headers(entry: dict) -> dict:
+        """
+        Returns the headers to revalidate a cache entry.
+
+        :param entry: The cache entry or None.
+        :type entry: dict
+        :return: The If-None-Match and If-Modified-Since headers, empty if nothing can be revalidated.
+        :rtype: dict
+        """
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
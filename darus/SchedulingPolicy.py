@@ -0,0 +1,103 @@
+import fnmatch
+from pathlib import PurePosixPath
+
+ORDERS = ("metadata", "largest", "smallest", "interleave")
+
+
+class SchedulingPolicy:
+    def __init__(self, order: str = "metadata", priorities: dict = None):
+        """
+        Decides the order in which the files of a download are started.
+
+        The order applies to the concurrent downloads, which start in this order, and to the bulk batches.
+        "largest" starts the large files first, so no single stream is left at the end (shortest makespan).
+        "smallest" finishes the small files first (shortest time to the first usable file).
+        "interleave" alternates between the largest and the smallest remaining file,
+        so large streams run while small files keep completing.
+        Priorities take precedence over the order, higher priorities are started first.
+
+        Subclasses may override order_files to implement another policy.
+
+        :param order: The order of files with equal priority, one of "metadata", "largest", "smallest" or "interleave". [Default: "metadata"]
+        :type order: str
+        :param priorities: Priorities of files or directories, by glob of the path in the dataset (e.g. "raw/*.h5") or directory (e.g. "docs"). Unmatched files have priority 0. [Default: None]
+        :type priorities: dict
+
+        :raise ValueError: If the order is unknown or a priority is not a number.
+        """
+        if order not in ORDERS:
+            raise ValueError(
+                f"Invalid scheduling order {order!r}, expected one of {', '.join(ORDERS)}."
+            )
+        self.order = order
+        self.priorities = {}
+        for pattern, priority in (priorities or {}).items():
+            try:
+                self.priorities[str(pattern).strip("/")] = float(priority)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid priority {priority!r} of {pattern!r}.")
+
+    def __bool__(self) -> bool:
+        """Returns True if the policy changes the metadata order."""
+        return self.order != "metadata" or bool(self.priorities)
+
+    def priority(self, file) -> float:
+        """
+        Returns the priority of a file, the highest of all matching globs or directories.
+
+        :param file: The file.
+        :type file: DatasetFile
+        :return: The priority, 0 if nothing matches.
+        :rtype: float
+        """
+        path = PurePosixPath(file.sub_dir or "", file.name)
+        matches = [
+            priority
+            for pattern, priority in self.priorities.items()
+            if fnmatch.fnmatchcase(str(path), pattern)
+            or pattern in (str(parent) for parent in path.parents)
+        ]
+        return max(matches, default=0)
+
+    def order_files(self, files: list) -> list:
+        """
+        Orders files of equal priority.
+
+        :param files: The files in metadata order.
+        :type files: list
+        :return: The files in download order.
+        :rtype: list
+        """
+        if self.order == "metadata":
+            return list(files)
+        if self.order == "smallest":
+            # Stable, files of equal size keep the metadata order
+            return sorted(files, key=lambda f: f.get_filesize(False))
+        by_size = sorted(files, key=lambda f: f.get_filesize(False), reverse=True)
+        if self.order == "largest":
+            return by_size
+
+        ordered = []
+        while by_size:
+            ordered.append(by_size.pop(0))
+            if by_size:
+                ordered.append(by_size.pop())
+        return ordered
+
+    def apply(self, files: list) -> list:
+        """
+        Returns the files in download order, by priority and then by order.
+
+        :param files: The files in metadata order.
+        :type files: list
+        :return: The files in download order.
+        :rtype: list
+        """
+        groups = {}
+        for f in files:
+            groups.setdefault(self.priority(f), []).append(f)
+        return [
+            f
+            for priority in sorted(groups, reverse=True)
+            for f in self.order_files(groups[priority])
+        ]
@@ -0,0 +1,30 @@
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = (
+    10.0,
+    60.0,
+)  # Seconds to connect and to wait for the next bytes of a response
+
+
+class TimeoutAdapter(HTTPAdapter):
+    __attrs__ = HTTPAdapter.__attrs__ + ["timeout"]
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, **kwargs):
+        """
+        A pooled transport adapter sending every request with a default timeout.
+
+        Without a timeout, a half-open connection blocks a download forever. With it, a stalled connect or read
+        raises a timeout, which the downloads retry like a dropped connection.
+
+        :param timeout: The seconds to connect and to wait for the next bytes, as tuple (connect, read) or a single value for both. None waits forever. [Default: (10.0, 60.0)]
+        :type timeout: float or tuple
+        :param kwargs: The arguments of the HTTPAdapter, e.g. pool_connections and pool_maxsize.
+        """
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        """Sends the request with the default timeout, unless the request sets its own."""
+        return super().send(
+            request, timeout=self.timeout if timeout is None else timeout, **kwargs
+        )
@@ -0,0 +1,431 @@
+import hashlib
+import io
+import os
+import struct
+import zipfile
+import zlib
+from pathlib import Path
+
+from .utils import get_logger
+
+LOCAL_HEADER = struct.Struct(
+    "<4s5H3L2H"
+)  # Local file header without name and extra field
+DATA_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+END_SIGNATURES = (b"PK\x01\x02", b"PK\x05\x06", b"PK\x06\x06", b"PK\x06\x07")
+EOCD = struct.Struct("<4s4H2LH")  # End of central directory record
+ZIP64_LOCATOR = struct.Struct("<4sLQL")
+ZIP64_EOCD = struct.Struct("<4sQ2H2L4Q")
+TAIL_SIZE = EOCD.size + 0xFFFF  # EOCD with the longest possible comment
+
+FLAG_ENCRYPTED = 0x1
+FLAG_DATA_DESCRIPTOR = 0x8
+FLAG_UTF8 = 0x800
+
+
+class ZipStreamError(Exception):
+    """Raised if a ZIP stream can't be extracted while it arrives."""
+
+
+def fetch_central_directory(http, url: str, header: dict = None) -> dict:
+    """
+    Reads the central directory of a remote ZIP archive with range requests.
+
+    :param http: The session or requests module used for the requests.
+    :param url: The url of the archive.
+    :type url: str
+    :param header: The header if needed for the web requests. [Default: None]
+    :type header: dict
+    :return: The ZipInfo of every member by name or None, if the server does not honor range requests.
+    :rtype: dict
+    """
+
+    def fetch(byte_range):
+        request_header = dict(header) if header else {}
+        request_header["Range"] = f"bytes={byte_range}"
+        # Streamed, a server ignoring the range would send the whole archive
+        with http.get(url, headers=request_header, stream=True) as r:
+            if r.status_code != 206:
+                # Closed without reading the body
+                return None, None
+            content_range = r.headers.get("Content-Range", "")
+            start = content_range.replace("bytes", "").strip().split("-")[0]
+            return int(start), r.content
+
+    try:
+        tail_start, tail = fetch(f"-{TAIL_SIZE}")
+        if tail is None:
+            return None
+
+        eocd_pos = tail.rfind(b"PK\x05\x06")
+        if eocd_pos < 0:
+            return None
+        cd_offset = EOCD.unpack_from(tail, eocd_pos)[6]
+
+        if cd_offset == 0xFFFFFFFF:
+            # Zip64, the offset is in the zip64 end of central directory record
+            locator = ZIP64_LOCATOR.unpack_from(tail, eocd_pos - ZIP64_LOCATOR.size)
+            _, zip64_eocd = fetch(f"{locator[2]}-{locator[2] + ZIP64_EOCD.size - 1}")
+            cd_offset = ZIP64_EOCD.unpack_from(zip64_eocd)[9]
+
+        if cd_offset < tail_start:
+            tail_start, tail = fetch(f"{cd_offset}-")
+            if tail is None:
+                return None
+
+        # zipfile treats the bytes before the central directory as prepended data
+        with zipfile.ZipFile(io.BytesIO(tail[cd_offset - tail_start :])) as zf:
+            return {info.filename: info for info in zf.infolist()}
+    except Exception as e:
+        logger = get_logger(__name__)
+        logger.warning(f"Could not read the central directory of '{url}': {e}")
+        return None
+
+
+def can_stream(members: dict) -> bool:
+    """
+    Checks by the central directory if an archive can be extracted while it arrives.
+
+    :param members: The ZipInfo of every member by name, see fetch_central_directory.
+    :type members: dict
+    :return: True if every member is stored or deflated and not encrypted, False otherwise or if members is None.
+    :rtype: bool
+    """
+    if members is None:
+        return False
+    return all(
+        info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+        and not info.flag_bits & FLAG_ENCRYPTED
+        for info in members.values()
+    )
+
+
+class ZipStreamExtractor:
+    def __init__(
+        self,
+        target_dir: str,
+        members: dict = None,
+        member_filter=None,
+        hash_members: bool = False,
+    ):
+        """
+        Extracts the members of a ZIP archive from its bytes while they arrive, e.g. during the download.
+
+        Members are parsed from their local headers. Sizes and CRCs of members with a data descriptor are
+        taken from the central directory if given, deflated members can be extracted without it.
+        The CRC of every member is checked, a member with a wrong CRC is deleted.
+
+        :param target_dir: The directory the members are extracted to.
+        :type target_dir: str
+        :param members: The ZipInfo of every member by name, see fetch_central_directory. [Default: None]
+        :type members: dict
+        :param member_filter: Selects the extracted members, others are skipped without decompression if their size is known. [Default: None]
+        :type member_filter: MemberFilter
+        :param hash_members: Indicates if the MD5 of every extracted member is computed, see digests. [Default: False]
+        :type hash_members: bool
+        """
+        self.target_dir = Path(target_dir)
+        self.members = members or {}
+        self.member_filter = member_filter
+        self.extracted = []  # Paths of the completely extracted members
+        self.skipped_bytes = 0  # Uncompressed size of the members skipped by the filter
+        self.hash_members = hash_members
+        self.digests = (
+            {}
+        )  # MD5 of the extracted members by path, if hash_members is set
+        self.failed = False  # Set if the stream can't be extracted, e.g. an unsupported compression
+        self.finished = False  # Set once the central directory is reached
+
+        self._buffer = bytearray()
+        self._member = None  # State of the member that is currently extracted
+
+    def feed(self, data: bytes):
+        """
+        Extracts as much as possible from the next bytes of the archive.
+
+        :param data: The next bytes of the archive.
+        :type data: bytes
+        """
+        if self.failed or self.finished:
+            return
+
+        self._buffer += data
+        try:
+            while not self.failed and not self.finished:
+                if self._member is None:
+                    if not self._read_local_header():
+                        return
+                elif not self._read_member_data():
+                    return
+        except (ZipStreamError, zlib.error, OSError) as e:
+            logger = get_logger(__name__)
+            logger.warning(f"Streaming extraction to '{self.target_dir}' stopped: {e}")
+            self._abort_member()
+            self.failed = True
+
+    def close(self) -> bool:
+        """
+        Finishes the extraction.
+
+        :return: True if every member was extracted and the end of the archive was reached.
+        :rtype: bool
+        """
+        if not self.finished and not self.failed:
+            self._abort_member()
+            self.failed = True
+        return self.finished and not self.failed
+
+    def _read_local_header(self) -> bool:
+        """Starts the next member, returns False if more data is needed."""
+        if len(self._buffer) < 4:
+            return False
+        signature = bytes(self._buffer[:4])
+        if signature in END_SIGNATURES:
+            self.finished = True
+            return True
+        if signature != LOCAL_HEADER_SIGNATURE:
+            raise ZipStreamError(f"Unexpected signature {signature!r}")
+        if len(self._buffer) < LOCAL_HEADER.size:
+            return False
+
+        (
+            _,
+            _,
+            flags,
+            method,
+            _,
+            _,
+            crc,
+            compress_size,
+            file_size,
+            name_length,
+            extra_length,
+        ) = LOCAL_HEADER.unpack_from(self._buffer)
+        header_size = LOCAL_HEADER.size + name_length + extra_length
+        if len(self._buffer) < header_size:
+            return False
+
+        raw_name = bytes(
+            self._buffer[LOCAL_HEADER.size : LOCAL_HEADER.size + name_length]
+        )
+        name = raw_name.decode("utf-8" if flags & FLAG_UTF8 else "cp437")
+        extra = bytes(self._buffer[LOCAL_HEADER.size + name_length : header_size])
+        del self._buffer[:header_size]
+
+        if flags & FLAG_ENCRYPTED:
+            raise ZipStreamError(f"Encrypted member '{name}' is not supported")
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise ZipStreamError(f"Compression {method} of '{name}' is not supported")
+
+        zip64 = False
+        if compress_size == 0xFFFFFFFF or file_size == 0xFFFFFFFF:
+            file_size, compress_size = _zip64_sizes(extra, file_size, compress_size)
+            zip64 = True
+
+        has_descriptor = bool(flags & FLAG_DATA_DESCRIPTOR)
+        if has_descriptor:
+            info = self.members.get(name)
+            if info is not None:
+                crc, compress_size, file_size = (
+                    info.CRC,
+                    info.compress_size,
+                    info.file_size,
+                )
+            elif method == zipfile.ZIP_STORED:
+                raise ZipStreamError(f"Size of stored member '{name}' is unknown")
+            else:
+                crc = compress_size = file_size = None
+
+        skip = bool(self.member_filter) and (
+            name.endswith("/")
+            or not self.member_filter.matches_name(name)
+            or (
+                file_size is not None and not self.member_filter.matches_size(file_size)
+            )
+        )
+        # A skipped member of known size is passed over without decompression
+        verify = not (skip and compress_size is not None)
+
+        path = member_path(self.target_dir, name)
+        output = None
+        if skip:
+            pass
+        elif name.endswith("/"):
+            path.mkdir(parents=True, exist_ok=True)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            output = open(path, "wb")
+
+        self._member = {
+            "name": name,
+            "path": path,
+            "output": output,
+            "method": method,
+            "crc": crc,
+            "file_size": file_size,
+            "remaining": compress_size,
+            "descriptor": has_descriptor,
+            "zip64": zip64,
+            "skip": skip,
+            "verify": verify,
+            "decompressor": (
+                zlib.decompressobj(-15)
+                if verify and method == zipfile.ZIP_DEFLATED
+                else None
+            ),
+            "written": 0,
+            "running_crc": 0,
+            "md5": hashlib.md5() if output is not None and self.hash_members else None,
+        }
+        return True
+
+    def _read_member_data(self) -> bool:
+        """Extracts the data of the current member, returns False if more data is needed."""
+        member = self._member
+
+        if member["remaining"] is None or member["remaining"] > 0:
+            if not self._buffer:
+                return False
+
+            if member["remaining"] is None:
+                data = bytes(self._buffer)
+                self._buffer.clear()
+            else:
+                size = min(len(self._buffer), member["remaining"])
+                data = bytes(self._buffer[:size])
+                del self._buffer[:size]
+                member["remaining"] -= size
+
+            decompressor = member["decompressor"]
+            if decompressor is None:
+                self._write(data)
+            else:
+                self._write(decompressor.decompress(data))
+                if decompressor.eof:
+                    # Data after the deflate stream belongs to the descriptor or the next member
+                    self._buffer[:0] = decompressor.unused_data
+                    member["remaining"] = 0
+
+            if member["remaining"] is None or member["remaining"] > 0:
+                return True
+
+        if member["descriptor"] and member["crc"] is None:
+            if not self._read_data_descriptor():
+                return False
+        elif member["descriptor"]:
+            if not self._skip_data_descriptor():
+                return False
+
+        self._finish_member()
+        return True
+
+    def _read_data_descriptor(self) -> bool:
+        """Reads CRC and size of the current member from its data descriptor."""
+        size_format = "<LQQ" if self._member["zip64"] else "<LLL"
+        descriptor_size = struct.calcsize(size_format)
+        offset = 4 if self._buffer[:4] == DATA_DESCRIPTOR_SIGNATURE else 0
+        if len(self._buffer) < offset + descriptor_size:
+            return False
+
+        crc, _, file_size = struct.unpack_from(size_format, self._buffer, offset)
+        del self._buffer[: offset + descriptor_size]
+        self._member["crc"] = crc
+        self._member["file_size"] = file_size
+        return True
+
+    def _skip_data_descriptor(self) -> bool:
+        """Skips the data descriptor, whose values are known from the central directory."""
+        descriptor_size = 20 if self._member["zip64"] else 12
+        offset = 4 if self._buffer[:4] == DATA_DESCRIPTOR_SIGNATURE else 0
+        if len(self._buffer) < offset + descriptor_size:
+            return False
+        del self._buffer[: offset + descriptor_size]
+        return True
+
+    def _write(self, data: bytes):
+        """Writes decompressed data of the current member."""
+        member = self._member
+        if not data or not member["verify"]:
+            return
+        member["running_crc"] = zlib.crc32(data, member["running_crc"])
+        member["written"] += len(data)
+        if member["output"] is not None:
+            member["output"].write(data)
+        if member["md5"] is not None:
+            member["md5"].update(data)
+
+    def _finish_member(self):
+        """Closes the current member and checks its CRC and size."""
+        member = self._member
+        if member["decompressor"] is not None and not member["decompressor"].eof:
+            raise ZipStreamError(f"Incomplete deflate stream of '{member['name']}'")
+        if member["output"] is not None:
+            member["output"].close()
+
+        if member["verify"] and (
+            member["running_crc"] != member["crc"]
+            or member["written"] != member["file_size"]
+        ):
+            self._abort_member()
+            raise ZipStreamError(f"Bad CRC-32 for file '{member['name']}'")
+
+        if member["skip"]:
+            self.skipped_bytes += member["file_size"]
+        elif self.member_filter and not self.member_filter.matches_size(
+            member["file_size"]
+        ):
+            # The size of a member with data descriptor is only known at its end
+            self._abort_member()
+            self.skipped_bytes += member["file_size"]
+            return
+        elif member["output"] is not None:
+            self.extracted.append(member["path"])
+            if member["md5"] is not None:
+                self.digests[member["path"]] = member["md5"].hexdigest()
+        self._member = None
+
+    def _abort_member(self):
+        """Deletes the partially extracted current member."""
+        member = self._member
+        self._member = None
+        if member is None or member["output"] is None:
+            return
+        member["output"].close()
+        try:
+            os.remove(member["path"])
+        except OSError:
+            pass
+
+
+def member_path(target_dir: Path, name: str) -> Path:
+    """
+    Returns the extraction path of a member, sanitized like zipfile.ZipFile.extract.
+
+    :param target_dir: The directory the archive is extracted to.
+    :type target_dir: Path
+    :param name: The name of the member in the archive.
+    :type name: str
+    :return: The path below target_dir.
+    :rtype: Path
+    """
+    name = name.replace("\\", "/")
+    parts = [p for p in name.split("/") if p not in ("", ".", "..")]
+    parts = [os.path.splitdrive(p)[1] for p in parts]
+    return Path(target_dir).joinpath(*parts)
+
+
+def _zip64_sizes(extra: bytes, file_size: int, compress_size: int) -> tuple:
+    """Returns the sizes from the zip64 extra field of a local header."""
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack_from("<HH", extra, pos)
+        if header_id == 0x0001:
+            values = list(struct.unpack_from(f"<{size // 8}Q", extra, pos + 4))
+            if file_size == 0xFFFFFFFF and values:
+                file_size = values.pop(0)
+            if compress_size == 0xFFFFFFFF and values:
+                compress_size = values.pop(0)
+            return file_size, compress_size
+        pos += 4 + size
+    raise ZipStreamError("Zip64 sizes without zip64 extra field")
@@ -1 +1,9 @@
 from .Dataset import Dataset
+from .AsyncDataset import AsyncDataset
+from .ContentStore import ContentStore
+from .DatasetBatch import DatasetBatch
+from .DownloadEvent import DownloadEvent
+from .DownloadReport import DownloadReport
+from .EventSink import CallbackSink, EventSink, JsonLinesSink, RichSink
+from .MemberFilter import MemberFilter
+from .SchedulingPolicy import SchedulingPolicy
@@ -2,8 +2,15 @@ import argparse
 import yaml
 from pathlib import Path
 
-from . import Dataset
-from .utils import setup_logging
+from . import Dataset, MemberFilter, SchedulingPolicy
+from .BandwidthLimiter import BandwidthLimiter
+from .ContentStore import LINK_MODES, ContentStore
+from .Dataset import DEFAULT_POOL_SIZE
+from .DatasetBatch import DatasetBatch
+from .DownloadReport import write_json, write_prometheus, write_trace
+from .EventSink import JsonLinesSink, RichSink
+from .TimeoutAdapter import DEFAULT_TIMEOUT
+from .utils import dataset_url, get_logger, parse_size, setup_logging
 
 
 def main():
@@ -13,11 +20,188 @@ def main():
 
     parser = argparse.ArgumentParser(description="Download datasets from DaRUS")
 
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["download", "sync", "verify"],
+        default="download",
+        help="download the files, sync a local copy to the dataset version or verify a local copy (default: download)",
+    )
     parser.add_argument("--config", "-c", help="Config file path (optional)")
-    parser.add_argument("--url", "-u", help="Dataset URL")
+    parser.add_argument(
+        "--url",
+        "-u",
+        nargs="+",
+        help="Dataset URLs or DOIs, several are downloaded in one job to a directory per DOI",
+    )
     parser.add_argument("--path", "-p", help="Download path")
     parser.add_argument("--token", "-t", help="API token")
     parser.add_argument("--files", "-f", nargs="*", help="Specific files to download")
+    parser.add_argument(
+        "--dataset-version",
+        help="Version of the dataset, e.g. 1.2 or :draft (default: latest)",
+    )
+    parser.add_argument(
+        "--removed",
+        choices=["quarantine", "delete", "keep"],
+        help="sync: what happens to files removed from the dataset (default: quarantine)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="sync: only show the added, changed and removed files",
+    )
+    parser.add_argument(
+        "--report", help="Write the report of the download, sync or verify as JSON"
+    )
+    parser.add_argument(
+        "--metrics", help="Write the metrics of the download as Prometheus textfile"
+    )
+    parser.add_argument(
+        "--trace",
+        help="Write the stages of every file as Chrome trace (chrome://tracing, Perfetto)",
+    )
+    parser.add_argument(
+        "--events",
+        help="Append every download event as line of JSON, e.g. for log shippers",
+    )
+    parser.add_argument(
+        "--no-progress",
+        action="store_true",
+        help="Download without progress display and tables, e.g. in batch jobs",
+    )
+    parser.add_argument(
+        "--hash-executor",
+        choices=["thread", "process"],
+        help="verify: pool hashing the files (default: thread)",
+    )
+    parser.add_argument(
+        "--max-workers",
+        "-w",
+        type=int,
+        help="Number of files downloaded concurrently (default: 1)",
+    )
+    parser.add_argument(
+        "--segments",
+        "-s",
+        type=int,
+        help="Number of concurrent byte ranges per large file (default: 1)",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        help="Retries of a file after a dropped connection or transient HTTP error (default: 3)",
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        help="Seconds before the first retry, doubled with every retry (default: 1)",
+    )
+    parser.add_argument(
+        "--timeout",
+        nargs="+",
+        type=float,
+        metavar="SECONDS",
+        help="Seconds to connect and to wait for the next bytes, one value for both or CONNECT READ, 0 waits forever (default: 10 60)",
+    )
+    parser.add_argument(
+        "--no-manifest",
+        action="store_true",
+        help="Download all files again, even if they are verified in the manifest",
+    )
+    parser.add_argument(
+        "--no-space-check",
+        action="store_true",
+        help="Start the download even if the files may not fit on the disk",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Cache the dataset information and revalidate it with conditional requests",
+    )
+    parser.add_argument(
+        "--cache-dir", help="Directory of the metadata cache (default: ~/.cache/darus)"
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Read the dataset information only from the metadata cache",
+    )
+    parser.add_argument(
+        "--bulk-threshold",
+        help="Fetch files up to this size in batches with one request each, e.g. 1MB",
+    )
+    parser.add_argument(
+        "--preallocate",
+        action="store_true",
+        help="Allocate each file with its final size before writing to avoid fragmentation",
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=["metadata", "largest", "smallest", "interleave"],
+        help="Order the files are started in (default: metadata)",
+    )
+    parser.add_argument(
+        "--priority",
+        nargs="+",
+        help="Priorities of files or directories, higher first, e.g. 'docs=2' '*.h5=1'",
+    )
+    parser.add_argument(
+        "--limit-rate",
+        help="Combined rate of all concurrent downloads, e.g. 10MB/s (default: unlimited)",
+    )
+    parser.add_argument(
+        "--limit-schedule",
+        nargs="+",
+        help="Rates for times of day overriding --limit-rate, e.g. '08:00-18:00=5MB/s'",
+    )
+    parser.add_argument(
+        "--store",
+        help="Content store shared by datasets, files already in it are linked instead of downloaded",
+    )
+    parser.add_argument(
+        "--store-link",
+        choices=LINK_MODES,
+        help="How files are created from the content store (default: hardlink)",
+    )
+    parser.add_argument(
+        "--stream-extract",
+        action="store_true",
+        help="Extract ZIP archives while they are downloaded",
+    )
+    parser.add_argument(
+        "--extract-workers",
+        "-x",
+        type=int,
+        help="Number of members of a ZIP archive extracted concurrently (default: 1)",
+    )
+    parser.add_argument(
+        "--extract-executor",
+        choices=["thread", "process"],
+        help="Pool extracting the members (default: thread)",
+    )
+    parser.add_argument(
+        "--virtual",
+        action="store_true",
+        help="Keep ZIP archives to read them in place instead of extracting them",
+    )
+    parser.add_argument(
+        "--include",
+        nargs="+",
+        help="Extract only ZIP members matching one of these globs, e.g. '*.h5'",
+    )
+    parser.add_argument(
+        "--exclude", nargs="+", help="Skip ZIP members matching one of these globs"
+    )
+    parser.add_argument(
+        "--member-regex", help="Extract only ZIP members whose name matches the regex"
+    )
+    parser.add_argument(
+        "--min-member-size", help="Skip ZIP members smaller than this, e.g. 1MB"
+    )
+    parser.add_argument(
+        "--max-member-size", help="Skip ZIP members larger than this, e.g. 10GB"
+    )
 
     args = parser.parse_args()
 
@@ -28,18 +212,253 @@ def main():
             config = yaml.safe_load(config_file.read()) or {}
 
     # Override with CLI arguments if provided
-    url = args.url or config.get("url")
+    # Several datasets from the command line or the config file, each with own path and files
+    if args.url:
+        jobs = [{"url": url} for url in args.url]
+    elif config.get("datasets"):
+        jobs = [
+            {"url": job} if isinstance(job, str) else job for job in config["datasets"]
+        ]
+    else:
+        jobs = [{"url": config["url"]}] if config.get("url") else []
     path = args.path or config.get("path", "./data")
     api_token = args.token or config.get("api_token")
     files = args.files if args.files is not None else config.get("files")
+    version = args.dataset_version or config.get("version") or None
+    removed = args.removed or config.get("removed", "quarantine")
+    max_workers = args.max_workers or config.get("max_workers", 1)
+    segments = args.segments or config.get("segments", 1)
+    retries = args.retries if args.retries is not None else config.get("retries", 3)
+    backoff = args.backoff if args.backoff is not None else config.get("backoff", 1.0)
+    timeout = args.timeout if args.timeout is not None else config.get("timeout")
+    use_manifest = not args.no_manifest and config.get("use_manifest", True)
+    check_space = not args.no_space_check and config.get("check_space", True)
+    cache = args.cache or config.get("cache", False)
+    cache_dir = args.cache_dir or config.get("cache_dir")
+    offline = args.offline or config.get("offline", False)
+    stream_extract = args.stream_extract or config.get("stream_extract", False)
+    virtual = args.virtual or config.get("virtual", False)
+    preallocate = args.preallocate or config.get("preallocate", False)
+    bulk_threshold = args.bulk_threshold or config.get("bulk_threshold") or None
+    extract_workers = args.extract_workers or config.get("extract_workers", 1)
+    extract_executor = args.extract_executor or config.get("extract_executor", "thread")
 
-    if not url:
+    if not jobs:
         parser.error("URL is required. Provide it via --url or in config file.")
+    if any(not isinstance(job, dict) or not job.get("url") for job in jobs):
+        parser.error("Every dataset in the config file needs a url.")
+    batch = len(jobs) > 1 or set(jobs[0]) != {"url"}
+    if batch and args.files is not None:
+        parser.error(
+            "--files needs a single dataset, give the files per dataset in the config file."
+        )
+    if removed not in ("quarantine", "delete", "keep"):
+        parser.error("--removed must be 'quarantine', 'delete' or 'keep'.")
+    if max_workers < 1:
+        parser.error("--max-workers must be at least 1.")
+    if segments < 1:
+        parser.error("--segments must be at least 1.")
+    if retries < 0:
+        parser.error("--retries must not be negative.")
+    if backoff < 0:
+        parser.error("--backoff must not be negative.")
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
+    else:
+        values = timeout if isinstance(timeout, (list, tuple)) else [timeout]
+        if not 1 <= len(values) <= 2 or any(v < 0 for v in values):
+            parser.error("--timeout takes one or two non-negative values.")
+        # A single value is used for both, 0 waits forever
+        values = [v or None for v in values]
+        timeout = values[0] if len(values) == 1 else tuple(values)
+    if extract_workers < 1:
+        parser.error("--extract-workers must be at least 1.")
+    if extract_executor not in ("thread", "process"):
+        parser.error("--extract-executor must be 'thread' or 'process'.")
+
+    try:
+        member_filter = MemberFilter(
+            include=args.include or config.get("include"),
+            exclude=args.exclude or config.get("exclude"),
+            regex=args.member_regex or config.get("member_regex"),
+            min_size=args.min_member_size or config.get("min_member_size"),
+            max_size=args.max_member_size or config.get("max_member_size"),
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    if bulk_threshold is not None:
+        try:
+            parse_size(bulk_threshold)
+        except ValueError as e:
+            parser.error(str(e))
+
+    priorities = config.get("priorities") or {}
+    if args.priority:
+        priorities = {}
+        for entry in args.priority:
+            pattern, sep, priority = entry.rpartition("=")
+            if not sep or not pattern:
+                parser.error(f"Invalid priority {entry!r}, expected e.g. 'docs=2'.")
+            priorities[pattern] = priority
+    try:
+        schedule = SchedulingPolicy(
+            args.schedule or config.get("schedule") or "metadata", priorities
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    limit_rate = args.limit_rate or config.get("limit_rate")
+    limit_schedule = args.limit_schedule or config.get("limit_schedule")
+    limiter = None
+    if limit_rate or limit_schedule:
+        try:
+            limiter = BandwidthLimiter(limit_rate, schedule=limit_schedule)
+        except ValueError as e:
+            parser.error(str(e))
+
+    store = args.store or config.get("store") or None
+    if store:
+        try:
+            store = ContentStore(
+                store, link=args.store_link or config.get("store_link", "hardlink")
+            )
+        except ValueError as e:
+            parser.error(str(e))
+
+    options = dict(
+        remove_after_pp=not virtual,
+        segments=segments,
+        retries=retries,
+        backoff=backoff,
+        use_manifest=use_manifest,
+        check_space=check_space,
+        stream_extract=stream_extract,
+        extract_workers=extract_workers,
+        extract_executor=extract_executor,
+        member_filter=member_filter,
+        virtual=virtual,
+        bulk_threshold=bulk_threshold,
+        preallocate=preallocate,
+        schedule=schedule,
+        store=store,
+    )
+    if args.command == "sync":
+        options.update(removed=removed, dry_run=args.dry_run)
+    report = args.report or config.get("report") or None
+    metrics = args.metrics or config.get("metrics") or None
+    trace = args.trace or config.get("trace") or None
+    show_progress = not args.no_progress and config.get("progress", True)
+    events = args.events or config.get("events") or None
+    event_log = None
+    if args.command != "verify" and (events or not show_progress):
+        # The display is one sink among others, without it the download runs headless
+        sinks = [RichSink(label_datasets=batch)] if show_progress else []
+        if events:
+            try:
+                event_log = JsonLinesSink(events)
+            except OSError as e:
+                parser.error(f"Could not open '{events}': {e}")
+            sinks.append(event_log)
+        options.update(sinks=sinks)
+    if args.command == "verify":
+        options = dict(
+            executor=args.hash_executor or config.get("hash_executor", "thread"),
+            use_manifest=use_manifest,
+            report=report,
+            progress=show_progress,
+        )
+
+    # Keep a connection alive for every concurrent request
+    pool_size = max(DEFAULT_POOL_SIZE, max_workers * segments)
+    if batch:
+        try:
+            datasets = DatasetBatch(
+                jobs,
+                api_token=api_token if api_token else None,
+                pool_size=pool_size,
+                timeout=timeout,
+                cache=cache,
+                cache_dir=cache_dir,
+                offline=offline,
+                version=version,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        if args.command == "verify":
+            _exit_on_damage(datasets.verify(path, workers=max_workers, **options))
+            return
+        try:
+            results = getattr(datasets, args.command)(
+                path, max_workers=max_workers, bandwidth_limit=limiter, **options
+            )
+        finally:
+            if event_log is not None:
+                event_log.close()
+        _export(results, args.command, report, metrics, trace)
+        return
 
     # Create dataset and download
-    dl = Dataset(url, api_token=api_token if api_token else None)
-    dl.summary()
-    dl.download(path, files=files)
+    dl = Dataset(
+        dataset_url(jobs[0]["url"]),
+        api_token=api_token if api_token else None,
+        pool_size=pool_size,
+        timeout=timeout,
+        cache=cache,
+        cache_dir=cache_dir,
+        offline=offline,
+        version=version,
+    )
+    if show_progress:
+        dl.summary()
+    if args.command == "verify":
+        _exit_on_damage([dl.verify(path, files=files, workers=max_workers, **options)])
+        return
+    try:
+        result = getattr(dl, args.command)(
+            path,
+            files=files,
+            max_workers=max_workers,
+            bandwidth_limit=limiter,
+            **options,
+        )
+    finally:
+        if event_log is not None:
+            event_log.close()
+    _export([result], args.command, report, metrics, trace)
+
+
+def _exit_on_damage(results: list):
+    """Exits with status 1 if a local copy is missing, or has corrupt or missing files."""
+    if any(
+        result is None or result["corrupt"] or result["missing"] for result in results
+    ):
+        raise SystemExit(1)
+
+
+def _export(
+    results: list,
+    command: str,
+    report: str = None,
+    metrics: str = None,
+    trace: str = None,
+):
+    """Writes the DownloadReports of a download or sync to the requested files."""
+    if command == "sync":
+        results = [result["report"] for result in results if result is not None]
+    reports = [result for result in results if result is not None]
+    if not reports:
+        return
+    for file, write in (
+        (report, write_json),
+        (metrics, write_prometheus),
+        (trace, write_trace),
+    ):
+        if file:
+            try:
+                write(reports, file)
+            except OSError as e:
+                logger = get_logger(__name__)
+                logger.error(f"Could not write '{file}': {e}")
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 import logging
+import re
 from pathlib import Path
 
 
@@ -75,3 +76,67 @@ def dir_exists(path: str, interactive: bool = True) -> bool:
             logger.error(f"An error occurred while creating the directory: {e}")
 
     return path_obj.is_dir()
+
+
+# Factors of the size units, decimal like humanize.naturalsize and binary (KiB, MiB, ...)
+SIZE_UNITS = {
+    "": 1,
+    "b": 1,
+    "k": 10**3,
+    "kb": 10**3,
+    "kib": 2**10,
+    "m": 10**6,
+    "mb": 10**6,
+    "mib": 2**20,
+    "g": 10**9,
+    "gb": 10**9,
+    "gib": 2**30,
+    "t": 10**12,
+    "tb": 10**12,
+    "tib": 2**40,
+}
+
+
+def parse_size(size) -> int:
+    """
+    Parses a size in bytes, e.g. 1024, "500 MB" or "1.5GiB".
+
+    :param size: The size as number of bytes or string with unit.
+    :type size: int or str
+    :return: The size in bytes.
+    :rtype: int
+
+    :raise ValueError: If the size can't be parsed.
+    """
+    if isinstance(size, (int, float)):
+        return int(size)
+
+    match = re.fullmatch(r"\s*(\d+(?:\.\d*)?|\.\d+)\s*([a-zA-Z]*)\s*", str(size))
+    if not match or match.group(2).lower() not in SIZE_UNITS:
+        raise ValueError(
+            f"Invalid size {size!r}, expected e.g. 1024, '500MB' or '2GiB'."
+        )
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+DEFAULT_SERVER = "https://darus.uni-stuttgart.de"  # Server of datasets given by DOI
+
+
+def dataset_url(reference: str, server: str = DEFAULT_SERVER) -> str:
+    """
+    Returns the url of a dataset given by url or DOI, e.g. "doi:10.18419/DARUS-4801".
+
+    :param reference: The url or DOI of the dataset.
+    :type reference: str
+    :param server: The Dataverse server of a DOI. [Default: DEFAULT_SERVER]
+    :type server: str
+    :return: The url of the dataset.
+    :rtype: str
+    """
+    reference = reference.strip()
+    match = re.fullmatch(
+        r"(?:doi:|https?://(?:dx\.)?doi\.org/)?(10\.\d+/\S+)", reference, re.IGNORECASE
+    )
+    if match is None:
+        return reference
+    return f"{server.rstrip('/')}/dataset.xhtml?persistentId=doi:{match.group(1)}"
@@ -47,13 +47,17 @@ setup(
         "pyyaml>=5.4.0",
     ],
     extras_require={
+        "async": [
+            "httpx>=0.23.0",  # AsyncDataset
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-cov>=4.0.0",
             "pytest-mock>=3.10.0",
             "responses>=0.23.0",
+            "httpx>=0.23.0",
             "black>=23.0.0",
-        ]
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -1,6 +1,8 @@
+import hashlib
 import pytest
 import tempfile
 from pathlib import Path
+from darus.DatasetFile import DatasetFile
 from tests.fixtures.test_data import (
     DEMO_SERVER_URL,
     DEMO_DATASET_URLS,
@@ -34,6 +36,50 @@ def mock_file_info():
     return MOCK_FILE_INFO
 
 
+@pytest.fixture
+def make_dataset_file(temp_dir):
+    """Factory of DatasetFile objects whose size and MD5 match content, files named *.zip are ZIP archives."""
+
+    def make(
+        content: bytes = b"",
+        name: str = "test.bin",
+        file_id: int = 12345,
+        checksum: str = None,
+        sub_dir: str = None,
+        local: bool = False,
+    ) -> DatasetFile:
+        """
+        Creates a DatasetFile of content.
+
+        :param content: The content of the file. [Default: b""]
+        :param name: The filename. [Default: "test.bin"]
+        :param file_id: The file id. [Default: 12345]
+        :param checksum: The MD5, overriding the one of content. [Default: None]
+        :param sub_dir: The directory label. [Default: None]
+        :param local: Indicates if content is written to temp_dir as the downloaded file. [Default: False]
+        """
+        file_info = {
+            "dataFile": {
+                "id": file_id,
+                "persistentId": f"doi:10.70122/FK2/{file_id}",
+                "filename": name,
+                "filesize": len(content),
+                "checksum": {"value": checksum or hashlib.md5(content).hexdigest()},
+            }
+        }
+        if name.endswith(".zip"):
+            file_info["dataFile"]["friendlyType"] = "ZIP Archive"
+        if sub_dir:
+            file_info["directoryLabel"] = sub_dir
+        file = DatasetFile(file_info, DEMO_SERVER_URL)
+        if local:
+            file.file_path = temp_dir / name
+            file.file_path.write_bytes(content)
+        return file
+
+    return make
+
+
 @pytest.fixture
 def invalid_url():
     """Invalid URL for negative testing."""
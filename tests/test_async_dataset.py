@@ -0,0 +1,265 @@
+"""Unit tests for the AsyncDataset and AsyncDatasetFile classes."""
+
+import asyncio
+import hashlib
+import pytest
+import threading
+from unittest.mock import patch
+
+httpx = pytest.importorskip("httpx")
+
+import darus.AsyncDatasetFile
+from darus import AsyncDataset, Dataset, DownloadEvent
+from darus.AsyncDatasetFile import AsyncDatasetFile
+from tests import test_dataset
+
+FILE_CONTENT = b"col1,col2\nval1,val2\n"
+
+
+def _dataset_response():
+    """Dataset response whose first file matches FILE_CONTENT."""
+    response = test_dataset.TestDatasetDownload._mock_dataset_response()
+    data_file = response["data"]["latestVersion"]["files"][0]["dataFile"]
+    data_file["checksum"]["value"] = hashlib.md5(FILE_CONTENT).hexdigest()
+    return response
+
+
+def _transport(requests_seen=None):
+    """Mock transport serving the dataset api and the first file with range support."""
+
+    def handler(request):
+        if requests_seen is not None:
+            requests_seen.append(request)
+        if request.url.path == "/api/datasets/:persistentId/":
+            return httpx.Response(200, json=_dataset_response())
+        if request.url.path == "/api/access/datafile/12345/":
+            byte_range = request.headers.get("Range")
+            if byte_range:
+                start = int(byte_range.split("=")[1].rstrip("-"))
+                return httpx.Response(
+                    206,
+                    headers={
+                        "Content-Range": f"bytes {start}-{len(FILE_CONTENT) - 1}/{len(FILE_CONTENT)}"
+                    },
+                    content=FILE_CONTENT[start:],
+                )
+            return httpx.Response(200, content=FILE_CONTENT)
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+
+class TestAsyncDatasetInformation:
+    """Test the async metadata fetch."""
+
+    def test_load_parses_like_sync_dataset(self, demo_dataset_urls):
+        """Test load() shares the metadata parsing of Dataset."""
+
+        async def run():
+            async with AsyncDataset(demo_dataset_urls[0], transport=_transport()) as ds:
+                return ds
+
+        ds = asyncio.run(run())
+
+        assert ds.persistent_id == "doi:10.70122/FK2/TEST"
+        assert ds.title == "Test Dataset"
+        assert len(ds.download_files) == 2
+        assert all(isinstance(f, AsyncDatasetFile) for f in ds.download_files)
+
+    def test_inherited_methods(self, demo_dataset_urls):
+        """Test the public methods shared with Dataset work, the session based ones are not inherited."""
+
+        async def run():
+            async with AsyncDataset(demo_dataset_urls[0], transport=_transport()) as ds:
+                return ds
+
+        ds = asyncio.run(run())
+
+        with patch("rich.console.Console.print") as mock_print:
+            ds.summary()
+        assert mock_print.call_count == 2
+        assert ds.format_datetime("2024-01-01T12:00:00Z") == "2024-01-01 12:00:00"
+        assert not isinstance(ds, Dataset)
+        for name in ("sync", "verify", "check_disk_space"):
+            assert not hasattr(ds, name)
+        with pytest.raises(TypeError, match="aclose"):
+            ds.close()
+
+    def test_http_error_handling(self, demo_dataset_urls, caplog):
+        """Test handling of HTTP errors."""
+        transport = httpx.MockTransport(lambda request: httpx.Response(404))
+
+        async def run():
+            async with AsyncDataset(demo_dataset_urls[0], transport=transport) as ds:
+                return ds
+
+        ds = asyncio.run(run())
+
+        assert len(ds.download_files) == 0
+        assert "error occurred while trying to access dataset" in caplog.text.lower()
+
+    def test_api_token_header(self, demo_dataset_urls):
+        """Test the API token is sent with the requests."""
+        requests_seen = []
+
+        async def run():
+            async with AsyncDataset(
+                demo_dataset_urls[0],
+                api_token="test-token-123",
+                transport=_transport(requests_seen),
+            ):
+                pass
+
+        asyncio.run(run())
+
+        assert requests_seen[0].headers["X-Dataverse-key"] == "test-token-123"
+
+
+class TestAsyncDatasetDownload:
+    """Test the async download."""
+
+    def test_events(self, demo_dataset_urls, temp_dir):
+        """Test events() yields progress and the verification of a file."""
+
+        async def run():
+            async with AsyncDataset(demo_dataset_urls[0], transport=_transport()) as ds:
+                return [e async for e in ds.events(temp_dir, files=["metadata.tab"])]
+
+        events = asyncio.run(run())
+        kinds = [e.kind for e in events]
+
+        assert kinds[0] == DownloadEvent.STARTED
+        assert DownloadEvent.PROGRESS in kinds
+        assert kinds[-1] == DownloadEvent.VERIFIED
+        assert (temp_dir / "metadata.csv").read_bytes() == FILE_CONTENT
+
+    def test_download_skips_verified_files(self, demo_dataset_urls, temp_dir):
+        """Test a second download skips the file recorded in the manifest."""
+
+        async def run():
+            async with AsyncDataset(demo_dataset_urls[0], transport=_transport()) as ds:
+                await ds.download(temp_dir, files=["metadata.tab"])
+                return [e async for e in ds.events(temp_dir, files=["metadata.tab"])]
+
+        events = asyncio.run(run())
+
+        assert [e.kind for e in events] == [DownloadEvent.SKIPPED]
+
+    def test_wrong_hash_fails(self, demo_dataset_urls, temp_dir):
+        """Test a file with a wrong hash emits a failed event."""
+
+        async def run():
+            async with AsyncDataset(demo_dataset_urls[0], transport=_transport()) as ds:
+                ds.download_files[0]._DatasetFile__hash = "wrong"
+                return [e async for e in ds.events(temp_dir, files=["metadata.tab"])]
+
+        events = asyncio.run(run())
+
+        assert events[-1].kind == DownloadEvent.FAILED
+        assert events[-1].message == "wrong hash value"
+
+
+class TestAsyncDatasetFileDownload:
+    """Test the async file download."""
+
+    def test_resumes_part_file(self, temp_dir, mock_file_info):
+        """Test the async download continues a .part file with a range request."""
+        requests_seen = []
+        file_info = dict(mock_file_info)
+        file_info["dataFile"] = dict(mock_file_info["dataFile"], id=12345)
+        f = AsyncDatasetFile(file_info, "https://demo.dataverse.org")
+        part_path = f.get_file_path(temp_dir).with_name("test_file.txt.part")
+        part_path.parent.mkdir(parents=True)
+        part_path.write_bytes(FILE_CONTENT[:5])
+
+        async def run():
+            async with httpx.AsyncClient(transport=_transport(requests_seen)) as client:
+                return [size async for size in f.download(temp_dir, client=client)]
+
+        progress = asyncio.run(run())
+
+        assert requests_seen[0].headers["Range"] == "bytes=5-"
+        assert progress[0] == 5
+        assert f.file_path.read_bytes() == FILE_CONTENT
+        assert f._digest == hashlib.md5(FILE_CONTENT).hexdigest()
+
+    @pytest.mark.parametrize(
+        "part, expected_requests", [(FILE_CONTENT, 0), (FILE_CONTENT[::-1], 1)]
+    )
+    def test_complete_part_file(
+        self, temp_dir, mock_file_info, part, expected_requests
+    ):
+        """Test a complete .part file is validated instead of requesting the range after its end."""
+        requests_seen = []
+        file_info = dict(mock_file_info)
+        file_info["dataFile"] = dict(
+            mock_file_info["dataFile"],
+            id=12345,
+            filesize=len(FILE_CONTENT),
+            checksum={"value": hashlib.md5(FILE_CONTENT).hexdigest()},
+        )
+        f = AsyncDatasetFile(file_info, "https://demo.dataverse.org")
+        part_path = f.get_file_path(temp_dir).with_name("test_file.txt.part")
+        part_path.parent.mkdir(parents=True)
+        part_path.write_bytes(part)
+
+        async def run():
+            async with httpx.AsyncClient(transport=_transport(requests_seen)) as client:
+                return [size async for size in f.download(temp_dir, client=client)]
+
+        progress = asyncio.run(run())
+
+        # A corrupt .part file is downloaded again from the start
+        assert len(requests_seen) == expected_requests
+        assert all("Range" not in request.headers for request in requests_seen)
+        assert progress[-1] == len(FILE_CONTENT)
+        assert f.file_path.read_bytes() == FILE_CONTENT
+        assert f._digest == hashlib.md5(FILE_CONTENT).hexdigest()
+
+    def test_writes_off_the_event_loop(self, temp_dir, mock_file_info):
+        """Test the chunks are written and hashed on a worker thread, not on the event loop."""
+        file_info = dict(mock_file_info)
+        file_info["dataFile"] = dict(mock_file_info["dataFile"], id=12345)
+        f = AsyncDatasetFile(file_info, "https://demo.dataverse.org")
+        threads = []
+        write_chunk = darus.AsyncDatasetFile._write_chunk
+
+        def record(*args):
+            threads.append(threading.get_ident())
+            write_chunk(*args)
+
+        async def run():
+            async with httpx.AsyncClient(transport=_transport()) as client:
+                return [size async for size in f.download(temp_dir, client=client)]
+
+        with patch("darus.AsyncDatasetFile._write_chunk", side_effect=record):
+            asyncio.run(run())
+
+        assert threads and threading.get_ident() not in threads
+        assert f.file_path.read_bytes() == FILE_CONTENT
+        assert f._digest == hashlib.md5(FILE_CONTENT).hexdigest()
+
+    def test_writes_are_buffered(self, temp_dir, mock_file_info):
+        """Test the chunks are collected up to ASYNC_WRITE_SIZE per executor call."""
+        file_info = dict(mock_file_info)
+        file_info["dataFile"] = dict(mock_file_info["dataFile"], id=12345)
+        f = AsyncDatasetFile(file_info, "https://demo.dataverse.org")
+
+        async def run():
+            async with httpx.AsyncClient(transport=_transport()) as client:
+                return [
+                    size
+                    async for size in f.download(temp_dir, client=client, chunk_size=4)
+                ]
+
+        with patch("darus.AsyncDatasetFile.ASYNC_WRITE_SIZE", 8), patch(
+            "darus.AsyncDatasetFile._write_chunk",
+            wraps=darus.AsyncDatasetFile._write_chunk,
+        ) as write_chunk:
+            progress = asyncio.run(run())
+
+        # 20 bytes in chunks of 4 are written as 8, 8 and the remaining 4
+        assert [len(call.args[2]) for call in write_chunk.call_args_list] == [8, 8, 4]
+        assert progress == [4, 8, 12, 16, 20]
+        assert f.file_path.read_bytes() == FILE_CONTENT
+        assert f._digest == hashlib.md5(FILE_CONTENT).hexdigest()
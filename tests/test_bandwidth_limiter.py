@@ -0,0 +1,76 @@
+"""Unit tests for the BandwidthLimiter class."""
+
+import pytest
+import responses
+from datetime import datetime
+from unittest.mock import patch
+
+from darus.BandwidthLimiter import BandwidthLimiter
+from darus.DatasetFile import DatasetFile
+
+
+class TestBandwidthLimiter:
+    """Test suite for the token bucket and its schedule."""
+
+    def test_parse_rate(self):
+        """Test rates with units and a per second suffix."""
+        assert BandwidthLimiter("10MB/s").rate == 10_000_000
+        assert BandwidthLimiter("1MiB").rate == 1024**2
+        assert BandwidthLimiter(500).rate == 500
+        assert BandwidthLimiter().rate == 0
+
+    def test_invalid_rate(self):
+        """Test that invalid rates and schedules are rejected."""
+        with pytest.raises(ValueError):
+            BandwidthLimiter("fast")
+        with pytest.raises(ValueError):
+            BandwidthLimiter(schedule=["08:00=5MB"])
+        with pytest.raises(ValueError):
+            BandwidthLimiter(schedule=["8-18=5MB"])
+
+    def test_schedule(self):
+        """Test that schedule windows override the rate, also across midnight."""
+        limiter = BandwidthLimiter(
+            "50MB/s",
+            schedule=["08:00-18:00=5MB/s", ("22:00", "02:00", "1MB")],
+        )
+        assert limiter.current_rate(datetime(2024, 1, 1, 12, 0)) == 5_000_000
+        assert limiter.current_rate(datetime(2024, 1, 1, 18, 0)) == 50_000_000
+        assert limiter.current_rate(datetime(2024, 1, 1, 23, 30)) == 1_000_000
+        assert limiter.current_rate(datetime(2024, 1, 1, 1, 59)) == 1_000_000
+        assert limiter.current_rate(datetime(2024, 1, 1, 2, 0)) == 50_000_000
+
+    def test_reserve(self):
+        """Test that the delay pays the bytes beyond the burst with the rate."""
+        limiter = BandwidthLimiter(1000)
+        with patch("darus.BandwidthLimiter.time.monotonic", return_value=100.0):
+            # The bucket starts full with one second of tokens
+            assert limiter.reserve(1000) == 0.0
+            assert limiter.reserve(500) == pytest.approx(0.5)
+            assert limiter.reserve(500) == pytest.approx(1.0)
+        with patch("darus.BandwidthLimiter.time.monotonic", return_value=102.0):
+            # Refilled by two seconds, the debt is paid
+            assert limiter.reserve(1000) == pytest.approx(0.0)
+
+    def test_unlimited(self):
+        """Test that an unlimited limiter never waits."""
+        limiter = BandwidthLimiter(schedule=["00:00-24:00=0"])
+        assert limiter.reserve(10**12) == 0.0
+        assert str(limiter) == "unlimited"
+
+    def test_download_consumes(self, mock_file_info, temp_dir):
+        """Test that every received chunk is taken from the limiter."""
+        server_url = "https://demo.dataverse.org"
+        content = b"x" * 1000
+        file = DatasetFile(mock_file_info, server_url)
+        limiter = BandwidthLimiter(10**9)
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                f"{server_url}/api/access/datafile/98765/",
+                body=content,
+                status=200,
+            )
+            with patch.object(limiter, "consume", wraps=limiter.consume) as consume:
+                list(file.download(temp_dir, limiter=limiter))
+        assert sum(call.args[0] for call in consume.call_args_list) == len(content)
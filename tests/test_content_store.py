@@ -0,0 +1,151 @@
+"""Unit tests for the ContentStore class."""
+
+import hashlib
+import os
+import pytest
+import re
+import responses
+from unittest.mock import patch
+
+from darus import ContentStore, Dataset
+from darus.DatasetFile import DatasetFile
+from tests import test_dataset
+
+CONTENT = b"shared content"
+CHECKSUM = hashlib.md5(CONTENT).hexdigest()
+
+
+class TestContentStore:
+    """Test suite for adding and linking blobs."""
+
+    @pytest.fixture
+    def source(self, temp_dir):
+        source = temp_dir / "a" / "file.bin"
+        source.parent.mkdir()
+        source.write_bytes(CONTENT)
+        return source
+
+    def test_blob_path(self, temp_dir):
+        """Test that blobs are sharded by the first two characters of the checksum."""
+        store = ContentStore(temp_dir / "store")
+        assert store.blob_path(CHECKSUM.upper()) == (
+            temp_dir / "store" / "objects" / CHECKSUM[:2] / CHECKSUM[2:]
+        )
+        assert store.get(CHECKSUM) is None
+
+    def test_invalid_link(self, temp_dir):
+        """Test that an unknown link mode is rejected."""
+        with pytest.raises(ValueError):
+            ContentStore(temp_dir, link="junction")
+
+    def test_hardlink(self, temp_dir, source):
+        """Test that a materialized file shares the inode of the blob."""
+        store = ContentStore(temp_dir / "store")
+        assert store.add(CHECKSUM, source)
+        target = temp_dir / "b" / "file.bin"
+        assert store.materialize(CHECKSUM, target)
+        assert target.read_bytes() == CONTENT
+        assert os.stat(target).st_ino == os.stat(store.get(CHECKSUM)).st_ino
+        assert os.stat(source).st_ino == os.stat(target).st_ino
+
+    def test_symlink(self, temp_dir, source):
+        """Test that the added file is replaced by a link to the blob."""
+        store = ContentStore(temp_dir / "store", link="symlink")
+        assert store.add(CHECKSUM, source)
+        assert source.is_symlink()
+        assert source.resolve() == store.get(CHECKSUM).resolve()
+        assert source.read_bytes() == CONTENT
+
+    def test_copy(self, temp_dir, source):
+        """Test that copies are independent of the blob."""
+        store = ContentStore(temp_dir / "store", link="copy")
+        assert store.add(CHECKSUM, source)
+        target = temp_dir / "b" / "file.bin"
+        assert store.materialize(CHECKSUM, target)
+        target.write_bytes(b"changed")
+        assert store.get(CHECKSUM).read_bytes() == CONTENT
+
+    def test_link_falls_back_to_copy(self, temp_dir, source):
+        """Test that a hardlink across filesystems is replaced by a copy."""
+        store = ContentStore(temp_dir / "store")
+        with patch("darus.ContentStore.os.link", side_effect=OSError("EXDEV")):
+            assert store.add(CHECKSUM, source)
+        assert os.stat(source).st_ino != os.stat(store.get(CHECKSUM)).st_ino
+        assert store.get(CHECKSUM).read_bytes() == CONTENT
+
+    def test_modified_blob_is_dropped(self, temp_dir, source):
+        """Test that a blob changed through a hardlinked file is removed instead of linked."""
+        store = ContentStore(temp_dir / "store")
+        assert store.add(CHECKSUM, source)
+        with open(source, "r+b") as f:
+            f.write(b"SHARED")
+
+        store = ContentStore(temp_dir / "store")
+        assert not store.materialize(CHECKSUM, temp_dir / "b" / "file.bin")
+        assert store.get(CHECKSUM) is None
+        assert not (temp_dir / "b" / "file.bin").exists()
+
+    def test_file_download_from_store(self, mock_file_info, temp_dir):
+        """Test that a file in the store is linked without a request."""
+        server_url = "https://demo.dataverse.org"
+        store = ContentStore(temp_dir / "store")
+        empty = temp_dir / "empty"
+        empty.write_bytes(b"")
+        file = DatasetFile(mock_file_info, server_url)
+        store.add(file.get_checksum(), empty)
+
+        with responses.RequestsMock():
+            list(file.download(temp_dir / "data", store=store))
+
+        assert file.from_store
+        assert file.validate()
+        assert file.file_path == temp_dir / "data" / "test_dir" / "test_file.txt"
+
+    @staticmethod
+    def _dataset(url) -> Dataset:
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=test_dataset.TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+            return Dataset(url)
+
+    def test_dataset_download_shares_store(self, demo_dataset_urls, temp_dir):
+        """Test that a file downloaded to one path is linked into another."""
+        dataset = self._dataset(demo_dataset_urls[0])
+
+        store = ContentStore(temp_dir / "store")
+        (temp_dir / "a").mkdir()
+        (temp_dir / "b").mkdir()
+        with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+            rsps.add(
+                responses.GET,
+                re.compile(r".*/api/access/datafile/12345.*"),
+                body=b"",
+                status=200,
+            )
+            with patch("rich.console.Console.print"):
+                result = dataset.download(
+                    temp_dir / "a", files=["metadata.tab"], store=store
+                )
+            downloads = len(rsps.calls)
+
+        assert result["done"] == 1
+        assert downloads == 1
+        checksum = dataset.download_files[0].get_checksum()
+        assert store.get(checksum) is not None
+
+        # Another path links the stored file, without any request
+        dataset = self._dataset(demo_dataset_urls[0])
+        with responses.RequestsMock(), patch("rich.console.Console.print"):
+            result = dataset.download(
+                temp_dir / "b", files=["metadata.tab"], store=store
+            )
+
+        assert result["done"] == 1
+        assert dataset.download_files[0].from_store
+        assert os.stat(temp_dir / "b" / "metadata.csv").st_ino == (
+            os.stat(store.get(checksum)).st_ino
+        )
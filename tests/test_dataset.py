@@ -1,14 +1,23 @@
 """Unit tests for the Dataset class."""
 
+import hashlib
+import io
 import json
 import logging
 import pytest
+import requests
 import responses
+import warnings
+import zipfile
 from unittest.mock import patch, MagicMock
 from pathlib import Path
 
-from darus import Dataset
+from darus import Dataset, DownloadEvent
+from darus.EventSink import progress_display
 from darus.DatasetFile import DatasetFile
+from darus.Manifest import Manifest
+from darus.ContentStore import ContentStore
+from darus.MemberFilter import MemberFilter
 
 
 class TestDatasetInitialization:
@@ -74,6 +83,62 @@ class TestDatasetInitialization:
 
             assert dataset.header is None
 
+    def test_api_token_set_once_on_session(self, demo_dataset_urls):
+        """Test the API token is part of the owned session."""
+        url = demo_dataset_urls[0]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+
+            dataset = Dataset(url, api_token="test-token-123")
+
+            assert dataset.session.headers["X-Dataverse-key"] == "test-token-123"
+            assert rsps.calls[0].request.headers["X-Dataverse-key"] == "test-token-123"
+
+    def test_shared_session_gets_token_per_request(self, demo_dataset_urls):
+        """Test a shared session is not modified by the dataset."""
+        url = demo_dataset_urls[0]
+        session = requests.Session()
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+
+            dataset = Dataset(url, api_token="test-token-123", session=session)
+
+            assert dataset.session is session
+            assert "X-Dataverse-key" not in session.headers
+            assert rsps.calls[0].request.headers["X-Dataverse-key"] == "test-token-123"
+
+    def test_pool_size_and_adapter(self, demo_dataset_urls):
+        """Test the connection pool is sized with a timeout and a custom adapter is mounted."""
+        url = demo_dataset_urls[0]
+        adapter = requests.adapters.HTTPAdapter()
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+
+            pooled = Dataset(url, pool_size=32, timeout=(5, 300))
+            custom = Dataset(url, adapter=adapter)
+
+            assert pooled.session.get_adapter("https://x")._pool_maxsize == 32
+            assert pooled.session.get_adapter("https://x").timeout == (5, 300)
+            assert custom.session.get_adapter("https://x") is adapter
+
 
 class TestDatasetInformationRetrieval:
     """Test dataset information retrieval from API."""
@@ -341,6 +406,421 @@ class TestDatasetDownload:
 
                 assert "no files to download" in caplog.text.lower()
 
+    def test_download_uses_shared_session(self, demo_dataset_urls, temp_dir):
+        """Test files are downloaded with the session of the dataset."""
+        url = demo_dataset_urls[0]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+
+            dataset = Dataset(url)
+
+        first_file = dataset.download_files[0]
+        with patch.object(first_file, "download") as mock_download, patch.object(
+            first_file, "validate"
+        ) as mock_validate, patch("rich.console.Console.print"):
+            mock_download.return_value = iter([1024])
+            mock_validate.return_value = True
+
+            dataset.download(str(temp_dir), files=["metadata.tab"])
+
+            assert mock_download.call_args.kwargs["session"] is dataset.session
+
+    def test_download_concurrent_workers(self, demo_dataset_urls, temp_dir):
+        """Test download with several workers processes every file once."""
+        url = demo_dataset_urls[0]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+
+            dataset = Dataset(url)
+
+            with patch.object(
+                dataset.download_files[0], "download"
+            ) as mock_download1, patch.object(
+                dataset.download_files[0], "validate"
+            ) as mock_validate1, patch.object(
+                dataset.download_files[1], "download"
+            ) as mock_download2, patch.object(
+                dataset.download_files[1], "validate"
+            ) as mock_validate2, patch(
+                "rich.console.Console.print"
+            ):
+
+                mock_download1.return_value = iter([1024])
+                mock_validate1.return_value = True
+                mock_download2.return_value = iter([2048])
+                mock_validate2.return_value = True
+
+                dataset.download(str(temp_dir), post_process=False, max_workers=2)
+
+                mock_download1.assert_called_once()
+                mock_validate1.assert_called_once()
+                mock_download2.assert_called_once()
+                mock_validate2.assert_called_once()
+
+    def test_download_schedule(self, demo_dataset_urls, temp_dir):
+        """Test that the files are started in the order of the schedule."""
+        url = demo_dataset_urls[0]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+
+            dataset = Dataset(url)
+            started = []
+
+            def fake_download(self, *args, **kwargs):
+                started.append(self.name)
+                return iter([self.get_filesize(False)])
+
+            with patch.object(
+                DatasetFile, "download", autospec=True, side_effect=fake_download
+            ), patch.object(DatasetFile, "validate", return_value=True), patch(
+                "rich.console.Console.print"
+            ):
+                dataset.download(
+                    str(temp_dir),
+                    post_process=False,
+                    remove_after_pp=False,
+                    use_manifest=False,
+                    schedule="largest",
+                )
+                assert started == ["test_data.zip", "metadata.csv"]
+
+                started.clear()
+                dataset.download(
+                    str(temp_dir),
+                    post_process=False,
+                    remove_after_pp=False,
+                    use_manifest=False,
+                    schedule="largest",
+                    priorities={"*.csv": 1},
+                )
+                assert started == ["metadata.csv", "test_data.zip"]
+
+    @pytest.mark.parametrize(
+        "options, message",
+        [
+            ({"virtual": True}, "processed & kept"),
+            ({"remove_after_pp": False}, "processed & kept"),
+            ({"remove_after_pp": True}, "processed & removed"),
+        ],
+    )
+    def test_download_reports_kept_archives(
+        self, demo_dataset_urls, temp_dir, options, message
+    ):
+        """Test that an archive kept on purpose is not reported as a failed removal."""
+        url = demo_dataset_urls[0]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+
+            dataset = Dataset(url)
+            events = []
+
+            def fake_download(self, *args, **kwargs):
+                return iter([self.get_filesize(False)])
+
+            with patch.object(
+                DatasetFile, "download", autospec=True, side_effect=fake_download
+            ), patch.object(DatasetFile, "validate", return_value=True), patch.object(
+                DatasetFile, "process", return_value=True
+            ), patch.object(
+                DatasetFile, "remove", return_value=True
+            ) as remove, warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                dataset.download(
+                    str(temp_dir),
+                    use_manifest=False,
+                    check_space=False,
+                    sinks=[events.append],
+                    **options,
+                )
+
+            final = [e for e in events if e.kind == DownloadEvent.PROCESSED]
+            assert [e.message for e in final] == [message]
+            assert remove.called == (message == "processed & removed")
+
+    def test_download_invalid_max_workers(self, demo_dataset_urls, temp_dir):
+        """Test download rejects a worker count below one."""
+        url = demo_dataset_urls[0]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+
+            dataset = Dataset(url)
+
+            with pytest.raises(ValueError, match="max_workers must be at least 1"):
+                dataset.download(str(temp_dir), max_workers=0)
+
+    def test_download_skips_verified_files(self, demo_dataset_urls, temp_dir):
+        """Test a second download skips files recorded in the manifest."""
+        url = demo_dataset_urls[0]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+
+            dataset = Dataset(url)
+
+        first_file = dataset.download_files[0]
+        with patch("darus.Dataset.Manifest.is_verified") as mock_verified, patch.object(
+            first_file, "download"
+        ) as mock_download, patch("rich.console.Console.print"):
+            mock_verified.return_value = True
+
+            dataset.download(str(temp_dir), files=["metadata.tab"], check_space=False)
+
+            mock_verified.assert_called_once()
+            mock_download.assert_not_called()
+
+    def test_download_records_verified_files(self, demo_dataset_urls, temp_dir):
+        """Test verified files are written to the manifest."""
+        url = demo_dataset_urls[0]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+
+            dataset = Dataset(url)
+
+        first_file = dataset.download_files[0]
+
+        def fake_download(path, **kwargs):
+            first_file.file_path = first_file.get_file_path(path)
+            first_file.file_path.write_bytes(b"")
+            yield 0
+
+        with patch.object(first_file, "download", side_effect=fake_download), patch(
+            "rich.console.Console.print"
+        ):
+            dataset.download(str(temp_dir), files=["metadata.tab"])
+
+        manifest = json.loads((temp_dir / ".darus-manifest.json").read_text())
+        assert manifest["files"]["12345"]["status"] == "verified"
+
+    @staticmethod
+    def _small_files_response(contents: dict) -> dict:
+        """Helper method to create a dataset response of small files by (directoryLabel, filename)."""
+        response = TestDatasetDownload._mock_dataset_response()
+        response["data"]["latestVersion"]["files"] = [
+            {
+                "directoryLabel": directory,
+                "dataFile": {
+                    "id": file_id,
+                    "persistentId": f"doi:10.70122/FK2/TEST/small{file_id}",
+                    "filename": filename,
+                    "filesize": len(content),
+                    "checksum": {"value": hashlib.md5(content).hexdigest()},
+                },
+            }
+            for file_id, ((directory, filename), content) in enumerate(
+                contents.items(), start=1
+            )
+        ]
+        return response
+
+    def test_download_bulk_batches(self, demo_dataset_urls, temp_dir):
+        """Test small files are fetched with one bulk request and unpacked into their directories."""
+        contents = {
+            ("", "a.txt"): b"content a",
+            ("sub", "b.txt"): b"content b",
+            ("", "missing.txt"): b"content missing",
+        }
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("a.txt", contents[("", "a.txt")])
+            zf.writestr("sub/b.txt", contents[("sub", "b.txt")])
+            zf.writestr("MANIFEST.TXT", "bulk download manifest")
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=self._small_files_response(contents),
+                status=200,
+            )
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/access/datafiles/1,2,3",
+                body=archive.getvalue(),
+                status=200,
+            )
+            # Files missing in the archive are downloaded one by one
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/access/datafile/3/",
+                body=contents[("", "missing.txt")],
+                status=200,
+            )
+
+            dataset = Dataset(demo_dataset_urls[0])
+            with patch("rich.console.Console.print"):
+                report = dataset.download(str(temp_dir), bulk_threshold="1KB")
+
+            assert len(rsps.calls) == 3
+
+        # The bulk request is shared, its files have no throughput of their own
+        records = {record.name: record for record in report.files}
+        assert records["a.txt"].bulk and records["a.txt"].throughput is None
+        assert not records["missing.txt"].bulk
+
+        assert (temp_dir / "a.txt").read_bytes() == b"content a"
+        assert (temp_dir / "sub" / "b.txt").read_bytes() == b"content b"
+        assert (temp_dir / "missing.txt").read_bytes() == b"content missing"
+        assert not (temp_dir / "MANIFEST.TXT").exists()
+        assert not list(temp_dir.glob(".darus-bulk-*"))
+
+        manifest = json.loads((temp_dir / ".darus-manifest.json").read_text())
+        assert {entry["status"] for entry in manifest["files"].values()} == {"verified"}
+
+    def _dataset(self, demo_dataset_urls) -> Dataset:
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+            return Dataset(demo_dataset_urls[0])
+
+    @pytest.mark.parametrize(
+        "remove_after_pp, stream_extract, required",
+        [
+            # The archive is on disk until it is extracted, its members are estimated
+            (True, False, 2621440 + 2 * 104857600 + 104857600),
+            # The archive is never written, its members are read from the central directory
+            (True, True, 2621440 + 500_000_000),
+            # The archive is kept next to its members
+            (False, False, 2621440 + 104857600 + 2 * 104857600),
+        ],
+    )
+    def test_check_disk_space(
+        self, demo_dataset_urls, temp_dir, remove_after_pp, stream_extract, required
+    ):
+        """Test that extracted archives count with their uncompressed size."""
+        dataset = self._dataset(demo_dataset_urls)
+
+        with patch.object(
+            DatasetFile, "get_uncompressed_size", return_value=500_000_000
+        ) as uncompressed_size, patch("darus.Dataset.shutil.disk_usage") as disk_usage:
+            for free, expected in ((required, True), (required - 1, False)):
+                disk_usage.return_value.free = free
+                assert (
+                    dataset.check_disk_space(
+                        temp_dir,
+                        remove_after_pp=remove_after_pp,
+                        stream_extract=stream_extract,
+                    )
+                    is expected
+                )
+            # The central directory is only fetched when it's needed
+            assert uncompressed_size.called is stream_extract
+
+    def test_check_disk_space_reads_filtered_members(self, demo_dataset_urls, temp_dir):
+        """Test that a member filter counts the filtered members of the central directory."""
+        dataset = self._dataset(demo_dataset_urls)
+
+        with patch.object(
+            DatasetFile, "get_uncompressed_size", return_value=1000
+        ) as uncompressed_size, patch("darus.Dataset.shutil.disk_usage") as disk_usage:
+            disk_usage.return_value.free = 2621440 + 1000 + 104857600
+            assert (
+                dataset.check_disk_space(
+                    temp_dir, member_filter=MemberFilter(include=["*.h5"])
+                )
+                is True
+            )
+            assert uncompressed_size.call_args.args[2].include == ["*.h5"]
+
+    def test_check_disk_space_counts_part_files(self, demo_dataset_urls, temp_dir):
+        """Test that the bytes of interrupted downloads are not counted again."""
+        dataset = self._dataset(demo_dataset_urls)
+        (temp_dir / "metadata.csv.part").write_bytes(b"x" * 1000)
+
+        with patch("darus.Dataset.shutil.disk_usage") as disk_usage:
+            disk_usage.return_value.free = 2621440 + 104857600 - 1000
+            assert dataset.check_disk_space(temp_dir, post_process=False) is True
+
+    @pytest.mark.parametrize(
+        "link, remove_after_pp, required",
+        [
+            # The blob and the file in the target are copies
+            ("copy", False, 2 * (2621440 + 104857600) + 2 * 104857600),
+            # The stored archive is not freed after the extraction
+            ("copy", True, 2 * 2621440 + 104857600 + 2 * 104857600 + 104857600),
+            # A symlink takes no space in the target, the blob is new
+            ("symlink", True, 2621440 + 104857600 + 2 * 104857600 + 104857600),
+        ],
+    )
+    def test_check_disk_space_counts_store(
+        self, demo_dataset_urls, temp_dir, link, remove_after_pp, required
+    ):
+        """Test that new blobs of the content store are counted."""
+        dataset = self._dataset(demo_dataset_urls)
+        store = ContentStore(temp_dir / "store", link=link)
+
+        with patch("darus.Dataset.shutil.disk_usage") as disk_usage:
+            for free, expected in ((required, True), (required - 1, False)):
+                disk_usage.return_value.free = free
+                assert (
+                    dataset.check_disk_space(
+                        temp_dir / "data",
+                        remove_after_pp=remove_after_pp,
+                        store=store,
+                    )
+                    is expected
+                )
+
+    def test_download_aborts_without_space(self, demo_dataset_urls, temp_dir, caplog):
+        """Test that nothing is downloaded if the files don't fit, and a subset is suggested."""
+        dataset = self._dataset(demo_dataset_urls)
+
+        with patch.object(DatasetFile, "download") as mock_download, patch(
+            "darus.Dataset.shutil.disk_usage"
+        ) as disk_usage, patch("rich.console.Console.print"), caplog.at_level(
+            logging.INFO
+        ):
+            disk_usage.return_value.free = 50 * 1024 * 1024
+            dataset.download(str(temp_dir), post_process=False, remove_after_pp=False)
+
+            mock_download.assert_not_called()
+            assert "Not enough disk space" in caplog.text
+            assert "files=['metadata.tab']" in caplog.text
+
     @staticmethod
     def _mock_dataset_response():
         """Helper method to create mock dataset API response."""
@@ -350,6 +830,8 @@ class TestDatasetDownload:
                 "latestVersion": {
                     "datasetPersistentId": "doi:10.70122/FK2/TEST",
                     "versionState": "RELEASED",
+                    "versionNumber": 1,
+                    "versionMinorNumber": 2,
                     "lastUpdateTime": "2025-03-12T12:32:17Z",
                     "createTime": "2025-01-15T10:00:00Z",
                     "license": {"name": "CC BY 4.0"},
@@ -403,6 +885,329 @@ class TestDatasetDownload:
         }
 
 
+class TestDatasetSync:
+    """Test version pinning and the delta sync of a local copy."""
+
+    def _dataset(self, url, **kwargs) -> Dataset:
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+            return Dataset(url, **kwargs)
+
+    @staticmethod
+    def _local_copy(path: Path):
+        """Creates a copy with the unchanged metadata.csv, a replaced archive and a removed file."""
+        manifest = Manifest(path)
+        (path / "data").mkdir()
+        for file_id, name, directory, content in [
+            (12345, "metadata.csv", "", b""),
+            (999, "test_data.zip", "data", b"old archive"),
+            (555, "old.txt", "", b"removed"),
+        ]:
+            f = DatasetFile(
+                {
+                    "directoryLabel": directory,
+                    "dataFile": {
+                        "id": file_id,
+                        "persistentId": f"doi:10.70122/FK2/TEST/{file_id}",
+                        "filename": name,
+                        "filesize": len(content),
+                        "checksum": {"value": hashlib.md5(content).hexdigest()},
+                    },
+                },
+                "https://demo.dataverse.org",
+            )
+            f.file_path = path / directory / name
+            f.file_path.write_bytes(content)
+            manifest.record(f, "verified")
+        manifest.set_dataset_version("1.1")
+        manifest.flush()
+
+    def test_version_pinning(self, demo_dataset_urls):
+        """Test that a pinned version is read from the versions api."""
+        version = TestDatasetDownload._mock_dataset_response()["data"]["latestVersion"]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/versions/1.2",
+                json={"status": "OK", "data": version},
+                status=200,
+            )
+            dataset = Dataset(demo_dataset_urls[0], version="1.2")
+
+        assert dataset.version == "1.2"
+        assert dataset.title == "Test Dataset"
+        assert len(dataset.download_files) == 2
+
+    def test_sync(self, demo_dataset_urls, temp_dir):
+        """Test that only changed files are downloaded and removed ones quarantined."""
+        dataset = self._dataset(demo_dataset_urls[0])
+        self._local_copy(temp_dir)
+
+        with patch.object(DatasetFile, "download") as mock_download, patch.object(
+            DatasetFile, "validate", return_value=True
+        ), patch("rich.console.Console.print"):
+            mock_download.return_value = iter([104857600])
+            delta = dataset.sync(
+                temp_dir, post_process=False, remove_after_pp=False, check_space=False
+            )
+
+        assert [f.name for f in delta["changed"]] == ["test_data.zip"]
+        assert delta["added"] == []
+        assert delta["removed"] == [temp_dir / "old.txt"]
+        assert delta["unchanged"] == 1
+        assert delta["done"] == 1
+        mock_download.assert_called_once()
+
+        assert not (temp_dir / "old.txt").exists()
+        assert (temp_dir / ".darus-removed" / "1.1" / "old.txt").read_bytes() == (
+            b"removed"
+        )
+        manifest = Manifest(temp_dir)
+        assert set(manifest.entries()) == {"12345"}
+        assert manifest.dataset_version == "1.2"
+        assert len(dataset.download_files) == 2
+
+    def test_sync_selected_files(self, demo_dataset_urls, temp_dir, caplog):
+        """Test that a partial sync downloads only the selected changes and keeps the version."""
+        dataset = self._dataset(demo_dataset_urls[0])
+        self._local_copy(temp_dir)
+
+        with patch.object(DatasetFile, "download") as mock_download, patch.object(
+            DatasetFile, "validate", return_value=True
+        ), patch("rich.console.Console.print"), caplog.at_level(logging.INFO):
+            mock_download.return_value = iter([104857600])
+            delta = dataset.sync(
+                temp_dir,
+                files=["metadata.tab"],
+                post_process=False,
+                remove_after_pp=False,
+                check_space=False,
+            )
+
+        # The archive changed and old.txt was removed, both are left for a full sync
+        mock_download.assert_not_called()
+        assert delta["changed"] == []
+        assert delta["removed"] == []
+        assert delta["deferred"] == 2
+        assert (temp_dir / "old.txt").exists()
+        assert "not found" not in caplog.text
+        manifest = Manifest(temp_dir)
+        assert manifest.dataset_version == "1.1"
+        assert set(manifest.entries()) == {"12345", "999", "555"}
+
+        with patch.object(DatasetFile, "download") as mock_download, patch.object(
+            DatasetFile, "validate", return_value=True
+        ), patch("rich.console.Console.print"):
+            mock_download.return_value = iter([104857600])
+            delta = dataset.sync(
+                temp_dir,
+                files=["test_data.zip"],
+                post_process=False,
+                remove_after_pp=False,
+                check_space=False,
+            )
+
+        assert [f.name for f in delta["changed"]] == ["test_data.zip"]
+        assert delta["done"] == 1
+        assert delta["deferred"] == 1
+        manifest = Manifest(temp_dir)
+        assert manifest.dataset_version == "1.1"
+        # The replaced archive is forgotten, the removed file is still recorded
+        assert {"999", "555"} & set(manifest.entries()) == {"555"}
+
+    def test_sync_dry_run(self, demo_dataset_urls, temp_dir):
+        """Test that a dry run only reports the delta."""
+        dataset = self._dataset(demo_dataset_urls[0])
+        self._local_copy(temp_dir)
+
+        with patch.object(DatasetFile, "download") as mock_download, patch(
+            "rich.console.Console.print"
+        ) as mock_print:
+            delta = dataset.sync(temp_dir, removed="delete", dry_run=True)
+
+        mock_download.assert_not_called()
+        assert (temp_dir / "old.txt").exists()
+        assert (
+            mock_print.call_args.args[0].title
+            == "Sync doi:10.70122/FK2/TEST: 1.1 → 1.2"
+        )
+        assert len(delta["changed"]) == 1
+        assert Manifest(temp_dir).dataset_version == "1.1"
+
+    def test_sync_aborts_without_dataset_information(
+        self, demo_dataset_urls, temp_dir, caplog
+    ):
+        """Test that a failed metadata request doesn't remove the local copy."""
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                status=503,
+            )
+            dataset = Dataset(demo_dataset_urls[0])
+        self._local_copy(temp_dir)
+
+        with patch.object(DatasetFile, "download") as mock_download:
+            assert dataset.sync(temp_dir, removed="delete") is None
+
+        mock_download.assert_not_called()
+        assert dataset.persistent_id is None
+        assert "sync of" in caplog.text.lower()
+        assert (temp_dir / "old.txt").exists()
+        assert len(Manifest(temp_dir).entries()) == 3
+
+    def test_sync_removes_extracted_members(self, demo_dataset_urls, temp_dir):
+        """Test that the members of a removed archive are quarantined, unknown ones reported as stale."""
+        dataset = self._dataset(demo_dataset_urls[0])
+        self._local_copy(temp_dir)
+        manifest = Manifest(temp_dir)
+        for file_id, name in [(777, "old.zip"), (778, "unknown.zip")]:
+            f = DatasetFile(
+                {
+                    "directoryLabel": "data",
+                    "dataFile": {
+                        "id": file_id,
+                        "persistentId": f"doi:10.70122/FK2/TEST/{file_id}",
+                        "filename": name,
+                        "filesize": 100,
+                        "checksum": {"value": "0" * 32},
+                    },
+                },
+                "https://demo.dataverse.org",
+            )
+            f.file_path = temp_dir / "data" / name
+            manifest.record(f, "processed", removed=True)
+        manifest.flush()
+        (temp_dir / "data" / "sub").mkdir()
+        (temp_dir / "data" / "a.txt").write_bytes(b"member")
+        (temp_dir / "data" / "sub" / "b.txt").write_bytes(b"member")
+
+        def central_directory(http, url, header=None):
+            if "/777/" in url:
+                return {"a.txt": None, "sub/": None, "sub/b.txt": None}
+            return None
+
+        with patch(
+            "darus.Dataset.fetch_central_directory", side_effect=central_directory
+        ), patch("rich.console.Console.print"):
+            delta = dataset.sync(temp_dir, dry_run=True)
+            assert temp_dir / "data" / "a.txt" in delta["removed"]
+            assert delta["stale"] == [temp_dir / "data" / "unknown.zip"]
+
+            with patch.object(DatasetFile, "download") as mock_download, patch.object(
+                DatasetFile, "validate", return_value=True
+            ):
+                mock_download.return_value = iter([104857600])
+                dataset.sync(
+                    temp_dir,
+                    post_process=False,
+                    remove_after_pp=False,
+                    check_space=False,
+                )
+
+        assert not (temp_dir / "data" / "a.txt").exists()
+        quarantine = temp_dir / ".darus-removed" / "1.1" / "data"
+        assert (quarantine / "a.txt").read_bytes() == b"member"
+        assert (quarantine / "sub" / "b.txt").read_bytes() == b"member"
+        assert set(Manifest(temp_dir).entries()) == {"12345"}
+
+    def test_sync_invalid_removed(self, demo_dataset_urls, temp_dir):
+        """Test that an unknown handling of removed files is rejected."""
+        dataset = self._dataset(demo_dataset_urls[0])
+
+        with pytest.raises(ValueError, match="removed must be"):
+            dataset.sync(temp_dir, removed="archive")
+
+
+class TestDatasetVerify:
+    """Test the verification of a local copy."""
+
+    @staticmethod
+    def _local_copy(path: Path):
+        """Creates a copy with a verified metadata.csv, a corrupt archive and an extra file."""
+        (path / "data").mkdir()
+        (path / "metadata.csv").write_bytes(b"")
+        (path / "data" / "test_data.zip").write_bytes(b"bit rot")
+        (path / "notes.txt").write_bytes(b"extra")
+        (path / ".darus-removed").mkdir()
+        (path / ".darus-removed" / "old.txt").write_bytes(b"quarantined")
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_verify(self, demo_dataset_urls, temp_dir, executor):
+        """Test that corrupt and extra files are reported and the report is written."""
+        dataset = TestDatasetSync._dataset(self, demo_dataset_urls[0])
+        self._local_copy(temp_dir)
+        report_path = temp_dir / ".darus-report.json"
+
+        with patch("rich.console.Console.print"):
+            report = dataset.verify(
+                temp_dir, workers=2, executor=executor, report=report_path
+            )
+
+        assert report["verified"] == ["metadata.csv"]
+        assert report["corrupt"] == [
+            {
+                "path": "data/test_data.zip",
+                "expected": dataset.download_files[1].get_checksum(),
+                "actual": hashlib.md5(b"bit rot").hexdigest(),
+            }
+        ]
+        assert report["missing"] == []
+        assert report["extra"] == ["notes.txt"]
+        assert report["bytes"] == len(b"bit rot")
+        assert json.loads(report_path.read_text())["corrupt"] == report["corrupt"]
+
+        # Only the verified file stays in the manifest, a download fetches the other again
+        assert set(Manifest(temp_dir).entries()) == {"12345"}
+
+    def test_verify_missing_and_processed(self, demo_dataset_urls, temp_dir):
+        """Test that removed archives are processed and absent files are missing."""
+        dataset = TestDatasetSync._dataset(self, demo_dataset_urls[0])
+        archive = dataset.download_files[1]
+        archive.file_path = archive.get_file_path(temp_dir)
+        archive.file_path.parent.mkdir()
+        archive.file_path.write_bytes(b"")
+        manifest = Manifest(temp_dir)
+        manifest.record(archive, "processed", removed=True)
+        manifest.flush()
+        archive.file_path.unlink()
+
+        with patch("rich.console.Console.print"):
+            report = dataset.verify(temp_dir, files=["metadata.tab", "test_data.zip"])
+
+        assert report["missing"] == ["metadata.csv"]
+        assert report["processed"] == ["data/test_data.zip"]
+        assert report["extra"] == []
+
+    def test_verify_without_progress(self, demo_dataset_urls, temp_dir):
+        """Test that verify runs without display and table when progress is off."""
+        dataset = TestDatasetSync._dataset(self, demo_dataset_urls[0])
+
+        with patch("rich.console.Console.print") as mock_print, patch(
+            "darus.Dataset.progress_display", wraps=progress_display
+        ) as display:
+            report = dataset.verify(temp_dir, files=["metadata.tab"], progress=False)
+
+        assert report["missing"] == ["metadata.csv"]
+        mock_print.assert_not_called()
+        assert display.call_args.kwargs["disable"] is True
+
+    def test_verify_invalid_workers(self, demo_dataset_urls, temp_dir):
+        """Test that invalid pools are rejected."""
+        dataset = TestDatasetSync._dataset(self, demo_dataset_urls[0])
+
+        with pytest.raises(ValueError, match="workers must be"):
+            dataset.verify(temp_dir, workers=0)
+        with pytest.raises(ValueError, match="executor must be"):
+            dataset.verify(temp_dir, executor="gpu")
+
+
 # Add the same helper method to other test classes
 TestDatasetInitialization._mock_dataset_response = (
     TestDatasetDownload._mock_dataset_response
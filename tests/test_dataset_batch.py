@@ -0,0 +1,129 @@
+"""Unit tests for the DatasetBatch class."""
+
+import copy
+import pytest
+import responses
+from unittest.mock import patch
+
+from darus.DatasetBatch import DatasetBatch
+from darus.DatasetFile import DatasetFile
+from darus.utils import dataset_url
+from tests import test_dataset
+
+DATASET_API_URL = "https://demo.dataverse.org/api/datasets/:persistentId/"
+
+
+def _dataset_response(persistent_id: str) -> dict:
+    """Returns the mocked dataset response with another persistent id."""
+    response = copy.deepcopy(test_dataset.TestDatasetDownload._mock_dataset_response())
+    response["data"]["latestVersion"]["datasetPersistentId"] = persistent_id
+    return response
+
+
+class TestDatasetBatch:
+    """Test suite for downloading several datasets in one job."""
+
+    def _batch(self, demo_dataset_urls, jobs) -> DatasetBatch:
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                DATASET_API_URL,
+                json=_dataset_response("doi:10.70122/FK2/FIRST"),
+            )
+            rsps.add(
+                responses.GET,
+                DATASET_API_URL,
+                json=_dataset_response("doi:10.70122/FK2/SECOND"),
+            )
+            return DatasetBatch(jobs)
+
+    def test_shared_session(self, demo_dataset_urls):
+        """Test that the datasets share one session and send their own token."""
+        batch = self._batch(
+            demo_dataset_urls,
+            [demo_dataset_urls[0], {"url": demo_dataset_urls[0], "api_token": "abc"}],
+        )
+
+        first, second = (job["dataset"] for job in batch.jobs)
+        assert first.session is batch.session
+        assert second.session is batch.session
+        assert first._request_header is None
+        assert second._request_header == {"X-Dataverse-key": "abc"}
+
+    def test_missing_url(self, demo_dataset_urls):
+        """Test that a job without url is rejected."""
+        with pytest.raises(ValueError, match="has no url"):
+            DatasetBatch([{"path": "./data"}])
+
+    def test_download(self, demo_dataset_urls, temp_dir):
+        """Test that the files of all datasets are downloaded on the shared pool, each to its path."""
+        batch = self._batch(
+            demo_dataset_urls,
+            [
+                demo_dataset_urls[0],
+                {
+                    "url": demo_dataset_urls[0],
+                    "path": str(temp_dir / "own"),
+                    "files": ["metadata.tab"],
+                },
+            ],
+        )
+        paths = []
+
+        def fake_download(self, path, *args, **kwargs):
+            paths.append((self.name, path))
+            return iter([self.get_filesize(False)])
+
+        with patch.object(
+            DatasetFile, "download", autospec=True, side_effect=fake_download
+        ), patch.object(DatasetFile, "validate", return_value=True), patch(
+            "rich.console.Console.print"
+        ) as mock_print:
+            results = batch.download(
+                str(temp_dir),
+                max_workers=2,
+                post_process=False,
+                remove_after_pp=False,
+                check_space=False,
+            )
+
+        assert results == [
+            {"done": 2, "skipped": 0, "failed": 0, "interrupted": 0},
+            {"done": 1, "skipped": 0, "failed": 0, "interrupted": 0},
+        ]
+        assert sorted(paths) == sorted(
+            [
+                ("metadata.csv", temp_dir / "10.70122_FK2_FIRST"),
+                ("test_data.zip", temp_dir / "10.70122_FK2_FIRST"),
+                ("metadata.csv", temp_dir / "own"),
+            ]
+        )
+        # Combined summary after the download
+        assert mock_print.call_args.args[0].title == "Summary"
+
+    def test_sync_skips_unloaded_dataset(self, demo_dataset_urls, temp_dir):
+        """Test that a dataset whose information failed to load is not synced."""
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, DATASET_API_URL, status=500)
+            batch = DatasetBatch([demo_dataset_urls[0]])
+
+        with patch.object(DatasetFile, "download") as mock_download, patch(
+            "rich.console.Console.print"
+        ):
+            results = batch.sync(temp_dir, removed="delete")
+
+        assert results == [None]
+        mock_download.assert_not_called()
+        assert list(temp_dir.iterdir()) == []
+
+    def test_dataset_url(self):
+        """Test that DOIs are resolved to the dataset page and urls are kept."""
+        expected = "https://darus.uni-stuttgart.de/dataset.xhtml?persistentId=doi:10.18419/DARUS-4801"
+        assert dataset_url("doi:10.18419/DARUS-4801") == expected
+        assert dataset_url("10.18419/DARUS-4801") == expected
+        assert dataset_url("https://doi.org/10.18419/DARUS-4801") == expected
+        assert (
+            dataset_url("10.70122/FK2/TEST", server="https://demo.dataverse.org/")
+            == "https://demo.dataverse.org/dataset.xhtml?persistentId=doi:10.70122/FK2/TEST"
+        )
+        assert dataset_url(expected) == expected
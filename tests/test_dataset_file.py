@@ -1,15 +1,28 @@
 """Unit tests for the DatasetFile class."""
 
+import email.utils
+import io
 import json
 import logging
 import pytest
+import requests
 import responses
 import hashlib
+import time
 import zipfile
 from unittest.mock import patch, mock_open, MagicMock
 from pathlib import Path
 
-from darus.DatasetFile import DatasetFile
+from darus.DatasetFile import (
+    DatasetFile,
+    MAX_CHUNK_SIZE,
+    MAX_RETRY_DELAY,
+    MIN_CHUNK_SIZE,
+    _hash_file,
+    _read_chunks,
+    _retry_delay,
+)
+from darus.MemberFilter import MemberFilter
 
 
 class TestDatasetFileInitialization:
@@ -259,6 +272,493 @@ class TestDatasetFileDownload:
 
             assert "memoryerror encountered while downloading" in caplog.text.lower()
 
+    @staticmethod
+    def _range_callback(content):
+        """Creates a responses callback serving byte ranges of content."""
+
+        def callback(request):
+            byte_range = request.headers.get("Range")
+            if not byte_range:
+                return (200, {}, content)
+            start, end = byte_range.split("=")[1].split("-")
+            if not start:
+                # Suffix range of the last bytes
+                start, end = max(0, len(content) - int(end)), ""
+            start = int(start)
+            end = int(end) if end else len(content) - 1
+            headers = {"Content-Range": f"bytes {start}-{end}/{len(content)}"}
+            return (206, headers, content[start : end + 1])
+
+        return callback
+
+    def test_segmented_download(self, temp_dir):
+        """Test download in several byte ranges reassembles the file."""
+        test_content = bytes(range(256)) * 4
+        file_info = {
+            "dataFile": {
+                "id": 12345,
+                "persistentId": "doi:10.70122/FK2/segmented",
+                "filename": "large.bin",
+                "filesize": len(test_content),
+                "checksum": {"value": hashlib.md5(test_content).hexdigest()},
+            }
+        }
+        server_url = "https://demo.dataverse.org"
+        file = DatasetFile(file_info, server_url)
+
+        with responses.RequestsMock() as rsps, patch(
+            "darus.DatasetFile.MIN_SEGMENT_SIZE", 100
+        ):
+            rsps.add_callback(
+                responses.GET,
+                f"{server_url}/api/access/datafile/12345/",
+                callback=self._range_callback(test_content),
+            )
+
+            progress = list(file.download(temp_dir, segments=4))
+
+            assert len(rsps.calls) == 4
+            assert all("Range" in call.request.headers for call in rsps.calls)
+            assert progress[-1] == len(test_content)
+            assert file.file_path.read_bytes() == test_content
+
+    def test_segmented_download_falls_back_without_ranges(self, temp_dir):
+        """Test segmented download uses a single stream if ranges are ignored."""
+        test_content = b"x" * 1000
+        file_info = {
+            "dataFile": {
+                "id": 12345,
+                "persistentId": "doi:10.70122/FK2/no-ranges",
+                "filename": "large.bin",
+                "filesize": len(test_content),
+                "checksum": {"value": hashlib.md5(test_content).hexdigest()},
+            }
+        }
+        server_url = "https://demo.dataverse.org"
+        file = DatasetFile(file_info, server_url)
+
+        with responses.RequestsMock() as rsps, patch(
+            "darus.DatasetFile.MIN_SEGMENT_SIZE", 100
+        ):
+            rsps.add(
+                responses.GET,
+                f"{server_url}/api/access/datafile/12345/",
+                body=test_content,
+                status=200,
+            )
+
+            list(file.download(temp_dir, segments=4))
+
+            assert len(rsps.calls) == 1
+            assert file.file_path.read_bytes() == test_content
+
+    def test_download_uses_part_file(self, mock_file_info, temp_dir):
+        """Test download renames the .part file once complete."""
+        server_url = "https://demo.dataverse.org"
+        file = DatasetFile(mock_file_info, server_url)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                f"{server_url}/api/access/datafile/98765/",
+                body=b"content",
+                status=200,
+            )
+
+            list(file.download(temp_dir))
+
+            assert file.file_path.read_bytes() == b"content"
+            assert not (temp_dir / "test_dir" / "test_file.txt.part").exists()
+
+    def test_download_resumes_part_file(self, temp_dir):
+        """Test download continues an interrupted download from the .part file."""
+        test_content = bytes(range(256)) * 4
+        file_info = {
+            "dataFile": {
+                "id": 12345,
+                "persistentId": "doi:10.70122/FK2/resume",
+                "filename": "large.bin",
+                "filesize": len(test_content),
+                "checksum": {"value": hashlib.md5(test_content).hexdigest()},
+            }
+        }
+        server_url = "https://demo.dataverse.org"
+        file = DatasetFile(file_info, server_url)
+
+        (temp_dir / "large.bin.part").write_bytes(test_content[:300])
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(
+                responses.GET,
+                f"{server_url}/api/access/datafile/12345/",
+                callback=self._range_callback(test_content),
+            )
+
+            progress = list(file.download(temp_dir))
+
+            assert rsps.calls[0].request.headers["Range"] == "bytes=300-"
+            assert progress[0] == 300
+            assert progress[-1] == len(test_content)
+            assert file.file_path.read_bytes() == test_content
+            assert not (temp_dir / "large.bin.part").exists()
+
+    def test_download_complete_part_file(self, temp_dir, make_dataset_file):
+        """Test a complete .part file is validated instead of requesting the range after its end."""
+        test_content = bytes(range(256)) * 4
+        file = make_dataset_file(test_content, name="large.bin")
+        (temp_dir / "large.bin.part").write_bytes(test_content)
+
+        with responses.RequestsMock() as rsps:
+            progress = list(file.download(temp_dir))
+
+            assert len(rsps.calls) == 0
+        assert progress == [len(test_content)]
+        assert file.validate() is True
+        assert file.file_path.read_bytes() == test_content
+        assert not (temp_dir / "large.bin.part").exists()
+
+    def test_download_corrupt_complete_part_file(self, temp_dir, make_dataset_file):
+        """Test a complete .part file with a wrong MD5 is downloaded again."""
+        test_content = bytes(range(256)) * 4
+        file = make_dataset_file(test_content, name="large.bin")
+        (temp_dir / "large.bin.part").write_bytes(test_content[::-1])
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(
+                responses.GET,
+                "https://demo.dataverse.org/api/access/datafile/12345/",
+                callback=self._range_callback(test_content),
+            )
+
+            list(file.download(temp_dir))
+
+            assert "Range" not in rsps.calls[0].request.headers
+        assert file.file_path.read_bytes() == test_content
+
+    def test_segmented_download_keeps_prefix_on_error(self, temp_dir):
+        """Test failed segmented download truncates the .part file to the complete prefix."""
+        test_content = bytes(range(256)) * 4
+        file_info = {
+            "dataFile": {
+                "id": 12345,
+                "persistentId": "doi:10.70122/FK2/segment-error",
+                "filename": "large.bin",
+                "filesize": len(test_content),
+                "checksum": {"value": hashlib.md5(test_content).hexdigest()},
+            }
+        }
+        server_url = "https://demo.dataverse.org"
+        file = DatasetFile(file_info, server_url)
+        serve_range = self._range_callback(test_content)
+
+        def callback(request):
+            if request.headers["Range"].startswith("bytes=512-"):
+                return (500, {}, b"")
+            return serve_range(request)
+
+        with responses.RequestsMock() as rsps, patch(
+            "darus.DatasetFile.MIN_SEGMENT_SIZE", 100
+        ):
+            rsps.add_callback(
+                responses.GET,
+                f"{server_url}/api/access/datafile/12345/",
+                callback=callback,
+            )
+
+            list(file.download(temp_dir, segments=4))
+
+            part_path = temp_dir / "large.bin.part"
+            assert not file.file_path.exists()
+            part_content = part_path.read_bytes()
+            assert len(part_content) <= 512
+            assert test_content.startswith(part_content)
+
+
+class TestDatasetFileChunks:
+    """Test adaptive reads and throttled progress of downloads."""
+
+    class _BufferResponse:
+        """A streamed response serving a buffer with the requested read sizes."""
+
+        def __init__(self, content: bytes):
+            self.content = content
+            self.position = 0
+            self.sizes = []
+
+        def iter_content(self, chunk_size):
+            self.sizes.append(chunk_size)
+            while self.position < len(self.content):
+                chunk = self.content[self.position : self.position + chunk_size]
+                self.position += len(chunk)
+                yield chunk
+
+    def test_adaptive_reads_grow(self):
+        """Test the read size doubles up to the maximum on a fast stream."""
+        content = bytes(20 * 1024 * 1024)
+        response = self._BufferResponse(content)
+
+        chunks = list(_read_chunks(response))
+
+        assert b"".join(chunks) == content
+        assert response.sizes[0] == MIN_CHUNK_SIZE
+        assert max(response.sizes) == MAX_CHUNK_SIZE
+        assert response.sizes == sorted(response.sizes)
+
+    def test_fixed_chunk_size(self):
+        """Test a given chunk size is used for the whole stream."""
+        response = self._BufferResponse(bytes(1000))
+
+        chunks = list(_read_chunks(response, chunk_size=100))
+
+        assert len(chunks) == 10
+        assert response.sizes == [100]
+
+    def test_download_yields_are_throttled(self, mock_file_info, temp_dir):
+        """Test a download reports its progress at most every PROGRESS_INTERVAL."""
+        test_content = bytes(range(256)) * 400
+        file_info = dict(mock_file_info)
+        file_info["dataFile"] = dict(
+            mock_file_info["dataFile"],
+            filesize=len(test_content),
+            checksum={"value": hashlib.md5(test_content).hexdigest()},
+        )
+        file = DatasetFile(file_info, "https://demo.dataverse.org")
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/access/datafile/98765/",
+                body=test_content,
+            )
+            progress = list(file.download(temp_dir, chunk_size=100))
+
+        assert len(progress) < len(test_content) // 100
+        assert progress[-1] == len(test_content)
+        assert file.validate() is True
+
+
+class TestDatasetFilePreallocation:
+    """Test preallocated downloads received into a reused buffer."""
+
+    @pytest.mark.parametrize("hash_in_thread", [False, True])
+    def test_preallocated_download(self, temp_dir, hash_in_thread, make_dataset_file):
+        """Test the file content and MD5 with a reused receive buffer."""
+        test_content = bytes(range(256)) * 1000
+        file = make_dataset_file(test_content, name="preallocated.bin")
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/access/datafile/12345/",
+                body=test_content,
+            )
+            list(
+                file.download(
+                    temp_dir,
+                    chunk_size=1000,
+                    preallocate=True,
+                    hash_in_thread=hash_in_thread,
+                )
+            )
+
+        assert file.file_path.read_bytes() == test_content
+        assert file.validate() is True
+
+    def test_interrupted_preallocated_download(self, temp_dir, make_dataset_file):
+        """Test an interrupted download truncates the preallocated space, so it can be resumed."""
+        test_content = bytes(range(256)) * 1000
+        file = make_dataset_file(test_content, name="preallocated.bin")
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/access/datafile/12345/",
+                body=test_content,
+            )
+            downloads = file.download(temp_dir, chunk_size=1000, preallocate=True)
+            next(downloads)
+            downloads.close()
+
+        part_path = temp_dir / "preallocated.bin.part"
+        assert part_path.stat().st_size < len(test_content)
+        assert test_content.startswith(part_path.read_bytes())
+
+    def test_preallocated_segmented_download(self, temp_dir, make_dataset_file):
+        """Test segments are received into their own buffers."""
+        test_content = bytes(range(256)) * 4
+        file = make_dataset_file(test_content, name="preallocated.bin")
+
+        with responses.RequestsMock() as rsps, patch(
+            "darus.DatasetFile.MIN_SEGMENT_SIZE", 100
+        ):
+            rsps.add_callback(
+                responses.GET,
+                "https://demo.dataverse.org/api/access/datafile/12345/",
+                callback=TestDatasetFileDownload._range_callback(test_content),
+            )
+            list(file.download(temp_dir, segments=4, preallocate=True))
+
+        assert file.file_path.read_bytes() == test_content
+
+    def test_preallocated_download_records_length(self, temp_dir, make_dataset_file):
+        """Test that the written prefix of a preallocated file is kept in the sidecar while downloading."""
+        test_content = bytes(range(256)) * 1000
+        file = make_dataset_file(test_content, name="preallocated.bin")
+        part_path = temp_dir / "preallocated.bin.part"
+        sidecar = temp_dir / "preallocated.bin.part.len"
+
+        with responses.RequestsMock() as rsps, patch(
+            "darus.DatasetFile.CHECKPOINT_SIZE", 10_000
+        ), patch("darus.DatasetFile._ProgressThrottle.due", return_value=True):
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/access/datafile/12345/",
+                body=test_content,
+            )
+            downloads = file.download(temp_dir, chunk_size=1000, preallocate=True)
+            for downloaded in downloads:
+                if downloaded > 50_000:
+                    break
+
+            # A killed process leaves the full size, the sidecar holds the written bytes
+            length = int(sidecar.read_text())
+            assert 40_000 <= length <= downloaded < len(test_content)
+            assert part_path.stat().st_size == len(test_content)
+            assert part_path.read_bytes()[:length] == test_content[:length]
+            downloads.close()
+
+        assert not sidecar.exists()
+
+    @pytest.mark.parametrize("segments", [1, 4])
+    def test_killed_preallocated_download_resumes(
+        self, temp_dir, segments, make_dataset_file
+    ):
+        """Test that a .part file with its full size resumes from the length in the sidecar."""
+        test_content = bytes(range(256)) * 4
+        file = make_dataset_file(test_content, name="preallocated.bin")
+        part_path = temp_dir / "preallocated.bin.part"
+        part_path.write_bytes(test_content[:400] + bytes(len(test_content) - 400))
+        (temp_dir / "preallocated.bin.part.len").write_text("400")
+        serve_range = TestDatasetFileDownload._range_callback(test_content)
+        ranges = []
+
+        def callback(request):
+            ranges.append(request.headers.get("Range"))
+            return serve_range(request)
+
+        with responses.RequestsMock() as rsps, patch(
+            "darus.DatasetFile.MIN_SEGMENT_SIZE", 100
+        ):
+            rsps.add_callback(
+                responses.GET,
+                "https://demo.dataverse.org/api/access/datafile/12345/",
+                callback=callback,
+            )
+            progress = list(
+                file.download(temp_dir, segments=segments, preallocate=True)
+            )
+
+        assert ranges[0].startswith("bytes=400-")
+        assert progress[0] == 400
+        assert file.file_path.read_bytes() == test_content
+        assert file.validate() is True
+        assert not (temp_dir / "preallocated.bin.part.len").exists()
+
+
+class TestDatasetFileRetries:
+    """Test retries of transient errors, resuming from the received bytes."""
+
+    test_content = bytes(range(256)) * 4
+    server_url = "https://demo.dataverse.org"
+
+    def test_retry_after_is_honored(self, temp_dir, make_dataset_file):
+        """Test that a 503 is retried after the delay of its Retry-After header."""
+        file = make_dataset_file(self.test_content, name="retry.bin")
+        url = f"{self.server_url}/api/access/datafile/12345/"
+
+        with responses.RequestsMock() as rsps, patch(
+            "darus.DatasetFile.time.sleep"
+        ) as sleep:
+            rsps.add(responses.GET, url, status=503, headers={"Retry-After": "7"})
+            rsps.add(responses.GET, url, body=self.test_content, status=200)
+
+            list(file.download(temp_dir, retries=2))
+
+            sleep.assert_called_once_with(7.0)
+            assert file.retries == 1
+            assert file.validate() is True
+
+    @pytest.mark.parametrize("preallocate", [False, True])
+    def test_dropped_connection_resumes(self, temp_dir, preallocate, make_dataset_file):
+        """Test that a retry continues from the bytes received before the connection dropped, also when reading into a buffer."""
+        file = make_dataset_file(self.test_content, name="retry.bin")
+        serve_range = TestDatasetFileDownload._range_callback(self.test_content)
+        ranges = []
+
+        def callback(request):
+            ranges.append(request.headers.get("Range"))
+            if len(ranges) == 1:
+                # Announces the whole file, but the connection drops after 400 bytes
+                headers = {"Content-Length": str(len(self.test_content))}
+                return (200, headers, self.test_content[:400])
+            return serve_range(request)
+
+        with responses.RequestsMock() as rsps, patch("darus.DatasetFile.time.sleep"):
+            rsps.add_callback(
+                responses.GET,
+                f"{self.server_url}/api/access/datafile/12345/",
+                callback=callback,
+            )
+
+            progress = list(
+                file.download(
+                    temp_dir, chunk_size=100, retries=1, preallocate=preallocate
+                )
+            )
+
+            assert ranges == [None, "bytes=400-"]
+            assert progress[-1] == len(self.test_content)
+            assert file.retries == 1
+            assert file.validate() is True
+
+    def test_client_errors_are_not_retried(self, temp_dir, make_dataset_file):
+        """Test that a 404 fails without retries."""
+        file = make_dataset_file(self.test_content, name="retry.bin")
+
+        with responses.RequestsMock() as rsps, patch(
+            "darus.DatasetFile.time.sleep"
+        ) as sleep:
+            rsps.add(
+                responses.GET,
+                f"{self.server_url}/api/access/datafile/12345/",
+                status=404,
+            )
+
+            list(file.download(temp_dir, retries=3))
+
+            sleep.assert_not_called()
+            assert file.retries == 0
+            assert len(rsps.calls) == 1
+
+    def test_retry_delay(self):
+        """Test the jittered exponential backoff and Retry-After dates."""
+        response = requests.Response()
+        response.status_code = 502
+        error = requests.exceptions.HTTPError(response=response)
+        for attempt in range(4):
+            delay = _retry_delay(error, attempt, backoff=2.0)
+            assert 2.0 * 2**attempt / 2 <= delay <= 2.0 * 2**attempt
+        assert MAX_RETRY_DELAY / 2 <= _retry_delay(error, 20) <= MAX_RETRY_DELAY
+
+        response.status_code = 429
+        response.headers["Retry-After"] = email.utils.formatdate(
+            time.time() + 60, usegmt=True
+        )
+        assert 55 <= _retry_delay(error, 0) <= 60
+
+        assert _retry_delay(requests.exceptions.ConnectionError(), 0) is not None
+        assert _retry_delay(requests.exceptions.InvalidURL(), 0) is None
+
 
 class TestDatasetFileValidation:
     """Test DatasetFile hash validation."""
@@ -289,6 +789,66 @@ class TestDatasetFileValidation:
 
         assert file.validate() is True
 
+    @pytest.mark.parametrize("hash_in_thread", [False, True])
+    def test_validation_reuses_download_digest(self, temp_dir, hash_in_thread):
+        """Test validation uses the MD5 computed while downloading."""
+        test_content = b"Hello, World!" * 100
+        file_info = {
+            "dataFile": {
+                "id": 12345,
+                "persistentId": "doi:10.70122/FK2/stream-hash",
+                "filename": "test.txt",
+                "filesize": len(test_content),
+                "checksum": {"value": hashlib.md5(test_content).hexdigest()},
+            }
+        }
+        server_url = "https://demo.dataverse.org"
+        file = DatasetFile(file_info, server_url)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                f"{server_url}/api/access/datafile/12345/",
+                body=test_content,
+                status=200,
+            )
+
+            list(file.download(temp_dir, chunk_size=64, hash_in_thread=hash_in_thread))
+
+        with patch("builtins.open", side_effect=AssertionError("file re-read")):
+            assert file.validate() is True
+
+    def test_validation_digest_of_resumed_download(self, temp_dir):
+        """Test the streamed MD5 includes the prefix of a resumed download."""
+        test_content = bytes(range(256)) * 4
+        file_info = {
+            "dataFile": {
+                "id": 12345,
+                "persistentId": "doi:10.70122/FK2/resume-hash",
+                "filename": "large.bin",
+                "filesize": len(test_content),
+                "checksum": {"value": hashlib.md5(test_content).hexdigest()},
+            }
+        }
+        server_url = "https://demo.dataverse.org"
+        file = DatasetFile(file_info, server_url)
+
+        (temp_dir / "large.bin.part").write_bytes(test_content[:300])
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                f"{server_url}/api/access/datafile/12345/",
+                body=test_content[300:],
+                status=206,
+                headers={"Content-Range": f"bytes 300-1023/{len(test_content)}"},
+            )
+
+            list(file.download(temp_dir))
+
+        assert file._digest == hashlib.md5(test_content).hexdigest()
+        assert file.validate() is True
+
     def test_failed_validation_wrong_hash(self, temp_dir):
         """Test validation failure with wrong hash."""
         test_content = b"Hello, World!"
@@ -343,6 +903,19 @@ class TestDatasetFileValidation:
 
         assert file.validate() is False
 
+    def test_hash_file(self, temp_dir):
+        """Test that mapped files are hashed in chunks, empty files without a map."""
+        content = bytes(range(256)) * 1000
+        test_file = temp_dir / "test.bin"
+        test_file.write_bytes(content)
+        assert (
+            _hash_file(test_file, chunk_size=4096) == hashlib.md5(content).hexdigest()
+        )
+
+        empty = temp_dir / "empty.bin"
+        empty.write_bytes(b"")
+        assert _hash_file(empty) == hashlib.md5(b"").hexdigest()
+
 
 class TestDatasetFileRemoval:
     """Test DatasetFile removal functionality."""
@@ -487,3 +1060,124 @@ class TestDatasetFileProcessing:
         # file.file_path is None by default
         result = file.process()
         assert result is True  # Should succeed but do nothing
+
+    @staticmethod
+    def _zip_bytes(members: dict) -> bytes:
+        """Creates a deflated ZIP archive of members."""
+        stream = io.BytesIO()
+        with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, content in members.items():
+                zf.writestr(name, content)
+        return stream.getvalue()
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_parallel_zip_extraction(self, temp_dir, executor, make_dataset_file):
+        """Test members are extracted by several workers with progress."""
+        members = {f"dir{i % 3}/file{i}.txt": f"content {i}" * i for i in range(20)}
+        file = make_dataset_file(
+            self._zip_bytes(members), name="parallel.zip", local=True
+        )
+        reported = []
+
+        result = file.process(
+            workers=4,
+            executor=executor,
+            progress=lambda extracted, total: reported.append((extracted, total)),
+        )
+
+        assert result is True
+        for name, content in members.items():
+            assert (temp_dir / name).read_text() == content
+        total = sum(len(content) for content in members.values())
+        assert reported[0] == (0, total)
+        assert reported[-1] == (total, total)
+        assert len(reported) == len(members) + 1
+
+    def test_parallel_zip_extraction_invalid_arguments(
+        self, temp_dir, make_dataset_file
+    ):
+        """Test invalid worker settings raise errors."""
+        file = make_dataset_file(
+            self._zip_bytes({"a.txt": "a"}), name="parallel.zip", local=True
+        )
+
+        with pytest.raises(ValueError):
+            file.process(workers=0)
+        with pytest.raises(ValueError):
+            file.process(workers=2, executor="fiber")
+
+
+class TestDatasetFileMembers:
+    """Test reading members of a downloaded ZIP archive in place."""
+
+    @staticmethod
+    def _zip_bytes() -> bytes:
+        """Creates a ZIP archive with a stored and a deflated member."""
+        stream = io.BytesIO()
+        with zipfile.ZipFile(stream, "w") as zf:
+            zf.writestr("stored.bin", bytes(range(256)) * 4)
+            zf.writestr("data/deflated.txt", "deflated " * 100, zipfile.ZIP_DEFLATED)
+        return stream.getvalue()
+
+    def test_list_members(self, temp_dir, make_dataset_file):
+        """Test the members are listed without extraction."""
+        file = make_dataset_file(self._zip_bytes(), name="virtual.zip", local=True)
+
+        names = [info.filename for info in file.list_members()]
+
+        assert names == ["stored.bin", "data/deflated.txt"]
+        assert not (temp_dir / "stored.bin").exists()
+
+    def test_uncompressed_size(self, temp_dir, make_dataset_file):
+        """Test the extracted size is read from the remote central directory."""
+        file = make_dataset_file(self._zip_bytes(), name="virtual.zip", local=True)
+        content = file.file_path.read_bytes()
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(
+                responses.GET,
+                "https://demo.dataverse.org/api/access/datafile/12345/",
+                callback=TestDatasetFileDownload._range_callback(content),
+            )
+
+            assert file.get_uncompressed_size() == 1024 + 900
+            assert (
+                file.get_uncompressed_size(member_filter=MemberFilter("*.txt")) == 900
+            )
+
+    def test_open_member(self, temp_dir, make_dataset_file):
+        """Test a compressed member is decompressed while reading."""
+        file = make_dataset_file(self._zip_bytes(), name="virtual.zip", local=True)
+
+        with file.open_member("data/deflated.txt") as member:
+            assert member.read() == b"deflated " * 100
+
+    def test_member_buffer(self, temp_dir, make_dataset_file):
+        """Test a stored member is mapped without copying."""
+        file = make_dataset_file(self._zip_bytes(), name="virtual.zip", local=True)
+
+        buffer = file.member_buffer("stored.bin")
+
+        assert isinstance(buffer, memoryview)
+        assert buffer.readonly
+        assert bytes(buffer) == bytes(range(256)) * 4
+
+        with pytest.raises(ValueError):
+            file.member_buffer("data/deflated.txt")
+        with pytest.raises(KeyError):
+            file.member_buffer("missing.bin")
+
+    def test_members_of_missing_archive(self, mock_file_info, temp_dir):
+        """Test reading members of an archive that is not downloaded."""
+        file = DatasetFile(mock_file_info, "https://demo.dataverse.org")
+
+        with pytest.raises(FileNotFoundError):
+            file.list_members(temp_dir)
+
+    def test_virtual_process_keeps_archive(self, temp_dir, make_dataset_file):
+        """Test virtual processing does not extract the archive."""
+        file = make_dataset_file(self._zip_bytes(), name="virtual.zip", local=True)
+
+        assert file.process(virtual=True) is True
+        assert file.file_path.exists()
+        assert not (temp_dir / "stored.bin").exists()
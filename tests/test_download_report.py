@@ -0,0 +1,130 @@
+"""Unit tests for the DownloadReport class."""
+
+import json
+import re
+import responses
+from unittest.mock import patch
+
+from darus import Dataset, DownloadReport
+from darus.DatasetFile import DatasetFile
+from darus.DownloadReport import FileReport, write_prometheus, write_trace
+from tests import test_dataset
+
+
+def _report(mock_file_info) -> DownloadReport:
+    """Creates a report of one downloaded file with known timings."""
+    report = DownloadReport("doi:10.70122/FK2/TEST", "1.2", "./data")
+    record = report.start_file(
+        DatasetFile(mock_file_info, "https://demo.dataverse.org")
+    )
+    record.stages = {"transfer": (1.0, 3.0), "hash": (3.0, 3.5)}
+    record.bytes = 1000
+    record.split("transfer", "connect", 0.5)
+    record.outcome = "done"
+    record.retries = 2
+    report["done"] += 1
+    report.seconds = 4.0
+    return report
+
+
+class TestDownloadReport:
+    """Test suite for the timings and the exports."""
+
+    def test_file_stages(self, mock_file_info):
+        """Test that the time to first byte is split off the transfer."""
+        record = _report(mock_file_info).files[0]
+        assert record.stages["connect"] == (1.0, 1.5)
+        assert record.stages["transfer"] == (1.5, 3.0)
+        assert record.duration("transfer") == 1.5
+        assert record.duration("extract") == 0
+        assert record.throughput == 1000 / 1.5
+
+    def test_stage_context(self, mock_file_info):
+        """Test that a stage is timed relative to the start of the download."""
+        record = FileReport(
+            DatasetFile(mock_file_info, "https://demo.dataverse.org"), 10.0
+        )
+        with patch("darus.DownloadReport.time.monotonic", side_effect=[12.0, 12.5]):
+            with record.stage("hash"):
+                pass
+        assert record.stages["hash"] == (2.0, 2.5)
+        assert record.throughput is None
+
+    def test_counts_and_dict(self, mock_file_info):
+        """Test that the report is the dict of counts and serializes its files."""
+        report = _report(mock_file_info)
+        assert dict(report) == {"done": 1, "skipped": 0, "failed": 0, "interrupted": 0}
+
+        content = report.to_dict()
+        assert content["bytes"] == 1000
+        assert content["retries"] == 2
+        assert content["throughput"] == 250
+        assert content["stages"]["connect"] == 0.5
+        assert list(content["files"][0]["stages"]) == ["connect", "transfer", "hash"]
+        json.dumps(content)
+
+    def test_write_prometheus(self, mock_file_info, temp_dir):
+        """Test the textfile format and the dataset labels."""
+        metrics = temp_dir / "darus.prom"
+        write_prometheus([_report(mock_file_info)], metrics)
+        lines = metrics.read_text().splitlines()
+
+        assert "# TYPE darus_download_files gauge" in lines
+        assert (
+            'darus_download_files{dataset="doi:10.70122/FK2/TEST",outcome="done"} 1'
+            in lines
+        )
+        assert 'darus_download_bytes{dataset="doi:10.70122/FK2/TEST"} 1000' in lines
+        assert (
+            'darus_download_stage_seconds{dataset="doi:10.70122/FK2/TEST",stage="transfer"} 1.5'
+            in lines
+        )
+        assert list(temp_dir.iterdir()) == [metrics]
+
+    def test_write_trace(self, mock_file_info, temp_dir):
+        """Test that every stage is a complete event in microseconds."""
+        trace = temp_dir / "trace.json"
+        write_trace([_report(mock_file_info)], trace)
+        events = json.loads(trace.read_text())["traceEvents"]
+
+        stages = {e["name"]: e for e in events if e["ph"] == "X"}
+        assert set(stages) == {"connect", "transfer", "hash"}
+        assert stages["transfer"]["ts"] == 1_500_000
+        assert stages["transfer"]["dur"] == 1_500_000
+        assert stages["transfer"]["args"]["file"] == "test_file.txt"
+        assert any(
+            e["name"] == "process_name" and e["args"]["name"] == "doi:10.70122/FK2/TEST"
+            for e in events
+        )
+
+    def test_download_returns_report(self, demo_dataset_urls, temp_dir):
+        """Test that a download reports the bytes and stages of every file, hashing while receiving is part of the transfer."""
+        contents = {("", "a.txt"): b"hello", ("docs", "b.txt"): b"world!"}
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "https://demo.dataverse.org/api/datasets/:persistentId/",
+                json=test_dataset.TestDatasetDownload._small_files_response(contents),
+                status=200,
+            )
+            dataset = Dataset(demo_dataset_urls[0])
+
+        with responses.RequestsMock() as rsps:
+            for file_id, content in enumerate(contents.values(), start=1):
+                rsps.add(
+                    responses.GET,
+                    re.compile(rf".*/api/access/datafile/{file_id}/.*"),
+                    body=content,
+                    status=200,
+                )
+            with patch("rich.console.Console.print"):
+                report = dataset.download(temp_dir, check_space=False)
+
+        assert isinstance(report, DownloadReport)
+        assert report["done"] == 2
+        assert report.bytes == len(b"hello") + len(b"world!")
+        assert [record.outcome for record in report.files] == ["done", "done"]
+        for record in report.files:
+            assert "transfer" in record.stages
+            assert "hash" not in record.stages
+        assert report.seconds > 0
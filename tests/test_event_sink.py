@@ -0,0 +1,99 @@
+"""Unit tests for the EventSink classes."""
+
+import io
+import json
+import re
+import responses
+from unittest.mock import patch
+
+from darus import CallbackSink, Dataset, DownloadEvent, JsonLinesSink, RichSink
+from darus.DatasetFile import DatasetFile
+from tests import test_dataset
+
+CONTENTS = {("", "a.txt"): b"hello", ("docs", "b.txt"): b"world!"}
+
+
+def _dataset(url) -> Dataset:
+    """Creates a dataset of two small files."""
+    with responses.RequestsMock() as rsps:
+        rsps.add(
+            responses.GET,
+            "https://demo.dataverse.org/api/datasets/:persistentId/",
+            json=test_dataset.TestDatasetDownload._small_files_response(CONTENTS),
+            status=200,
+        )
+        return Dataset(url)
+
+
+def _download(dataset: Dataset, path, **kwargs):
+    """Downloads the files of the dataset from mocked responses."""
+    with responses.RequestsMock() as rsps:
+        for file_id, content in enumerate(CONTENTS.values(), start=1):
+            rsps.add(
+                responses.GET,
+                re.compile(rf".*/api/access/datafile/{file_id}/.*"),
+                body=content,
+                status=200,
+            )
+        return dataset.download(path, check_space=False, **kwargs)
+
+
+class TestEventSink:
+    """Test suite for throttling and the headless sinks."""
+
+    def test_throttle_progress(self, mock_file_info):
+        """Test that progress is throttled per file, the last progress and other kinds pass."""
+        file = DatasetFile(mock_file_info, "https://demo.dataverse.org")
+        events = []
+        sink = CallbackSink(events.append, interval=1.0)
+
+        with patch("darus.EventSink.time.monotonic", side_effect=[0.0, 0.5, 1.5, 1.6]):
+            sink.send(DownloadEvent(DownloadEvent.STARTED, file, 0, 1024))
+            sink.send(DownloadEvent(DownloadEvent.PROGRESS, file, 100, 1024))
+            sink.send(DownloadEvent(DownloadEvent.PROGRESS, file, 200, 1024))
+            sink.send(DownloadEvent(DownloadEvent.PROGRESS, file, 300, 1024))
+            sink.send(DownloadEvent(DownloadEvent.PROGRESS, file, 1024, 1024))
+        sink.send(DownloadEvent(DownloadEvent.VERIFIED, file, 1024, 1024))
+
+        assert [(e.kind, e.completed) for e in events] == [
+            ("started", 0),
+            ("progress", 100),
+            ("progress", 300),
+            ("progress", 1024),
+            ("verified", 1024),
+        ]
+
+    def test_headless_download(self, demo_dataset_urls, temp_dir):
+        """Test that a download without display writes its events as JSON lines."""
+        dataset = _dataset(demo_dataset_urls[0])
+        stream = io.StringIO()
+
+        with patch("rich.console.Console.print") as mock_print:
+            report = _download(dataset, temp_dir, sinks=[JsonLinesSink(stream)])
+
+        assert report["done"] == 2
+        mock_print.assert_not_called()
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert {line["dataset"] for line in lines} == {dataset.persistent_id}
+        for name, size in (("a.txt", 5), ("b.txt", 6)):
+            kinds = [line["kind"] for line in lines if line["file"] == name]
+            assert kinds[0] == "started"
+            assert kinds[-1] == "verified"
+            assert "progress" in kinds
+            final = [line for line in lines if line["file"] == name][-1]
+            assert final["completed"] == final["total"] == size
+
+    def test_callback_and_display(self, demo_dataset_urls, temp_dir):
+        """Test that functions are wrapped as sinks next to the rich display."""
+        dataset = _dataset(demo_dataset_urls[0])
+        events = []
+        display = RichSink()
+
+        with patch("rich.console.Console.print"):
+            _download(dataset, temp_dir, sinks=[events.append, display])
+
+        assert {e.kind for e in events} >= {"started", "progress", "verified"}
+        descriptions = [task.description for task in display.progress.tasks]
+        assert "[green]✓ a.txt[/green]" in descriptions
+        total = display.progress.tasks[0]
+        assert total.completed == total.total == len(b"hello") + len(b"world!")
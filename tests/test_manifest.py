@@ -0,0 +1,137 @@
+"""Unit tests for the Manifest class."""
+
+import json
+import os
+
+from darus.Manifest import Manifest, MANIFEST_NAME
+
+
+def _write_local_copy(temp_dir, file, content):
+    """Writes content to the download location of file."""
+    file_path = file.get_file_path(temp_dir)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_bytes(content)
+    file.file_path = file_path
+    return file_path
+
+
+class TestManifestRecording:
+    """Test recording files and persisting the manifest."""
+
+    def test_record_and_reload(self, temp_dir, make_dataset_file):
+        """Test recorded entries survive a reload."""
+        content = b"manifest content"
+        file = make_dataset_file(content, name="test.txt", sub_dir="sub")
+        _write_local_copy(temp_dir, file, content)
+
+        manifest = Manifest(temp_dir)
+        manifest.record(file, "verified")
+        manifest.flush()
+
+        entry = Manifest(temp_dir).get(file)
+        assert entry["checksum"] == file.get_checksum()
+        assert entry["path"] == "sub/test.txt"
+        assert entry["size"] == len(content)
+        assert entry["status"] == "verified"
+
+    def test_flush_is_atomic(self, temp_dir, make_dataset_file):
+        """Test flushing leaves no temporary file behind."""
+        content = b"manifest content"
+        file = make_dataset_file(content, name="test.txt", sub_dir="sub")
+        _write_local_copy(temp_dir, file, content)
+
+        manifest = Manifest(temp_dir)
+        manifest.record(file, "verified")
+        manifest.flush()
+
+        assert [p.name for p in temp_dir.iterdir() if p.is_file()] == [MANIFEST_NAME]
+        with open(temp_dir / MANIFEST_NAME) as f:
+            assert "12345" in json.load(f)["files"]
+
+    def test_unreadable_manifest_is_ignored(self, temp_dir, caplog, make_dataset_file):
+        """Test a corrupt manifest starts empty instead of failing."""
+        (temp_dir / MANIFEST_NAME).write_text("not json")
+
+        manifest = Manifest(temp_dir)
+
+        assert manifest.get(make_dataset_file(b"x")) is None
+        assert "ignoring unreadable manifest" in caplog.text.lower()
+
+    def test_discard(self, temp_dir, make_dataset_file):
+        """Test discarded files are no longer verified."""
+        content = b"manifest content"
+        file = make_dataset_file(content)
+        _write_local_copy(temp_dir, file, content)
+
+        manifest = Manifest(temp_dir)
+        manifest.record(file, "verified")
+        manifest.discard(file)
+
+        assert manifest.get(file) is None
+        assert manifest.is_verified(file) is False
+
+
+class TestManifestVerification:
+    """Test skipping decisions based on the manifest."""
+
+    def test_unchanged_file_is_not_rehashed(self, temp_dir, make_dataset_file):
+        """Test a file with unchanged stat data is verified without hashing."""
+        content = b"manifest content"
+        file = make_dataset_file(content)
+        _write_local_copy(temp_dir, file, content)
+
+        manifest = Manifest(temp_dir)
+        manifest.record(file, "verified")
+
+        fresh = make_dataset_file(content)
+        fresh.validate = None  # Must not be called
+        assert manifest.is_verified(fresh) is True
+
+    def test_touched_file_is_rehashed(self, temp_dir, make_dataset_file):
+        """Test a file with a new mtime is hashed again and still verified."""
+        content = b"manifest content"
+        file = make_dataset_file(content)
+        file_path = _write_local_copy(temp_dir, file, content)
+
+        manifest = Manifest(temp_dir)
+        manifest.record(file, "verified")
+        os.utime(file_path, ns=(0, 0))
+
+        assert manifest.is_verified(make_dataset_file(content)) is True
+        assert manifest.get(file)["mtime"] == 0
+
+    def test_corrupt_file_is_not_verified(self, temp_dir, make_dataset_file):
+        """Test a modified file with the same size is detected by its hash."""
+        content = b"manifest content"
+        file = make_dataset_file(content)
+        file_path = _write_local_copy(temp_dir, file, content)
+
+        manifest = Manifest(temp_dir)
+        manifest.record(file, "verified")
+        file_path.write_bytes(b"X" * len(content))
+        os.utime(file_path, ns=(0, 0))
+
+        assert manifest.is_verified(make_dataset_file(content)) is False
+
+    def test_changed_checksum_is_not_verified(self, temp_dir, make_dataset_file):
+        """Test a file whose remote checksum changed is downloaded again."""
+        content = b"manifest content"
+        file = make_dataset_file(content)
+        _write_local_copy(temp_dir, file, content)
+
+        manifest = Manifest(temp_dir)
+        manifest.record(file, "verified")
+
+        assert manifest.is_verified(make_dataset_file(b"new content")) is False
+
+    def test_removed_archive_is_verified(self, temp_dir, make_dataset_file):
+        """Test processed and removed archives are skipped."""
+        content = b"zip content"
+        file = make_dataset_file(content)
+        file_path = _write_local_copy(temp_dir, file, content)
+
+        manifest = Manifest(temp_dir)
+        file_path.unlink()
+        manifest.record(file, "processed", removed=True)
+
+        assert manifest.is_verified(make_dataset_file(content)) is True
@@ -0,0 +1,103 @@
+"""Unit tests for the MemberFilter class and selective extraction."""
+
+import io
+import logging
+import pytest
+import zipfile
+
+from darus.MemberFilter import MemberFilter
+from darus.utils import parse_size
+from darus.ZipStreamExtractor import ZipStreamExtractor
+
+MEMBERS = {
+    "data/run_1.h5": b"1" * 1000,
+    "data/run_2.h5": b"2" * 10,
+    "data/tmp/cache.h5": b"c" * 1000,
+    "docs/readme.txt": b"readme",
+}
+
+
+def _zip_bytes() -> bytes:
+    """Creates a deflated ZIP archive of MEMBERS."""
+    stream = io.BytesIO()
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in MEMBERS.items():
+            zf.writestr(name, content)
+    return stream.getvalue()
+
+
+class TestMemberFilter:
+    """Test matching member names and sizes."""
+
+    def test_empty_filter_matches_everything(self):
+        """Test a filter without rules selects every member."""
+        member_filter = MemberFilter()
+
+        assert not member_filter
+        assert all(member_filter.matches(name, 1) for name in MEMBERS)
+
+    def test_include_and_exclude_globs(self):
+        """Test excludes take precedence over includes."""
+        member_filter = MemberFilter(include=["*.h5"], exclude="*/tmp/*")
+
+        assert member_filter.matches("data/run_1.h5", 1)
+        assert not member_filter.matches("data/tmp/cache.h5", 1)
+        assert not member_filter.matches("docs/readme.txt", 1)
+
+    def test_regex_and_sizes(self):
+        """Test regex and size limits with units."""
+        member_filter = MemberFilter(regex=r"run_\d+", min_size="1KB", max_size=5000)
+
+        assert member_filter.matches("data/run_1.h5", 1000)
+        assert not member_filter.matches("data/run_1.h5", 999)
+        assert not member_filter.matches("data/run_1.h5", 5001)
+        assert not member_filter.matches("docs/readme.txt", 1000)
+
+    def test_invalid_arguments(self):
+        """Test invalid regex and sizes raise errors."""
+        with pytest.raises(ValueError):
+            MemberFilter(regex="(")
+        with pytest.raises(ValueError):
+            MemberFilter(max_size="ten gigabytes")
+
+    def test_parse_size(self):
+        """Test sizes with decimal and binary units."""
+        assert parse_size(1024) == 1024
+        assert parse_size("500 MB") == 500 * 10**6
+        assert parse_size("1.5GiB") == int(1.5 * 2**30)
+
+
+class TestSelectiveExtraction:
+    """Test extracting only the selected members."""
+
+    def test_process_with_filter(self, temp_dir, caplog, make_dataset_file):
+        """Test process extracts only matching members and reports the skipped bytes."""
+        file = make_dataset_file(_zip_bytes(), name="filtered.zip", local=True)
+
+        with caplog.at_level(logging.INFO):
+            result = file.process(
+                member_filter=MemberFilter(include=["data/*"], min_size=100)
+            )
+
+        assert result is True
+        assert (temp_dir / "data/run_1.h5").exists()
+        assert (temp_dir / "data/tmp/cache.h5").exists()
+        assert not (temp_dir / "data/run_2.h5").exists()
+        assert not (temp_dir / "docs").exists()
+        assert file.skipped_bytes == 10 + len(b"readme")
+        assert "not matching the member filter" in caplog.text
+
+    def test_stream_extractor_with_filter(self, temp_dir):
+        """Test the stream extractor skips members without writing them."""
+        extractor = ZipStreamExtractor(
+            temp_dir, member_filter=MemberFilter(exclude=["*/tmp/*", "*.txt"])
+        )
+        content = _zip_bytes()
+        for i in range(0, len(content), 64):
+            extractor.feed(content[i : i + 64])
+
+        assert extractor.close() is True
+        assert (temp_dir / "data/run_2.h5").read_bytes() == MEMBERS["data/run_2.h5"]
+        assert not (temp_dir / "data/tmp").exists()
+        assert not (temp_dir / "docs").exists()
+        assert extractor.skipped_bytes == 1000 + len(b"readme")
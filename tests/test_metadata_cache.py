@@ -0,0 +1,109 @@
+"""Unit tests for the MetadataCache class and cached Dataset construction."""
+
+import logging
+import responses
+
+from darus import Dataset
+from darus.MetadataCache import MetadataCache
+from tests import test_dataset
+
+DATASET_API_URL = "https://demo.dataverse.org/api/datasets/:persistentId/"
+
+
+class TestMetadataCache:
+    """Test storing and loading cache entries."""
+
+    def test_store_and_load(self, temp_dir):
+        """Test a stored response is loaded with its validators."""
+        cache = MetadataCache(temp_dir)
+        key = MetadataCache.key("https://demo.dataverse.org", "doi:1/2", ":latest")
+
+        cache.store(key, {"data": 1}, etag='"abc"', last_modified="Wed, 01 Jan 2025")
+
+        entry = cache.load(key)
+        assert entry["response"] == {"data": 1}
+        assert MetadataCache.conditional_headers(entry) == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Wed, 01 Jan 2025",
+        }
+
+    def test_missing_entry(self, temp_dir):
+        """Test loading an uncached key."""
+        assert MetadataCache(temp_dir).load("missing") is None
+        assert MetadataCache.conditional_headers(None) == {}
+
+    def test_key_is_file_name(self):
+        """Test the key contains no path separators."""
+        key = MetadataCache.key("https://demo.dataverse.org", "doi:10.70/FK2/X", "1.2")
+        assert "/" not in key and ":" not in key
+
+    def test_unreadable_entry(self, temp_dir, caplog):
+        """Test a corrupt entry is ignored."""
+        cache = MetadataCache(temp_dir)
+        (temp_dir / "broken.json").write_text("not json")
+
+        assert cache.load("broken") is None
+        assert "ignoring unreadable metadata cache entry" in caplog.text.lower()
+
+
+class TestCachedDataset:
+    """Test Dataset construction with the metadata cache."""
+
+    def test_not_modified_uses_cache(self, demo_dataset_urls, temp_dir):
+        """Test a 304 response builds the dataset from the cache."""
+        url = demo_dataset_urls[0]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                DATASET_API_URL,
+                json=test_dataset.TestDatasetDownload._mock_dataset_response(),
+                headers={"ETag": '"v1"'},
+                status=200,
+            )
+            rsps.add(responses.GET, DATASET_API_URL, status=304)
+
+            Dataset(url, cache_dir=temp_dir)
+            dataset = Dataset(url, cache_dir=temp_dir)
+
+            assert rsps.calls[1].request.headers["If-None-Match"] == '"v1"'
+            assert dataset.title == "Test Dataset"
+            assert len(dataset.download_files) == 2
+
+    def test_offline_without_requests(self, demo_dataset_urls, temp_dir):
+        """Test offline mode builds the dataset without any request."""
+        url = demo_dataset_urls[0]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                DATASET_API_URL,
+                json=test_dataset.TestDatasetDownload._mock_dataset_response(),
+                status=200,
+            )
+            Dataset(url, cache_dir=temp_dir)
+
+        with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+            dataset = Dataset(url, cache_dir=temp_dir, offline=True)
+
+            assert len(rsps.calls) == 0
+            assert dataset.persistent_id == "doi:10.70122/FK2/TEST"
+            assert len(dataset.download_files) == 2
+
+    def test_offline_cache_miss(self, demo_dataset_urls, temp_dir, caplog):
+        """Test offline mode logs an error for an uncached dataset."""
+        with caplog.at_level(logging.ERROR):
+            dataset = Dataset(demo_dataset_urls[0], cache_dir=temp_dir, offline=True)
+
+        assert len(dataset.download_files) == 0
+        assert "is not in the metadata cache" in caplog.text
+
+    def test_failed_response_is_not_cached(self, demo_dataset_urls, temp_dir):
+        """Test error responses don't end up in the cache."""
+        url = demo_dataset_urls[0]
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, DATASET_API_URL, status=500)
+            Dataset(url, cache_dir=temp_dir)
+
+        assert list(temp_dir.iterdir()) == []
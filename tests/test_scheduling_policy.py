@@ -0,0 +1,99 @@
+"""Unit tests for the SchedulingPolicy class."""
+
+import pytest
+from types import SimpleNamespace
+
+from darus.SchedulingPolicy import SchedulingPolicy
+
+
+def _file(name: str, size: int, sub_dir: str = "") -> SimpleNamespace:
+    """Creates a stand-in for a DatasetFile with a name, directory and size."""
+    return SimpleNamespace(
+        name=name, sub_dir=sub_dir, get_filesize=lambda human=True: size
+    )
+
+
+FILES = [
+    _file("b.h5", 300, "raw"),
+    _file("readme.txt", 10),
+    _file("a.h5", 1000, "raw"),
+    _file("index.csv", 50, "docs"),
+    _file("c.h5", 500, "raw/extra"),
+]
+
+
+def _names(files: list) -> list:
+    return [f.name for f in files]
+
+
+class TestSchedulingPolicy:
+    """Test suite for the orders and priorities."""
+
+    def test_metadata_order(self):
+        """Test that the default keeps the metadata order."""
+        policy = SchedulingPolicy()
+        assert not policy
+        assert policy.apply(FILES) == FILES
+
+    def test_largest_and_smallest(self):
+        """Test ordering by size."""
+        assert _names(SchedulingPolicy("largest").apply(FILES)) == [
+            "a.h5",
+            "c.h5",
+            "b.h5",
+            "index.csv",
+            "readme.txt",
+        ]
+        assert _names(SchedulingPolicy("smallest").apply(FILES)) == [
+            "readme.txt",
+            "index.csv",
+            "b.h5",
+            "c.h5",
+            "a.h5",
+        ]
+
+    def test_equal_sizes_keep_metadata_order(self):
+        """Test that sorting by size is stable in both directions."""
+        files = [_file("x.h5", 100), _file("y.h5", 100), _file("z.h5", 10)]
+        assert _names(SchedulingPolicy("largest").apply(files)) == [
+            "x.h5",
+            "y.h5",
+            "z.h5",
+        ]
+        assert _names(SchedulingPolicy("smallest").apply(files)) == [
+            "z.h5",
+            "x.h5",
+            "y.h5",
+        ]
+
+    def test_interleave(self):
+        """Test that largest and smallest remaining files alternate."""
+        assert _names(SchedulingPolicy("interleave").apply(FILES)) == [
+            "a.h5",
+            "readme.txt",
+            "c.h5",
+            "index.csv",
+            "b.h5",
+        ]
+
+    def test_priorities(self):
+        """Test that globs and directories take precedence over the order."""
+        policy = SchedulingPolicy(
+            "largest", priorities={"docs/": 2, "*.txt": 1, "raw/extra": -1}
+        )
+        assert policy.priority(FILES[3]) == 2
+        assert policy.priority(FILES[4]) == -1
+        assert _names(policy.apply(FILES)) == [
+            "index.csv",
+            "readme.txt",
+            "a.h5",
+            "b.h5",
+            "c.h5",
+        ]
+
+    def test_invalid(self):
+        """Test that unknown orders and priorities are rejected."""
+        with pytest.raises(ValueError, match="Invalid scheduling order"):
+            SchedulingPolicy("random")
+        with pytest.raises(ValueError, match="Invalid priority"):
+            SchedulingPolicy(priorities={"docs": "high"})
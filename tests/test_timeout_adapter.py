@@ -0,0 +1,44 @@
+"""Unit tests for the TimeoutAdapter class."""
+
+import pytest
+import requests
+import socket
+from unittest.mock import patch
+
+from darus.TimeoutAdapter import DEFAULT_TIMEOUT, TimeoutAdapter
+
+
+class TestTimeoutAdapter:
+    """Test suite for the default timeout of the requests."""
+
+    @staticmethod
+    def _session(adapter: TimeoutAdapter) -> requests.Session:
+        """Creates a session sending its requests through the adapter."""
+        session = requests.Session()
+        session.mount("http://", adapter)
+        return session
+
+    def test_stalled_connection_times_out(self):
+        """Test that a server accepting the connection without responding raises a timeout."""
+        with socket.socket() as server:
+            server.bind(("127.0.0.1", 0))
+            server.listen(1)
+            url = f"http://127.0.0.1:{server.getsockname()[1]}/"
+            session = self._session(TimeoutAdapter((1.0, 0.2)))
+
+            with pytest.raises(requests.exceptions.ReadTimeout):
+                session.get(url)
+
+    def test_request_timeout_overrides_default(self):
+        """Test that the default is used unless a request sets its own timeout."""
+        adapter = TimeoutAdapter()
+        request = requests.Request("GET", "http://example.org/").prepare()
+
+        with patch("requests.adapters.HTTPAdapter.send") as send:
+            adapter.send(request)
+            adapter.send(request, timeout=5)
+
+        assert [c.kwargs["timeout"] for c in send.call_args_list] == [
+            DEFAULT_TIMEOUT,
+            5,
+        ]
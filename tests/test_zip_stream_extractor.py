@@ -0,0 +1,240 @@
+"""Unit tests for the ZipStreamExtractor and streaming extraction of DatasetFile."""
+
+import io
+import requests
+import zipfile
+import zlib
+import responses
+from unittest.mock import MagicMock, PropertyMock
+
+from darus.ZipStreamExtractor import ZipStreamExtractor, fetch_central_directory
+from tests.test_dataset_file import TestDatasetFileDownload
+
+SERVER_URL = "https://demo.dataverse.org"
+MEMBERS = {
+    "a.txt": b"Content of file a" * 100,
+    "sub/b.bin": bytes(range(256)) * 40,
+    "empty.txt": b"",
+}
+
+
+class _Unseekable(io.RawIOBase):
+    """A write only stream, so zipfile writes data descriptors."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+def _zip_bytes(compression=zipfile.ZIP_DEFLATED, seekable=True) -> bytes:
+    """Creates a ZIP archive of MEMBERS."""
+    stream = io.BytesIO() if seekable else _Unseekable()
+    with zipfile.ZipFile(stream, "w", compression=compression) as zf:
+        for name, content in MEMBERS.items():
+            zf.writestr(name, content)
+    return stream.getvalue() if seekable else bytes(stream.data)
+
+
+def _central_directory(content: bytes) -> dict:
+    """Returns the ZipInfo of every member, like fetch_central_directory."""
+    with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        return {info.filename: info for info in zf.infolist()}
+
+
+def _feed(extractor: ZipStreamExtractor, content: bytes, chunk_size: int = 100):
+    """Feeds content in chunks and closes the extractor."""
+    for i in range(0, len(content), chunk_size):
+        extractor.feed(content[i : i + chunk_size])
+    return extractor.close()
+
+
+class TestZipStreamExtractor:
+    """Test extracting members from a stream of bytes."""
+
+    def test_stored_and_deflated_members(self, temp_dir):
+        """Test members are extracted from their local headers."""
+        for compression in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            target = temp_dir / str(compression)
+            extractor = ZipStreamExtractor(target)
+
+            assert _feed(extractor, _zip_bytes(compression)) is True
+            for name, content in MEMBERS.items():
+                assert (target / name).read_bytes() == content
+
+    def test_deflated_data_descriptor_without_central_directory(self, temp_dir):
+        """Test the end of a deflated member is found without its sizes."""
+        extractor = ZipStreamExtractor(temp_dir)
+
+        assert _feed(extractor, _zip_bytes(seekable=False), chunk_size=7) is True
+        assert (temp_dir / "sub/b.bin").read_bytes() == MEMBERS["sub/b.bin"]
+
+    def test_stored_data_descriptor_uses_central_directory(self, temp_dir):
+        """Test sizes of stored members with data descriptor are taken from the central directory."""
+        content = _zip_bytes(zipfile.ZIP_STORED, seekable=False)
+
+        assert _feed(ZipStreamExtractor(temp_dir / "without"), content) is False
+
+        extractor = ZipStreamExtractor(temp_dir / "with", _central_directory(content))
+        assert _feed(extractor, content) is True
+        assert (temp_dir / "with/a.txt").read_bytes() == MEMBERS["a.txt"]
+
+    def test_bad_crc_removes_member(self, temp_dir, caplog):
+        """Test a member with wrong CRC is deleted and the extraction stops."""
+        content = bytearray(_zip_bytes(zipfile.ZIP_STORED))
+        content[content.index(b"Content") + 3] ^= 0xFF
+
+        extractor = ZipStreamExtractor(temp_dir)
+
+        assert _feed(extractor, bytes(content)) is False
+        assert not (temp_dir / "a.txt").exists()
+        assert "bad crc-32" in caplog.text.lower()
+
+    def test_paths_stay_in_target(self, temp_dir):
+        """Test member names can't escape the target directory."""
+        stream = io.BytesIO()
+        with zipfile.ZipFile(stream, "w") as zf:
+            zf.writestr("../../evil.txt", b"evil")
+
+        assert _feed(ZipStreamExtractor(temp_dir / "target"), stream.getvalue())
+        assert (temp_dir / "target/evil.txt").read_bytes() == b"evil"
+
+    def test_interrupted_stream(self, temp_dir):
+        """Test closing before the end removes the incomplete member."""
+        content = _zip_bytes(zipfile.ZIP_STORED)
+        extractor = ZipStreamExtractor(temp_dir)
+        extractor.feed(content[:200])
+
+        assert extractor.close() is False
+        assert not (temp_dir / "a.txt").exists()
+
+
+class TestFetchCentralDirectory:
+    """Test reading the central directory with range requests."""
+
+    def test_reads_members(self):
+        """Test the members are parsed from the end of the remote archive."""
+        content = _zip_bytes()
+        url = f"{SERVER_URL}/api/access/datafile/1/"
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(
+                responses.GET,
+                url,
+                callback=TestDatasetFileDownload._range_callback(content),
+            )
+            members = fetch_central_directory(requests, url)
+
+        assert set(members) == set(MEMBERS)
+        assert members["a.txt"].CRC == zlib.crc32(MEMBERS["a.txt"])
+
+    def test_without_range_support(self):
+        """Test None is returned if ranges are ignored, without reading the body."""
+        url = f"{SERVER_URL}/api/access/datafile/1/"
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, url, body=_zip_bytes(), status=200)
+            assert fetch_central_directory(requests, url) is None
+
+        http = MagicMock()
+        response = http.get.return_value.__enter__.return_value
+        response.status_code = 200
+        type(response).content = PropertyMock(side_effect=AssertionError("read"))
+        assert fetch_central_directory(http, url) is None
+        assert http.get.call_args.kwargs["stream"] is True
+
+
+class TestStreamExtractDownload:
+    """Test DatasetFile.download with streaming extraction."""
+
+    def test_extracts_without_archive(self, temp_dir, make_dataset_file):
+        """Test members are extracted while the archive is not written."""
+        content = _zip_bytes()
+        file = make_dataset_file(content, name="archive.zip")
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(
+                responses.GET,
+                f"{SERVER_URL}/api/access/datafile/12345/",
+                callback=TestDatasetFileDownload._range_callback(content),
+            )
+            list(file.download(temp_dir, stream_extract=True, keep_archive=False))
+
+        assert not (temp_dir / "archive.zip").exists()
+        assert (temp_dir / "sub/b.bin").read_bytes() == MEMBERS["sub/b.bin"]
+        assert file.validate() is True
+        assert file.process() is True
+        assert file.remove() is True
+
+    def test_keeps_archive(self, temp_dir, make_dataset_file):
+        """Test the archive is written next to the extracted members."""
+        content = _zip_bytes()
+        file = make_dataset_file(content, name="archive.zip")
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET, f"{SERVER_URL}/api/access/datafile/12345/", body=content
+            )
+            list(file.download(temp_dir, stream_extract=True))
+
+        assert (temp_dir / "archive.zip").read_bytes() == content
+        assert (temp_dir / "a.txt").read_bytes() == MEMBERS["a.txt"]
+        assert file.validate() is True
+
+    def test_unsupported_compression_keeps_archive(self, temp_dir, make_dataset_file):
+        """Test an archive that can't be streamed is written and extracted after the download."""
+        content = _zip_bytes(zipfile.ZIP_BZIP2)
+        file = make_dataset_file(content, name="archive.zip")
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(
+                responses.GET,
+                f"{SERVER_URL}/api/access/datafile/12345/",
+                callback=TestDatasetFileDownload._range_callback(content),
+            )
+            list(file.download(temp_dir, stream_extract=True, keep_archive=False))
+
+        assert (temp_dir / "archive.zip").read_bytes() == content
+        assert not (temp_dir / "a.txt").exists()
+        assert file.validate() is True
+        assert file.process() is True
+        assert (temp_dir / "sub/b.bin").read_bytes() == MEMBERS["sub/b.bin"]
+        assert file.remove() is True
+        assert not (temp_dir / "archive.zip").exists()
+
+    def test_without_central_directory_writes_archive(
+        self, temp_dir, make_dataset_file
+    ):
+        """Test the archive is written as fallback, if the central directory can't be read upfront."""
+        content = _zip_bytes()
+        file = make_dataset_file(content, name="archive.zip")
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET, f"{SERVER_URL}/api/access/datafile/12345/", body=content
+            )
+            list(file.download(temp_dir, stream_extract=True, keep_archive=False))
+
+        assert (temp_dir / "archive.zip").read_bytes() == content
+        assert (temp_dir / "a.txt").read_bytes() == MEMBERS["a.txt"]
+        assert file.process() is True
+        assert file.remove() is True
+
+    def test_wrong_archive_hash_removes_members(self, temp_dir, make_dataset_file):
+        """Test members of an archive with wrong MD5 are not kept."""
+        content = _zip_bytes()
+        file = make_dataset_file(content, name="archive.zip", checksum="0" * 32)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET, f"{SERVER_URL}/api/access/datafile/12345/", body=content
+            )
+            list(file.download(temp_dir, stream_extract=True, keep_archive=False))
+
+        assert not (temp_dir / "a.txt").exists()
+        assert file.validate() is False